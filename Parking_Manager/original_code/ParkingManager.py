@@ -3,30 +3,42 @@ import ElectricVehicle
 import sys
 import tkinter as tk
 
-root = tk.Tk()
-root.geometry("650x850")
-root.resizable(0,0)
-root.title("Parking Lot Manager")
-
-#input values
-command_value = tk.StringVar()
-num_value = tk.StringVar()
-ev_value = tk.StringVar()
-make_value = tk.StringVar()
-model_value = tk.StringVar()
-color_value = tk.StringVar()
-reg_value = tk.StringVar()
-level_value = tk.StringVar()
-ev_car_value = tk.IntVar()
-ev_car2_value = tk.IntVar()
-slot1_value = tk.StringVar()
-slot2_value = tk.StringVar()
-reg1_value = tk.StringVar()
-slot_value = tk.StringVar()
-ev_motor_value = tk.IntVar()
-level_remove_value = tk.StringVar()
-    
-tfield = tk.Text(root, width=70, height=15)
+#GUI state is created by createGui() so ParkingLot can be imported headless
+root = None
+command_value = num_value = ev_value = make_value = model_value = color_value = None
+reg_value = level_value = ev_car_value = ev_car2_value = slot1_value = slot2_value = None
+reg1_value = slot_value = ev_motor_value = level_remove_value = None
+tfield = None
+
+def createGui():
+    global root, command_value, num_value, ev_value, make_value, model_value, color_value
+    global reg_value, level_value, ev_car_value, ev_car2_value, slot1_value, slot2_value
+    global reg1_value, slot_value, ev_motor_value, level_remove_value, tfield
+
+    root = tk.Tk()
+    root.geometry("650x850")
+    root.resizable(0,0)
+    root.title("Parking Lot Manager")
+
+    #input values
+    command_value = tk.StringVar()
+    num_value = tk.StringVar()
+    ev_value = tk.StringVar()
+    make_value = tk.StringVar()
+    model_value = tk.StringVar()
+    color_value = tk.StringVar()
+    reg_value = tk.StringVar()
+    level_value = tk.StringVar()
+    ev_car_value = tk.IntVar()
+    ev_car2_value = tk.IntVar()
+    slot1_value = tk.StringVar()
+    slot2_value = tk.StringVar()
+    reg1_value = tk.StringVar()
+    slot_value = tk.StringVar()
+    ev_motor_value = tk.IntVar()
+    level_remove_value = tk.StringVar()
+
+    tfield = tk.Text(root, width=70, height=15)
     
 #Parking Lot class
 class ParkingLot:
@@ -299,6 +311,7 @@ class ParkingLot:
              
 def main():
 
+    createGui()
     parkinglot = ParkingLot()
     
     #input boxes and GUI
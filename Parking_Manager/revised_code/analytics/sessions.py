@@ -0,0 +1,121 @@
+"""Vectorized utilization analytics over recorded parking sessions.
+
+Every function works on whole NumPy columns, so millions of sessions take
+a handful of sorts and histogram passes rather than a Python loop.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+import numpy as np
+from storage.session_log import SessionLog
+
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+
+@dataclass
+class Sessions:
+    """Column arrays of completed sessions, times in seconds"""
+    arrival: np.ndarray
+    departure: np.ndarray
+    level: np.ndarray
+    is_ev: np.ndarray
+    space_id: np.ndarray
+    vehicle_type: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.arrival)
+
+    @classmethod
+    def from_log(cls, log: SessionLog) -> 'Sessions':
+        columns = log.columns()
+        return cls(arrival=np.frombuffer(columns['arrival'], dtype=np.float64),
+                   departure=np.frombuffer(columns['departure'], dtype=np.float64),
+                   level=np.frombuffer(columns['level'], dtype=np.int32),
+                   is_ev=np.frombuffer(columns['is_ev'], dtype=np.uint8).astype(bool),
+                   space_id=np.frombuffer(columns['space_id'], dtype=np.uint32),
+                   vehicle_type=np.frombuffer(columns['vehicle_type'], dtype=np.uint8))
+
+    def select(self, mask: np.ndarray) -> 'Sessions':
+        """Sessions where mask is true, e.g. sessions.select(sessions.is_ev)"""
+        return Sessions(self.arrival[mask], self.departure[mask], self.level[mask],
+                        self.is_ev[mask], self.space_id[mask], self.vehicle_type[mask])
+
+def occupancy_curve(sessions: Sessions, start: float, end: float,
+                    step: float = 300.0) -> Tuple[np.ndarray, np.ndarray]:
+    """Vehicles parked at each sample time from start to end, every step seconds"""
+    times = np.arange(start, end, step)
+    arrived = np.searchsorted(np.sort(sessions.arrival), times, side='right')
+    departed = np.searchsorted(np.sort(sessions.departure), times, side='right')
+    return times, arrived - departed
+
+def dwell_times(sessions: Sessions) -> np.ndarray:
+    return sessions.departure - sessions.arrival
+
+def dwell_distribution(sessions: Sessions, bins: int = 48, max_dwell: Optional[float] = None,
+                       percentiles: Sequence[float] = (50, 90, 99)) -> Dict[str, object]:
+    """Histogram, mean and percentiles of dwell time in seconds"""
+    dwell = dwell_times(sessions)
+    if not len(dwell):
+        return {'count': 0, 'mean': 0.0, 'percentiles': {p: 0.0 for p in percentiles},
+                'histogram': np.zeros(bins, dtype=np.int64), 'bin_edges': np.zeros(bins + 1)}
+    upper = max_dwell if max_dwell is not None else float(dwell.max()) or 1.0
+    histogram, bin_edges = np.histogram(dwell, bins=bins, range=(0.0, upper))
+    values = np.percentile(dwell, percentiles)
+    return {'count': len(dwell), 'mean': float(dwell.mean()),
+            'percentiles': dict(zip(percentiles, values.tolist())),
+            'histogram': histogram, 'bin_edges': bin_edges}
+
+def _hour_of_day(times: np.ndarray, utc_offset_hours: float) -> np.ndarray:
+    shifted = times + utc_offset_hours * SECONDS_PER_HOUR
+    return (np.floor_divide(shifted, SECONDS_PER_HOUR) % 24).astype(np.intp)
+
+def peak_hour_turnover(sessions: Sessions, utc_offset_hours: float = 0.0) -> Dict[str, object]:
+    """Average arrivals and departures per hour of day, and the busiest hour
+
+    Turnover counts both directions, so the peak hour is the one with the
+    most gate traffic rather than the highest occupancy.
+    """
+    if not len(sessions):
+        empty = np.zeros(24)
+        return {'arrivals_per_hour': empty, 'departures_per_hour': empty, 'peak_hour': None, 'days': 0}
+    span = float(sessions.departure.max() - sessions.arrival.min())
+    days = max(1, int(np.ceil(span / SECONDS_PER_DAY)))
+    arrivals = np.bincount(_hour_of_day(sessions.arrival, utc_offset_hours), minlength=24) / days
+    departures = np.bincount(_hour_of_day(sessions.departure, utc_offset_hours), minlength=24) / days
+    return {'arrivals_per_hour': arrivals, 'departures_per_hour': departures,
+            'peak_hour': int(np.argmax(arrivals + departures)), 'days': days}
+
+def level_utilization(sessions: Sessions, capacities: Dict[int, int], start: float,
+                      end: float) -> Dict[int, float]:
+    """Share of each level's space-time occupied between start and end
+
+    capacities maps level to the number of spaces on it; sessions are
+    clipped to the window so ones that straddle it count only in part.
+    """
+    if end <= start:
+        raise ValueError("end must be after start")
+    overlap = np.minimum(sessions.departure, end) - np.maximum(sessions.arrival, start)
+    np.clip(overlap, 0, None, out=overlap)
+    levels, inverse = np.unique(sessions.level, return_inverse=True)
+    occupied = np.bincount(inverse, weights=overlap, minlength=len(levels))
+    busy = dict(zip(levels.tolist(), occupied.tolist()))
+    window = end - start
+    return {level: (busy.get(level, 0.0) / (capacity * window) if capacity else 0.0)
+            for level, capacity in capacities.items()}
+
+def with_open_sessions(sessions: Sessions, open_sessions: Iterable[Tuple[bool, int, float, int]],
+                       level: int, now: float) -> Sessions:
+    """Append vehicles still parked, as if they left at now, so current occupancy counts too
+
+    open_sessions is SessionRecorder.open_sessions() for the given level.
+    """
+    rows = list(open_sessions)
+    if not rows:
+        return sessions
+    is_ev, space_id, arrival, vehicle_type = (np.asarray(column) for column in zip(*rows))
+    count = len(rows)
+    return Sessions(np.concatenate([sessions.arrival, arrival.astype(np.float64)]),
+                    np.concatenate([sessions.departure, np.full(count, now)]),
+                    np.concatenate([sessions.level, np.full(count, level, dtype=np.int32)]),
+                    np.concatenate([sessions.is_ev, is_ev.astype(bool)]),
+                    np.concatenate([sessions.space_id, space_id.astype(np.uint32)]),
+                    np.concatenate([sessions.vehicle_type, vehicle_type.astype(np.uint8)]))
@@ -0,0 +1,48 @@
+"""Compare park_many/remove_many against single-item calls in a loop.
+
+Usage: python benchmarks/batch_operations.py [--bays N] [--burst N] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.parking_controller import ParkingLotController
+from models.vehicle import VehicleInfo
+
+def run_single(controller: ParkingLotController, infos: list) -> float:
+    start = time.perf_counter()
+    space_ids = [controller.park_vehicle(info, False, False) for info in infos]
+    for space_id in space_ids:
+        controller.remove_vehicle(space_id, False)
+    return time.perf_counter() - start
+
+def run_batch(controller: ParkingLotController, infos: list) -> float:
+    start = time.perf_counter()
+    space_ids = controller.park_many(infos, False)
+    controller.remove_many(space_ids, False)
+    return time.perf_counter() - start
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bays', type=int, default=100_000)
+    parser.add_argument('--burst', type=int, default=5_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    infos = [VehicleInfo(f"BURST{i:06d}", "Honda", "Civic", "Blue") for i in range(args.burst)]
+    for name, runner in (('single', run_single), ('batch', run_batch)):
+        controller = ParkingLotController()
+        controller.initialize_lot(args.bays, 0, 1)
+        # Start from a half-full lot so the allocator has real work to do
+        controller.park_many((VehicleInfo(f"BASE{i:06d}", "Ford", "Focus", "Red")
+                              for i in range(args.bays // 2)), False)
+        best = min(runner(controller, infos) for _ in range(args.repeat))
+        print(f"{name:>6}: {best * 1000:8.2f} ms per {args.burst} park+remove "
+              f"({2 * args.burst / best:,.0f} ops/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Measure ParkingJournal write throughput per fsync policy and crash recovery time.
+
+Usage: python benchmarks/journal_throughput.py [--events N] [--history N] [--dir PATH]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.vehicle import VehicleInfo
+from storage.journal import FSYNC_POLICIES, ParkingJournal
+
+BAYS = 20_000
+
+def churn(controller, events: int, seed: int = 0) -> int:
+    """Drive park/remove traffic until the journal has seen `events` events"""
+    rng = random.Random(seed)
+    parked = {False: [], True: []}
+    written = 0
+    plate = 0
+    while written < events:
+        is_ev = rng.random() < 0.2
+        if parked[is_ev] and (rng.random() < 0.5 or not controller.free_space_count(is_ev)):
+            spaces = parked[is_ev]
+            i = rng.randrange(len(spaces))
+            spaces[i], spaces[-1] = spaces[-1], spaces[i]
+            controller.remove_vehicle(spaces.pop(), is_ev)
+        else:
+            plate += 1
+            space_id = controller.park_vehicle(VehicleInfo(f"J{plate:08d}", "Kia", "Niro", "Grey"), is_ev, False)
+            if space_id is None:
+                continue
+            parked[is_ev].append(space_id)
+        written += 1
+    return written
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=200_000)
+    parser.add_argument('--history', type=int, default=1_000_000)
+    parser.add_argument('--dir', default=None, help="directory on the disk to test (default: a temp dir)")
+    args = parser.parse_args()
+    root = tempfile.mkdtemp(dir=args.dir)
+
+    try:
+        for policy in FSYNC_POLICIES:
+            events = args.events if policy != 'always' else args.events // 10
+            directory = os.path.join(root, policy)
+            journal = ParkingJournal(directory, fsync=policy, snapshot_every=0)
+            controller = journal.recover()
+            controller.initialize_lot(BAYS, BAYS // 4, 1)
+            start = time.perf_counter()
+            churn(controller, events)
+            journal.commit()
+            elapsed = time.perf_counter() - start
+            journal.close()
+            size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+            print(f"fsync={policy:<8} {events:>9,} events in {elapsed:6.2f}s "
+                  f"({events / elapsed:>9,.0f} events/s, {size / events:.1f} B/event)")
+
+        directory = os.path.join(root, 'history')
+        journal = ParkingJournal(directory)
+        controller = journal.recover()
+        controller.initialize_lot(BAYS, BAYS // 4, 1)
+        churn(controller, args.history, seed=1)
+        journal.close()
+        expected = controller.summary()
+
+        start = time.perf_counter()
+        journal = ParkingJournal(directory)
+        recovered = journal.recover()
+        elapsed = time.perf_counter() - start
+        journal.close()
+        status = "matches" if recovered.summary() == expected else "DIFFERS from"
+        print(f"recovered {journal.sequence:,} events in {elapsed * 1000:.0f} ms; state {status} the original")
+    finally:
+        shutil.rmtree(root)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Measure the memory held by a ParkingLotController with tracemalloc.
+
+Usage: python benchmarks/memory_footprint.py [--bays N] [--fill 0.8]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.parking_controller import ParkingLotController
+from models.vehicle import VehicleInfo
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bays', type=int, default=100_000)
+    parser.add_argument('--fill', type=float, default=0.8)
+    args = parser.parse_args()
+
+    regular = args.bays * 4 // 5
+    ev = args.bays - regular
+    infos = [(VehicleInfo(f"REG{i:07d}", "Toyota", "Corolla", "Silver"), i % 5 == 0)
+             for i in range(int(args.bays * args.fill))]
+
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    controller = ParkingLotController()
+    controller.initialize_lot(regular, ev, 1)
+    empty = tracemalloc.get_traced_memory()[0] - baseline
+    start = time.perf_counter()
+    for info, is_ev in infos:
+        controller.park_vehicle(info, is_ev, False)
+    elapsed = time.perf_counter() - start
+    full = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    gc_start = time.perf_counter()
+    gc.collect()
+    gc_elapsed = time.perf_counter() - gc_start
+
+    print(f"{args.bays:,} bays ({regular:,} regular / {ev:,} EV), {len(infos):,} parked")
+    print(f"empty lot:  {empty / 2**20:8.2f} MiB ({empty / args.bays:6.1f} B/bay)")
+    print(f"filled lot: {full / 2**20:8.2f} MiB ({full / args.bays:6.1f} B/bay)")
+    print(f"parking:    {elapsed:8.3f} s, full gc pass {gc_elapsed * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
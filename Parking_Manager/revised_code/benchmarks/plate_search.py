@@ -0,0 +1,92 @@
+"""Time prefix, wildcard and fuzzy registration search on a lot of parked plates.
+
+Usage: python benchmarks/plate_search.py [--plates N] [--queries N]
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.parking_controller import ParkingLotController
+from models.vehicle import VehicleInfo
+
+LETTERS = string.ascii_uppercase
+
+def random_plate(rng: random.Random) -> str:
+    """UK-style plate such as AB12 CDE"""
+    return (rng.choice(LETTERS) + rng.choice(LETTERS) + f"{rng.randrange(100):02d} "
+            + ''.join(rng.choice(LETTERS) for _ in range(3)))
+
+def typo(plate: str, rng: random.Random) -> str:
+    """One substituted character, as a misread camera plate would have"""
+    chars = [char for char in plate if char != ' ']
+    i = rng.randrange(len(chars))
+    chars[i] = rng.choice(LETTERS + string.digits)
+    return ''.join(chars)
+
+def timed_queries(label: str, search, queries: list) -> None:
+    timings, found = [], 0
+    for query in queries:
+        start = time.perf_counter()
+        found += len(search(query))
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"{label:<28} median {statistics.median(timings) * 1000:7.2f} ms  "
+          f"p99 {timings[int(len(timings) * 0.99)] * 1000:7.2f} ms  "
+          f"{found / len(queries):8.1f} results/query")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--plates', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    plates = list({random_plate(rng) for _ in range(args.plates)})
+    controller = ParkingLotController()
+    controller.initialize_lot(len(plates), 0, 1)
+    start = time.perf_counter()
+    controller.park_many((VehicleInfo(plate, "Ford", "Focus", "Blue") for plate in plates), False)
+    print(f"parked and indexed {len(plates):,} plates in {time.perf_counter() - start:.2f}s")
+
+    sample = rng.sample(plates, args.queries)
+    timed_queries("prefix (4 chars)", controller.find_registrations_by_prefix,
+                  [plate[:4] for plate in sample])
+    timed_queries("wildcard AB?? C*", controller.find_registrations_matching,
+                  [plate[:2] + '??' + plate[4:6] + '*' for plate in sample])
+    timed_queries("wildcard *12 CDE", controller.find_registrations_matching,
+                  ['*' + plate[2:] for plate in sample])
+    timed_queries("similar, 1 edit", lambda plate: controller.find_similar_registrations(plate, 1),
+                  [typo(plate, rng) for plate in sample])
+    timed_queries("similar, 2 edits", lambda plate: controller.find_similar_registrations(plate, 2),
+                  [typo(typo(plate, rng), rng) for plate in sample])
+
+    # What the index adds to each park/remove pair
+    churn = rng.sample(range(1, len(plates) + 1), min(20_000, len(plates)))
+    start = time.perf_counter()
+    for space_id in churn:
+        vehicle = controller.take_vehicle(space_id, False)
+        controller.place_vehicle(vehicle, False, space_id)
+    elapsed = time.perf_counter() - start
+    print(f"remove + re-park churn       {elapsed / len(churn) * 1e6:7.1f} us per pair")
+
+    # Removing most of the lot leaves posting lists mostly stale; no single removal may stall on cleanup
+    drain = rng.sample(range(1, len(plates) + 1), len(plates) * 3 // 5)
+    slowest = 0.0
+    start = time.perf_counter()
+    for space_id in drain:
+        began = time.perf_counter()
+        controller.take_vehicle(space_id, False)
+        slowest = max(slowest, time.perf_counter() - began)
+    elapsed = time.perf_counter() - start
+    print(f"remove 60% of the lot        {elapsed / len(drain) * 1e6:7.1f} us per remove, "
+          f"slowest {slowest * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
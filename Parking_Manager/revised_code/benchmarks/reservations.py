@@ -0,0 +1,63 @@
+"""Time booking, availability queries and walk-in parking on a heavily pre-booked EV lot.
+
+Usage: python benchmarks/reservations.py [--bays N] [--bookings N] [--days N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.parking_controller import ParkingLotController
+from controllers.reservations import ReservationBook
+from models.vehicle import VehicleInfo
+
+def timed(label: str, operation, count: int) -> None:
+    start = time.perf_counter()
+    for i in range(count):
+        operation(i)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<26} {elapsed / count * 1e6:9.1f} us/op")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bays', type=int, default=2_000)
+    parser.add_argument('--bookings', type=int, default=50_000)
+    parser.add_argument('--days', type=int, default=30)
+    args = parser.parse_args()
+
+    now = [0.0]
+    controller = ParkingLotController()
+    controller.initialize_lot(0, args.bays, 1)
+    book = ReservationBook(controller, clock=lambda: now[0])
+    rng = random.Random(5)
+    span = args.days * 86400
+
+    def window():
+        start = 3600 + rng.randrange(span // 900) * 900
+        return start, start + rng.choice((1, 2, 4, 8)) * 3600
+
+    booked = [0]
+
+    def reserve(_):
+        booked[0] += book.reserve(*window(), True) is not None
+
+    timed("reserve", reserve, args.bookings)
+    print(f"  {booked[0]:,} of {args.bookings:,} bookings placed on {args.bays:,} bays")
+    timed("is_available 09:00-17:00", lambda i: book.is_available(i % args.days * 86400 + 32400,
+                                                                  i % args.days * 86400 + 61200, True), 200)
+    timed("next_available (8h)", lambda i: book.next_available(True, 8 * 3600, rng.randrange(span)), 200)
+
+    # Walk-ins an hour in: they must skip every bay held for a booking about to start
+    now[0] = 3600.0
+    book.advance()
+    held = len(controller.held_spaces(True))
+    timed("walk-in park_vehicle", lambda i: controller.park_vehicle(
+        VehicleInfo(f"WALK{i:06d}", "Nissan", "Leaf", "White"), True, False), 1000)
+    print(f"  {held:,} bays held for bookings starting within the hour")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Benchmark suite for parking controller hot paths, revised and legacy.
+
+Writes machine-readable JSON so runs from different versions can be
+diffed; --compare flags cases that got slower than a saved baseline.
+
+Usage: python benchmarks/run_benchmarks.py [--quick] [--out results.json]
+                                           [--compare baseline.json] [--threshold 0.2]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+REVISED_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEGACY_DIR = os.path.join(os.path.dirname(REVISED_DIR), 'original_code')
+
+# Add the revised and legacy code to the Python path
+sys.path.append(REVISED_DIR)
+sys.path.append(LEGACY_DIR)
+
+from controllers.parking_controller import ParkingLotController
+from models.vehicle import VehicleInfo
+import ParkingManager as legacy_manager
+import Vehicle as legacy_vehicle
+
+COLORS = ['Red', 'Blue', 'Black', 'White', 'Silver', 'Grey', 'Green', 'Yellow', 'Orange', 'Brown']
+
+def plate(i: int) -> str:
+    return f"B{i:08d}"
+
+def info(i: int) -> VehicleInfo:
+    return VehicleInfo(plate(i), "Toyota", "Corolla", COLORS[i % len(COLORS)])
+
+# -- Lot builders (untimed setup) ----------------------------------------
+
+def revised_lot(bays: int, fill: float) -> ParkingLotController:
+    controller = ParkingLotController()
+    controller.initialize_lot(bays, 0, 1)
+    controller.park_many((info(i) for i in range(int(bays * fill))), False)
+    return controller
+
+def legacy_lot(bays: int, fill: float):
+    lot = legacy_manager.ParkingLot()
+    lot.createParkingLot(bays, 0, 1)
+    # Filling through park() is quadratic, so set the slots directly
+    occupied = int(bays * fill)
+    for i in range(occupied):
+        lot.slots[i] = legacy_vehicle.Car(plate(i), "Toyota", "Corolla", COLORS[i % len(COLORS)])
+    lot.numOfOccupiedSlots = occupied
+    lot.slotid = occupied
+    return lot
+
+# -- Timed operations -------------------------------------------------------
+
+def revised_churn(controller: ParkingLotController, rng: random.Random, state: dict) -> None:
+    """Remove a random parked vehicle, then park a new one"""
+    occupied = state['occupied']
+    i = rng.randrange(len(occupied))
+    occupied[i], occupied[-1] = occupied[-1], occupied[i]
+    controller.remove_vehicle(occupied.pop(), False)
+    state['next'] += 1
+    occupied.append(controller.park_vehicle(info(state['next']), False, False))
+
+def legacy_churn(lot, rng: random.Random, state: dict) -> None:
+    occupied = state['occupied']
+    i = rng.randrange(len(occupied))
+    occupied[i], occupied[-1] = occupied[-1], occupied[i]
+    lot.leave(occupied.pop(), 0)
+    state['next'] += 1
+    # park() returns a running counter rather than the slot it used, so callers
+    # have to look the slot up themselves
+    occupied.append(lot.getEmptySlot() + 1)
+    lot.park(plate(state['next']), "Toyota", "Corolla", "Red", 0, 0)
+
+def measure(operation: Callable[[], object], ops: int, repeat: int) -> Dict[str, float]:
+    """Time `ops` calls per round and report per-operation statistics"""
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(ops):
+            operation()
+        rounds.append((time.perf_counter() - start) / ops)
+    return {
+        'seconds_per_op_min': min(rounds),
+        'seconds_per_op_median': statistics.median(rounds),
+        'ops_per_second': 1 / min(rounds),
+    }
+
+def build_cases(quick: bool) -> List[dict]:
+    """Describe every benchmark as (name, implementation, params, setup -> operation)"""
+    init_sizes = [1_000, 100_000] if quick else [1_000, 100_000, 1_000_000]
+    lot_size = 10_000 if quick else 100_000
+    fills = [0.1, 0.5, 0.9, 0.99]
+    cases = []
+
+    for bays in init_sizes:
+        cases.append(dict(name='initialize_lot', impl='revised', params={'bays': bays}, ops=1,
+                          setup=lambda bays=bays: (lambda: ParkingLotController().initialize_lot(bays, 0, 1))))
+        cases.append(dict(name='initialize_lot', impl='legacy', params={'bays': bays}, ops=1,
+                          setup=lambda bays=bays: (lambda: legacy_manager.ParkingLot().createParkingLot(bays, 0, 1))))
+
+    for fill in fills:
+        def revised_setup(fill=fill):
+            controller, rng = revised_lot(lot_size, fill), random.Random(1)
+            state = {'occupied': list(range(1, int(lot_size * fill) + 1)), 'next': lot_size}
+            return lambda: revised_churn(controller, rng, state)
+
+        def legacy_setup(fill=fill):
+            lot, rng = legacy_lot(lot_size, fill), random.Random(1)
+            state = {'occupied': list(range(1, int(lot_size * fill) + 1)), 'next': lot_size}
+            return lambda: legacy_churn(lot, rng, state)
+
+        params = {'bays': lot_size, 'fill': fill}
+        cases.append(dict(name='park_remove_churn', impl='revised', params=params, ops=2000, setup=revised_setup))
+        cases.append(dict(name='park_remove_churn', impl='legacy', params=params, ops=50, setup=legacy_setup))
+
+    near_full = {'bays': lot_size, 'fill': 0.999}
+    cases.append(dict(name='find_available_space', impl='revised', params=near_full, ops=10000,
+                      setup=lambda: (lambda c: lambda: c.find_available_space(False))(revised_lot(lot_size, 0.999))))
+    cases.append(dict(name='find_available_space', impl='legacy', params=near_full, ops=20,
+                      setup=lambda: (lambda l: l.getEmptySlot)(legacy_lot(lot_size, 0.999))))
+
+    half = {'bays': lot_size, 'fill': 0.8, 'colors': len(COLORS)}
+    cases.append(dict(name='find_vehicles_by_color', impl='revised', params=half, ops=20,
+                      setup=lambda: (lambda c: lambda: c.find_vehicles_by_color('Red', False))(revised_lot(lot_size, 0.8))))
+    cases.append(dict(name='find_vehicles_by_color', impl='legacy', params=half, ops=20,
+                      setup=lambda: (lambda l: lambda: l.getSlotNumFromColor('Red'))(legacy_lot(lot_size, 0.8))))
+
+    def lookup_setup(builder, lookup):
+        target = builder(lot_size, 0.8)
+        rng = random.Random(2)
+        parked = int(lot_size * 0.8)
+        return lambda: lookup(target, plate(rng.randrange(parked)))
+
+    cases.append(dict(name='get_vehicle_location', impl='revised', params=half, ops=10000,
+                      setup=lambda: lookup_setup(revised_lot, ParkingLotController.get_vehicle_location)))
+    cases.append(dict(name='get_vehicle_location', impl='legacy', params=half, ops=20,
+                      setup=lambda: lookup_setup(legacy_lot, legacy_manager.ParkingLot.getSlotNumFromRegNum)))
+
+    # Legacy ParkingLot.status() only writes into a Tk widget, so it has no headless counterpart
+    cases.append(dict(name='get_lot_status', impl='revised', params=half, ops=5,
+                      setup=lambda: (lambda c: c.get_lot_status)(revised_lot(lot_size, 0.8))))
+    cases.append(dict(name='summary', impl='revised', params=half, ops=10000,
+                      setup=lambda: (lambda c: c.summary)(revised_lot(lot_size, 0.8))))
+    return cases
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REVISED_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def case_key(result: dict) -> str:
+    return f"{result['name']}[{result['impl']}]" + json.dumps(result['params'], sort_keys=True)
+
+def compare(results: List[dict], baseline_path: str, threshold: float) -> List[str]:
+    with open(baseline_path) as baseline_file:
+        baseline = {case_key(result): result for result in json.load(baseline_file)['results']}
+    regressions = []
+    for result in results:
+        before = baseline.get(case_key(result))
+        if before is None:
+            continue
+        ratio = result['seconds_per_op_min'] / before['seconds_per_op_min']
+        if ratio > 1 + threshold:
+            regressions.append(f"{case_key(result)} is {ratio:.2f}x slower than baseline")
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help="smaller lots for a fast smoke run")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--out', help="write JSON results to this file instead of stdout")
+    parser.add_argument('--compare', help="baseline JSON from an earlier run")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed slowdown before flagging")
+    args = parser.parse_args()
+
+    results = []
+    for case in build_cases(args.quick):
+        operation = case['setup']()
+        stats = measure(operation, case['ops'], args.repeat)
+        result = {'name': case['name'], 'impl': case['impl'], 'params': case['params'],
+                  'ops_per_round': case['ops'], 'rounds': args.repeat, **stats}
+        results.append(result)
+        print(f"{case_key(result):<80} {stats['seconds_per_op_min'] * 1e6:>12.2f} us/op", file=sys.stderr)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'quick': args.quick,
+        },
+        'results': results,
+    }
+    if args.out:
+        with open(args.out, 'w') as out:
+            json.dump(report, out, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""Time the session analytics over millions of synthetic historical sessions.
+
+Usage: python benchmarks/session_analytics.py [--sessions N] [--days N] [--levels N]
+Requires numpy (see requirements.txt).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics.sessions import (Sessions, dwell_distribution, level_utilization, occupancy_curve,
+                                peak_hour_turnover)
+from storage.session_log import SessionLog
+
+def fill_log(log: SessionLog, sessions: int, days: int, levels: int) -> float:
+    """Append sessions with a morning-heavy arrival pattern and return the time taken"""
+    rng = random.Random(7)
+    span = days * 86400
+    start = time.perf_counter()
+    for i in range(sessions):
+        day = rng.randrange(days) * 86400
+        arrival = day + min(rng.gauss(9.5, 3.0), 23.9) % 24 * 3600
+        departure = arrival + rng.expovariate(1 / 5400)
+        log.append(arrival, min(departure, span), rng.randrange(levels), rng.random() < 0.2,
+                   rng.randint(1, 500), 0)
+    return time.perf_counter() - start
+
+def timed(label: str, function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    print(f"{label:<22} {(time.perf_counter() - start) * 1000:9.1f} ms")
+    return result
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=2_000_000)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--levels', type=int, default=4)
+    args = parser.parse_args()
+
+    log = SessionLog(args.sessions)
+    elapsed = fill_log(log, args.sessions, args.days, args.levels)
+    print(f"recorded {args.sessions:,} sessions in {elapsed:.2f}s "
+          f"({args.sessions / elapsed:,.0f}/s), log holds {len(log):,}")
+
+    sessions = timed("load columns", Sessions.from_log, log)
+    span = args.days * 86400.0
+    timed("occupancy curve (5m)", occupancy_curve, sessions, 0.0, span, 300.0)
+    dwell = timed("dwell distribution", dwell_distribution, sessions)
+    turnover = timed("peak hour turnover", peak_hour_turnover, sessions)
+    utilization = timed("level utilization", level_utilization, sessions,
+                        {level: 500 for level in range(args.levels)}, 0.0, span)
+
+    print(f"median dwell {dwell['percentiles'][50] / 60:.0f} min, "
+          f"p99 {dwell['percentiles'][99] / 60:.0f} min; peak hour {turnover['peak_hour']}:00")
+    print("utilization " + ", ".join(f"L{level} {share:.1%}" for level, share in utilization.items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Compare write throughput and restore time of the controller storage backends.
+
+Usage: python benchmarks/storage_backends.py [--bays N] [--ops N] [--processes N] [--dir DIR]
+The multi-process run gives each process its own level in one shared SQLite file.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional, Tuple
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.parking_controller import ParkingLotController
+from models.vehicle import VehicleInfo
+from storage.backends import InMemoryBackend, SQLiteBackend, StorageBackend
+
+COLORS = ['Red', 'Blue', 'Black', 'White', 'Silver']
+
+def churn(controller: ParkingLotController, ops: int, seed: int,
+          after_op: Optional[Callable[[], None]] = None) -> float:
+    """Park and remove at random on a half-full lot; return seconds taken"""
+    rng = random.Random(seed)
+    capacity = controller.capacity(False)
+    start = time.perf_counter()
+    for op in range(ops):
+        if rng.random() < 0.5:
+            controller.park_vehicle(VehicleInfo(f"S{seed}-{op}", "Kia", "Niro", rng.choice(COLORS)), False, False)
+        else:
+            controller.remove_vehicle(rng.randint(1, capacity), False)
+        if after_op is not None:
+            after_op()
+    return time.perf_counter() - start
+
+def run_backend(make_backend: Callable[[], Optional[StorageBackend]], bays: int, ops: int,
+                level: int = 1, seed: int = 0, commit_each: bool = False) -> Tuple[float, Optional[float]]:
+    """(ops/s at the gate, rows/s committed) of churn with the backend attached
+
+    The gate rate is what callers of the controller see. For SQLite the
+    committed rate counts the rows the backend wrote from attach() until
+    close() returned, so work left to the flush thread is not hidden.
+    commit_each calls commit() after every operation, one transaction each.
+    """
+    controller = ParkingLotController()
+    controller.initialize_lot(bays, 0, level)
+    controller.park_many((VehicleInfo(f"F{level}-{i}", "Kia", "Niro", COLORS[i % len(COLORS)])
+                          for i in range(bays // 2)), False)
+    backend = make_backend()
+    if backend is not None:
+        backend.attach(controller)
+    sqlite = isinstance(backend, SQLiteBackend)
+    rows_before = backend.committed_rows if sqlite else 0
+    elapsed = churn(controller, ops, seed, backend.commit if commit_each else None)
+    gate_rate = ops / elapsed
+    if backend is not None:
+        start = time.perf_counter()
+        backend.close()
+        elapsed += time.perf_counter() - start
+    return gate_rate, (backend.committed_rows - rows_before) / elapsed if sqlite else None
+
+def kiosk_process(path: str, level: int, bays: int, ops: int) -> float:
+    return run_backend(lambda: SQLiteBackend(path), bays, ops, level=level, seed=level)[1]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bays', type=int, default=10_000)
+    parser.add_argument('--ops', type=int, default=50_000)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--dir', help="where to put the database files (default: a temporary directory)")
+    args = parser.parse_args()
+    directory = args.dir or tempfile.mkdtemp(prefix='parking-storage-')
+
+    def database(name: str) -> str:
+        path = os.path.join(directory, name)
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        return path
+
+    # (label, backend, commit() after every op); the flush thread coalesces whatever is
+    # queued, so only committing per op measures one transaction per event
+    cases = [
+        ('no backend', lambda: None, False),
+        ('in-memory', InMemoryBackend, False),
+        ('sqlite, commit per op', lambda: SQLiteBackend(database('single.db')), True),
+        ('sqlite, commit per op, synchronous=FULL',
+         lambda: SQLiteBackend(database('single_full.db'), synchronous='FULL'), True),
+        ('sqlite, batched', lambda: SQLiteBackend(database('batched.db')), False),
+        ('sqlite, batched, synchronous=FULL', lambda: SQLiteBackend(database('full.db'), synchronous='FULL'), False),
+    ]
+    for label, make_backend, commit_each in cases:
+        ops = args.ops // 10 if commit_each else args.ops
+        gate_rate, committed_rate = run_backend(make_backend, args.bays, ops, commit_each=commit_each)
+        committed = f", {committed_rate:>8,.0f} rows/s committed" if committed_rate is not None else ''
+        print(f"{label:<42} {gate_rate:>8,.0f} ops/s at the gate{committed}")
+
+    path = database('restore.db')
+    run_backend(lambda: SQLiteBackend(path), args.bays, args.ops)
+    start = time.perf_counter()
+    restored = SQLiteBackend(path).attach(level=1)
+    print(f"restore {restored.summary()['regular']['occupied']:,} vehicles from sqlite: "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+    path = database('shared.db')
+    SQLiteBackend(path).close()  # create the schema before the processes race for it
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.processes) as pool:
+        rates = list(pool.map(kiosk_process, [path] * args.processes, range(1, args.processes + 1),
+                              [args.bays] * args.processes, [args.ops] * args.processes))
+    elapsed = time.perf_counter() - start
+    print(f"{args.processes} processes sharing one database: {args.processes * args.ops / elapsed:,.0f} ops/s "
+          f"overall ({min(rates):,.0f}-{max(rates):,.0f} rows/s committed per process)")
+    print(f"occupancy by level: {SQLiteBackend(path).occupancy()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+from typing import Dict, Set, Tuple
+
+Location = Tuple[bool, int]  # (is_ev, space_id)
+
+class AttributeIndex:
+    """Hash index from a vehicle attribute value to the spaces holding matching vehicles"""
+
+    def __init__(self):
+        self._exact: Dict[str, Set[Location]] = {}
+        self._folded: Dict[str, Set[Location]] = {}  # casefolded value -> locations
+
+    def add(self, value: str, location: Location) -> None:
+        """Index a parked vehicle's attribute value"""
+        self._exact.setdefault(value, set()).add(location)
+        self._folded.setdefault(value.casefold(), set()).add(location)
+
+    def remove(self, value: str, location: Location) -> None:
+        """Drop a vehicle's attribute value from the index"""
+        for index, key in ((self._exact, value), (self._folded, value.casefold())):
+            locations = index.get(key)
+            if locations is not None:
+                locations.discard(location)
+                if not locations:
+                    del index[key]
+
+    def lookup(self, value: str, ignore_case: bool = False) -> Set[Location]:
+        """Return the locations whose vehicles match the value"""
+        if ignore_case:
+            return self._folded.get(value.casefold(), set())
+        return self._exact.get(value, set())
+
+    def clear(self) -> None:
+        self._exact.clear()
+        self._folded.clear()
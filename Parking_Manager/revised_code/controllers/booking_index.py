@@ -0,0 +1,238 @@
+import math
+from bisect import bisect_right
+from typing import Iterator, List, Tuple
+
+class SpaceRuns:
+    """A set of space IDs as sorted, disjoint [start, end] runs
+
+    A lot of any size with nothing booked is a single run, and the runs can
+    be walked from the top down.
+    """
+
+    __slots__ = ('_starts', '_ends')
+
+    def __init__(self):
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+
+    def add(self, space_id: int) -> None:
+        starts, ends = self._starts, self._ends
+        i = bisect_right(starts, space_id)
+        if i and ends[i - 1] >= space_id:
+            return
+        joins_previous = i > 0 and ends[i - 1] == space_id - 1
+        joins_next = i < len(starts) and starts[i] == space_id + 1
+        if joins_previous and joins_next:
+            ends[i - 1] = ends[i]
+            del starts[i], ends[i]
+        elif joins_previous:
+            ends[i - 1] = space_id
+        elif joins_next:
+            starts[i] = space_id
+        else:
+            starts.insert(i, space_id)
+            ends.insert(i, space_id)
+
+    def add_range(self, start: int, end: int) -> None:
+        """Add [start, end], which must lie above every ID already present"""
+        if self._ends and self._ends[-1] == start - 1:
+            self._ends[-1] = end
+        else:
+            self._starts.append(start)
+            self._ends.append(end)
+
+    def discard(self, space_id: int) -> None:
+        starts, ends = self._starts, self._ends
+        i = bisect_right(starts, space_id) - 1
+        if i < 0 or ends[i] < space_id:
+            return
+        start, end = starts[i], ends[i]
+        if start == end:
+            del starts[i], ends[i]
+        elif space_id == start:
+            starts[i] = start + 1
+        elif space_id == end:
+            ends[i] = end - 1
+        else:
+            ends[i] = space_id - 1
+            starts.insert(i + 1, space_id + 1)
+            ends.insert(i + 1, end)
+
+    def runs(self) -> List[Tuple[int, int]]:
+        return list(zip(self._starts, self._ends))
+
+    def descending(self, highest: int) -> Iterator[Tuple[int, int]]:
+        """(start, end) runs clipped to IDs no greater than highest, top run first"""
+        starts, ends = self._starts, self._ends
+        for i in range(bisect_right(starts, highest) - 1, -1, -1):
+            yield starts[i], min(ends[i], highest)
+
+class _MaxTree:
+    """Max segment tree over a list of values, for finding the nearest one above a threshold"""
+
+    __slots__ = ('_size', '_tree')
+
+    def __init__(self):
+        self.rebuild([])
+
+    def rebuild(self, values: List[float]) -> None:
+        size = 1
+        while size < len(values):
+            size *= 2
+        tree = [-math.inf] * (2 * size)
+        tree[size:size + len(values)] = values
+        for i in range(size - 1, 0, -1):
+            tree[i] = max(tree[2 * i], tree[2 * i + 1])
+        self._size, self._tree = size, tree
+
+    def update(self, i: int, value: float) -> None:
+        tree = self._tree
+        i += self._size
+        tree[i] = value
+        while i > 1:
+            # The parent only changes if this value was or becomes the larger child
+            i //= 2
+            left, right = tree[2 * i], tree[2 * i + 1]
+            larger = left if left >= right else right
+            if tree[i] == larger:
+                break
+            tree[i] = larger
+
+    def rightmost(self, last: int, threshold: float) -> int:
+        """Highest index no greater than last whose value reaches threshold, or -1"""
+        return self._rightmost(1, 0, self._size - 1, last, threshold)
+
+    def leftmost(self, first: int, threshold: float) -> int:
+        """Lowest index no less than first whose value reaches threshold, or -1"""
+        return self._leftmost(1, 0, self._size - 1, first, threshold)
+
+    def _rightmost(self, node: int, low: int, high: int, last: int, threshold: float) -> int:
+        if low > last or self._tree[node] < threshold:
+            return -1
+        if low == high:
+            return low
+        middle = (low + high) // 2
+        found = self._rightmost(2 * node + 1, middle + 1, high, last, threshold)
+        return found if found >= 0 else self._rightmost(2 * node, low, middle, last, threshold)
+
+    def _leftmost(self, node: int, low: int, high: int, first: int, threshold: float) -> int:
+        if high < first or self._tree[node] < threshold:
+            return -1
+        if low == high:
+            return low
+        middle = (low + high) // 2
+        found = self._leftmost(2 * node, low, middle, first, threshold)
+        return found if found >= 0 else self._leftmost(2 * node + 1, middle + 1, high, first, threshold)
+
+class GapIndex:
+    """The free gaps between bookings on many spaces, by when they open
+
+    A gap on a space runs from the end of one booking, or -inf, to the start
+    of the next, or +inf. Gaps are kept sorted by (opens, space_id) in
+    blocks of at most 2 * BLOCK, and two max segment trees over the blocks,
+    of when their gaps close and of how long they last, let a search jump
+    straight to the next block holding a candidate. Each search step costs
+    O(log n) plus a scan of one block.
+    """
+
+    BLOCK = 64
+
+    __slots__ = ('_keys', '_closes', '_lengths', '_firsts', '_close_tree', '_length_tree')
+
+    def __init__(self):
+        self._keys: List[List[Tuple[float, int]]] = []  # (opens, space_id) per block
+        self._closes: List[List[float]] = []
+        self._lengths: List[List[float]] = []            # closes - opens, so block maxima run at C speed
+        self._firsts: List[Tuple[float, int]] = []      # first key of each block
+        self._close_tree = _MaxTree()
+        self._length_tree = _MaxTree()
+
+    def _locate(self, key: Tuple[float, int]) -> Tuple[int, int]:
+        """(block, position) of an existing key"""
+        block = bisect_right(self._firsts, key) - 1
+        position = bisect_right(self._keys[block], key) - 1 if block >= 0 else -1
+        if position < 0 or self._keys[block][position] != key:
+            raise KeyError(key)
+        return block, position
+
+    def _refresh(self, block: int) -> None:
+        self._firsts[block] = self._keys[block][0]
+        self._close_tree.update(block, max(self._closes[block]))
+        self._length_tree.update(block, max(self._lengths[block]))
+
+    def _rebuild(self) -> None:
+        self._firsts = [keys[0] for keys in self._keys]
+        self._close_tree.rebuild([max(closes) for closes in self._closes])
+        self._length_tree.rebuild([max(lengths) for lengths in self._lengths])
+
+    def add(self, opens: float, space_id: int, closes: float) -> None:
+        key = (opens, space_id)
+        if not self._keys:
+            self._keys.append([key])
+            self._closes.append([closes])
+            self._lengths.append([closes - opens])
+            self._rebuild()
+            return
+        block = max(0, bisect_right(self._firsts, key) - 1)
+        columns = self._keys[block], self._closes[block], self._lengths[block]
+        position = bisect_right(columns[0], key)
+        for column, value in zip(columns, (key, closes, closes - opens)):
+            column.insert(position, value)
+        if len(columns[0]) > 2 * self.BLOCK:
+            half = len(columns[0]) // 2
+            for blocks, column in zip((self._keys, self._closes, self._lengths), columns):
+                blocks.insert(block + 1, column[half:])
+                del column[half:]
+            self._rebuild()
+        else:
+            self._refresh(block)
+
+    def remove(self, opens: float, space_id: int) -> None:
+        block, position = self._locate((opens, space_id))
+        del self._keys[block][position], self._closes[block][position], self._lengths[block][position]
+        if self._keys[block]:
+            self._refresh(block)
+        else:
+            del self._keys[block], self._closes[block], self._lengths[block]
+            self._rebuild()
+
+    def set_closes(self, opens: float, space_id: int, closes: float) -> None:
+        """Move the end of an existing gap, as a booking lands in it or leaves it"""
+        block, position = self._locate((opens, space_id))
+        self._closes[block][position] = closes
+        self._lengths[block][position] = closes - opens
+        self._refresh(block)
+
+    def containing(self, start: float, end: float) -> Iterator[int]:
+        """Spaces with a gap covering [start, end), the most recently opened gap first"""
+        key = (start, math.inf)
+        block = bisect_right(self._firsts, key) - 1
+        if block < 0:
+            return
+        position = bisect_right(self._keys[block], key) - 1
+        while True:
+            keys, closes = self._keys[block], self._closes[block]
+            for i in range(position, -1, -1):
+                if closes[i] >= end:
+                    yield keys[i][1]
+            block = self._close_tree.rightmost(block - 1, end)
+            if block < 0:
+                return
+            position = len(self._keys[block]) - 1
+
+    def opening_after(self, after: float, duration: float) -> Iterator[Tuple[float, int]]:
+        """(opens, space_id) of gaps opening after `after` that last at least duration, earliest first"""
+        if not self._keys:
+            return
+        key = (after, math.inf)
+        block = max(0, bisect_right(self._firsts, key) - 1)
+        position = bisect_right(self._keys[block], key)
+        while True:
+            keys, lengths = self._keys[block], self._lengths[block]
+            for i in range(position, len(keys)):
+                if lengths[i] >= duration:
+                    yield keys[i]
+            block = self._length_tree.leftmost(block + 1, duration)
+            if block < 0:
+                return
+            position = 0
@@ -0,0 +1,322 @@
+import heapq
+import math
+import threading
+from abc import ABC, abstractmethod
+from itertools import count
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from controllers.events import ParkingEventListener
+from controllers.parking_controller import ParkingLotController
+from models.vehicle import ElectricBike, ElectricCar, Vehicle
+
+BATTERY_KWH = {ElectricCar: 60.0, ElectricBike: 8.0}
+FULL = 100.0
+_EPSILON = 1e-9
+
+class ChargingPolicy(ABC):
+    """Strategy ranking plugged-in EVs for a share of the power budget"""
+
+    shares_evenly = False
+
+    @abstractmethod
+    def key(self, charge_level: float, departure: Optional[float]) -> float:
+        """Rank an EV when it plugs in or its departure changes; lower keys charge first"""
+        pass
+
+class EarliestDeparturePolicy(ChargingPolicy):
+    """Charge the vehicles that leave soonest first; unknown departures go last"""
+
+    def key(self, charge_level: float, departure: Optional[float]) -> float:
+        return math.inf if departure is None else departure
+
+class LowestChargePolicy(ChargingPolicy):
+    """Charge the emptiest batteries first, ranked by their charge when they plugged in"""
+
+    def key(self, charge_level: float, departure: Optional[float]) -> float:
+        return charge_level
+
+class FairSharePolicy(ChargingPolicy):
+    """Split the budget evenly, giving what a slow charger can't use to the rest"""
+
+    shares_evenly = True
+
+    def key(self, charge_level: float, departure: Optional[float]) -> float:
+        return 0.0
+
+class ChargingScheduler(ParkingEventListener):
+    """Share a site-wide power cap between the EVs parked on one controller
+
+    Vehicles plug in and out through listener events. For ranked policies
+    the scheduler keeps the charging set in a max-heap by key and the
+    queue in a min-heap, so an arrival, departure or full battery moves
+    power between at most a few vehicles in O(log n). Fair share is a
+    water-fill recomputed once per step, and only when something changed.
+
+    step() advances every charging battery at once with NumPy and writes
+    whole-percent changes back through controller.set_charge_level, so the
+    controller's charge histogram and journal stay current. Drive step()
+    from a single thread.
+    """
+
+    def __init__(self, controller: ParkingLotController, power_budget_kw: float,
+                 policy: Optional[ChargingPolicy] = None, charger_kw: float = 11.0,
+                 start_time: float = 0.0):
+        self._controller = controller
+        self._budget = power_budget_kw
+        self._policy = policy or FairSharePolicy()
+        self._charger_kw = charger_kw
+        self._now = start_time
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        size = 64
+        self._space_ids = np.zeros(size, dtype=np.int64)
+        self._charge = np.zeros(size)
+        self._battery_kwh = np.ones(size)
+        self._max_kw = np.zeros(size)
+        self._allocated_kw = np.zeros(size)
+        self._keys = np.zeros(size)
+        self._departures: List[Optional[float]] = [None] * size
+        self._vehicles: List[Optional[Vehicle]] = [None] * size
+        self._versions = np.zeros(size, dtype=np.int64)  # invalidates stale heap entries
+        self._charging = np.zeros(size, dtype=bool)       # plugged in and not yet full
+        self._free_slots = list(range(size - 1, -1, -1))
+        self._slots: Dict[int, int] = {}  # space_id -> slot
+        self._served: List[Tuple[float, int, int, int]] = []   # (-key, -order, version, slot)
+        self._waiting: List[Tuple[float, int, int, int]] = []  # (key, order, version, slot)
+        self._order = count()
+        self._available_kw = self._budget
+        self._dirty = False
+
+    def attach(self) -> 'ChargingScheduler':
+        """Start listening to the controller and plug in EVs that are already parked"""
+        with self._controller.locked():
+            self._controller.add_listener(self)
+            for space_id, vehicle in self._controller.iter_occupied(True):
+                self.on_park(True, space_id, vehicle)
+        return self
+
+    def detach(self) -> None:
+        self._controller.remove_listener(self)
+
+    @property
+    def now(self) -> float:
+        return self._now
+
+    @property
+    def power_budget_kw(self) -> float:
+        return self._budget
+
+    # -- Listener callbacks ------------------------------------------------
+
+    def on_lot_initialized(self, regular_capacity: int, ev_capacity: int, level: int) -> None:
+        with self._lock:
+            self._reset()
+
+    def on_park(self, is_ev: bool, space_id: int, vehicle: Vehicle) -> None:
+        if not is_ev:
+            return
+        with self._lock:
+            slot = self._new_slot()
+            self._slots[space_id] = slot
+            self._space_ids[slot] = space_id
+            self._charge[slot] = vehicle.charge_level
+            self._battery_kwh[slot] = BATTERY_KWH.get(type(vehicle), BATTERY_KWH[ElectricCar])
+            self._max_kw[slot] = self._charger_kw
+            self._allocated_kw[slot] = 0.0
+            self._departures[slot] = None
+            self._vehicles[slot] = vehicle
+            self._charging[slot] = vehicle.charge_level < FULL
+            if self._charging[slot]:
+                self._plug_in(slot)
+
+    def on_remove(self, is_ev: bool, space_id: int, vehicle: Vehicle) -> None:
+        if not is_ev:
+            return
+        with self._lock:
+            slot = self._slots.pop(space_id, None)
+            if slot is not None:
+                self._unplug(slot)
+                self._vehicles[slot] = None
+                self._free_slots.append(slot)
+
+    def on_charge(self, space_id: int, vehicle: Vehicle) -> None:
+        with self._lock:
+            slot = self._slots.get(space_id)
+            # Our own write-backs only round the stored charge down; anything
+            # else was set from outside and replaces it
+            if slot is None or int(self._charge[slot]) == vehicle.charge_level:
+                return
+            self._charge[slot] = vehicle.charge_level
+            if self._charging[slot]:
+                self._unplug(slot)
+            self._charging[slot] = vehicle.charge_level < FULL
+            if self._charging[slot]:
+                self._plug_in(slot)
+
+    # -- Public API ----------------------------------------------------------
+
+    def set_departure(self, space_id: int, departure: Optional[float]) -> bool:
+        """Tell the scheduler when the EV in a space is expected to leave"""
+        with self._lock:
+            slot = self._slots.get(space_id)
+            if slot is None:
+                return False
+            self._departures[slot] = departure
+            if self._charging[slot]:
+                self._unplug(slot)
+                self._charging[slot] = True
+                self._plug_in(slot)
+            return True
+
+    def set_power_budget(self, power_budget_kw: float) -> None:
+        """Change the site cap; ranked policies shed or add power from the margin"""
+        with self._lock:
+            self._available_kw += power_budget_kw - self._budget
+            self._budget = power_budget_kw
+            if self._policy.shares_evenly:
+                self._dirty = True
+            else:
+                self._rebalance()
+
+    def allocation(self, space_id: int) -> float:
+        """Power currently assigned to the EV in a space, in kW"""
+        with self._lock:
+            if self._policy.shares_evenly and self._dirty:
+                self._water_fill()
+            slot = self._slots.get(space_id)
+            return float(self._allocated_kw[slot]) if slot is not None else 0.0
+
+    def step(self, seconds: float) -> Dict[str, float]:
+        """Advance every charging EV by seconds and return what was delivered"""
+        with self._lock:
+            if self._policy.shares_evenly and self._dirty:
+                self._water_fill()
+            slots = np.flatnonzero(self._allocated_kw > 0)
+            power_kw = float(self._allocated_kw[slots].sum())
+            before = self._charge[slots].astype(np.int64)
+            gained = self._allocated_kw[slots] * (seconds / 3600.0)
+            room = (FULL - self._charge[slots]) / 100.0 * self._battery_kwh[slots]
+            delivered = np.minimum(gained, room)
+            self._charge[slots] += delivered / self._battery_kwh[slots] * 100.0
+            after = self._charge[slots].astype(np.int64)
+            changed = slots[after != before]
+            for slot in slots[self._charge[slots] >= FULL - _EPSILON].tolist():
+                self._charge[slot] = FULL
+                self._unplug(slot)
+            updates = [(int(self._space_ids[slot]), int(self._charge[slot]), self._vehicles[slot])
+                       for slot in changed.tolist()]
+            self._now += seconds
+        # Write back outside our lock: the controller calls on_charge while
+        # holding its own lock, so taking them in the other order could
+        # deadlock. expected skips vehicles that left in the meantime.
+        for space_id, charge_level, vehicle in updates:
+            self._controller.set_charge_level(space_id, charge_level, expected=vehicle)
+        return {'time': self._now, 'power_kw': power_kw, 'energy_kwh': float(delivered.sum()),
+                'charging': len(slots), 'updated': len(updates)}
+
+    def status(self) -> List[Tuple[int, float, float]]:
+        """(space_id, charge %, allocated kW) for every plugged-in EV, by space"""
+        with self._lock:
+            if self._policy.shares_evenly and self._dirty:
+                self._water_fill()
+            return sorted((space_id, float(self._charge[slot]), float(self._allocated_kw[slot]))
+                          for space_id, slot in self._slots.items())
+
+    # -- Allocation (scheduler lock held) --------------------------------------
+
+    def _new_slot(self) -> int:
+        if not self._free_slots:
+            size = len(self._charge)
+            for name in ('_space_ids', '_charge', '_battery_kwh', '_max_kw', '_allocated_kw',
+                         '_keys', '_versions', '_charging'):
+                column = getattr(self, name)
+                setattr(self, name, np.concatenate([column, np.zeros_like(column)]))
+            self._battery_kwh[size:] = 1.0
+            self._departures.extend([None] * size)
+            self._vehicles.extend([None] * size)
+            self._free_slots = list(range(2 * size - 1, size - 1, -1))
+        return self._free_slots.pop()
+
+    def _plug_in(self, slot: int) -> None:
+        """Rank a vehicle that needs charge and give it power if it outranks someone"""
+        if self._policy.shares_evenly:
+            self._dirty = True
+            return
+        key = self._policy.key(float(self._charge[slot]), self._departures[slot])
+        self._keys[slot] = key
+        self._versions[slot] += 1
+        heapq.heappush(self._waiting, (key, next(self._order), int(self._versions[slot]), slot))
+        self._rebalance()
+
+    def _unplug(self, slot: int) -> None:
+        """Stop charging a vehicle and hand its power to the next in line"""
+        self._charging[slot] = False
+        self._versions[slot] += 1
+        self._available_kw += self._allocated_kw[slot]
+        self._allocated_kw[slot] = 0.0
+        if self._policy.shares_evenly:
+            self._dirty = True
+        else:
+            self._rebalance()
+
+    def _valid_top(self, heap: List[Tuple[float, int, int, int]]) -> Optional[Tuple[float, int, int, int]]:
+        while heap and heap[0][2] != self._versions[heap[0][3]]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def _rebalance(self) -> None:
+        """Move power until every charging EV outranks every queued one
+
+        Only the lowest-ranked charging EV can be partly served. Each pass
+        is a couple of heap operations, and an event only ever displaces
+        the vehicles it outranks.
+        """
+        while True:
+            worst = self._valid_top(self._served)
+            best = self._valid_top(self._waiting)
+            if worst is not None and (self._available_kw < -_EPSILON or (
+                    best is not None and -worst[0] > best[0]
+                    and self._available_kw < self._max_kw[best[3]] - _EPSILON)):
+                # Over budget, or a queued EV outranks it and needs its power: send it back to the queue
+                heapq.heappop(self._served)
+                slot = worst[3]
+                self._available_kw += self._allocated_kw[slot]
+                self._allocated_kw[slot] = 0.0
+                heapq.heappush(self._waiting, (-worst[0], -worst[1], worst[2], slot))
+                continue
+            if self._available_kw <= _EPSILON:
+                return
+            if worst is not None and self._allocated_kw[worst[3]] < self._max_kw[worst[3]] - _EPSILON and (
+                    best is None or -worst[0] <= best[0]):
+                slot = worst[3]
+                top_up = min(self._max_kw[slot] - self._allocated_kw[slot], self._available_kw)
+                self._allocated_kw[slot] += top_up
+                self._available_kw -= top_up
+                continue
+            if best is None:
+                return
+            key, order, version, slot = heapq.heappop(self._waiting)
+            power = min(self._max_kw[slot], self._available_kw)
+            self._allocated_kw[slot] = power
+            self._available_kw -= power
+            heapq.heappush(self._served, (-key, -order, version, slot))
+
+    def _water_fill(self) -> None:
+        """Fair share: everyone gets min(charger limit, level), with the level set by the budget"""
+        self._allocated_kw[:] = 0.0
+        slots = np.flatnonzero(self._charging)
+        if len(slots):
+            limits = np.sort(self._max_kw[slots])
+            # Budget used if the level were each limit in turn
+            used = np.cumsum(limits) + limits * (len(limits) - 1 - np.arange(len(limits)))
+            capped = int(np.searchsorted(used, self._budget, side='right'))
+            if capped == len(limits):
+                level = limits[-1]
+            else:
+                spent = limits[:capped].sum()
+                level = (self._budget - spent) / (len(limits) - capped)
+            self._allocated_kw[slots] = np.minimum(self._max_kw[slots], level)
+        self._available_kw = self._budget - float(self._allocated_kw.sum())
+        self._dirty = False
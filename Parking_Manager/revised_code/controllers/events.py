@@ -0,0 +1,31 @@
+from typing import List
+from models.vehicle import Vehicle
+
+class ParkingEventListener:
+    """Observer of ParkingLotController state changes
+
+    Subclasses override the events they care about. Callbacks run while the
+    controller holds the lock for the affected space type, so they must be
+    quick and must not call back into the controller.
+    """
+
+    def on_lot_initialized(self, regular_capacity: int, ev_capacity: int, level: int) -> None:
+        pass
+
+    def on_park(self, is_ev: bool, space_id: int, vehicle: Vehicle) -> None:
+        pass
+
+    def on_remove(self, is_ev: bool, space_id: int, vehicle: Vehicle) -> None:
+        pass
+
+    def on_charge(self, space_id: int, vehicle: Vehicle) -> None:
+        pass
+
+    def on_spaces_added(self, is_ev: bool, space_ids: range) -> None:
+        pass
+
+    def on_spaces_retired(self, is_ev: bool, space_ids: List[int]) -> None:
+        pass
+
+    def on_space_converted(self, space_id: int, ev_space_id: int) -> None:
+        pass
@@ -0,0 +1,154 @@
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+from controllers.parking_controller import CHARGE_BUCKETS, ParkingLotController
+from models.vehicle import Vehicle, VehicleInfo
+
+LevelStats = Dict[int, Tuple[int, int]]  # level -> (free spaces, capacity)
+
+class AllocationPolicy(ABC):
+    """Strategy deciding which levels a vehicle is offered, best first"""
+
+    @abstractmethod
+    def candidate_levels(self, stats: LevelStats) -> List[int]:
+        """Order the levels that still have free spaces"""
+        pass
+
+class LowestLevelFirstPolicy(AllocationPolicy):
+    """Fill the lowest level before moving up"""
+
+    def candidate_levels(self, stats: LevelStats) -> List[int]:
+        return sorted(level for level, (free, _) in stats.items() if free)
+
+class NearestLevelPolicy(AllocationPolicy):
+    """Prefer levels closest to the gate the vehicle entered from"""
+
+    def __init__(self, entry_level: int):
+        self._entry_level = entry_level
+
+    def candidate_levels(self, stats: LevelStats) -> List[int]:
+        return sorted((level for level, (free, _) in stats.items() if free),
+                      key=lambda level: (abs(level - self._entry_level), level))
+
+class BalancedPolicy(AllocationPolicy):
+    """Spread vehicles so every level fills at the same rate"""
+
+    def candidate_levels(self, stats: LevelStats) -> List[int]:
+        return sorted((level for level, (free, _) in stats.items() if free),
+                      key=lambda level: (1 - stats[level][0] / stats[level][1], level))
+
+class ParkingFacility:
+    """A parking site made of levels, each managed by its own controller shard
+
+    Shards lock themselves, so parking or removing on one level never
+    blocks gates working on another.
+    """
+
+    def __init__(self, name: str, policy: Optional[AllocationPolicy] = None):
+        self._name = name
+        self._policy = policy or LowestLevelFirstPolicy()
+        self._levels: Dict[int, ParkingLotController] = {}
+        self._registrations: Dict[str, List[int]] = {}  # registration -> levels holding it, in parking order
+        self._registry_lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def levels(self) -> List[int]:
+        return sorted(self._levels)
+
+    @property
+    def policy(self) -> AllocationPolicy:
+        return self._policy
+
+    @policy.setter
+    def policy(self, policy: AllocationPolicy) -> None:
+        self._policy = policy
+
+    def add_level(self, level: int, regular_capacity: int, ev_capacity: int) -> ParkingLotController:
+        """Add a level with its own spaces, free-space index and locks"""
+        if level in self._levels:
+            raise ValueError(f"Level {level} already exists in {self._name}")
+        shard = ParkingLotController()
+        shard.initialize_lot(regular_capacity, ev_capacity, level)
+        self._levels[level] = shard
+        return shard
+
+    def level(self, level: int) -> ParkingLotController:
+        """Return the controller managing one level"""
+        return self._levels[level]
+
+    def park_vehicle(self, info: VehicleInfo, is_ev: bool, is_motorcycle: bool,
+                     policy: Optional[AllocationPolicy] = None) -> Optional[Tuple[int, int]]:
+        """Park a vehicle on the level chosen by the policy and return (level, space_id)"""
+        stats = {level: (shard.free_space_count(is_ev), shard.capacity(is_ev))
+                 for level, shard in self._levels.items()}
+        for level in (policy or self._policy).candidate_levels(stats):
+            space_id = self._levels[level].park_vehicle(info, is_ev, is_motorcycle)
+            if space_id is not None:
+                with self._registry_lock:
+                    levels = self._registrations.setdefault(info.registration, [])
+                    if level not in levels:
+                        levels.append(level)
+                return level, space_id
+        return None
+
+    def remove_vehicle(self, level: int, space_id: int, is_ev: bool) -> bool:
+        """Remove a vehicle from a space on one level"""
+        if level not in self._levels:
+            return False
+        vehicle = self._levels[level].take_vehicle(space_id, is_ev)
+        if vehicle is None:
+            return False
+        with self._registry_lock:
+            levels = self._registrations.get(vehicle.registration, [])
+            # The same plate may still be parked elsewhere on this level
+            if level in levels and self._levels[level].get_vehicle_location(vehicle.registration) is None:
+                levels.remove(level)
+                if not levels:
+                    del self._registrations[vehicle.registration]
+        return True
+
+    def remove_by_registration(self, registration: str) -> bool:
+        """Remove a vehicle wherever it is parked in the facility"""
+        location = self.get_vehicle_location(registration)
+        if location is None:
+            return False
+        level, is_ev, space_id = location
+        return self.remove_vehicle(level, space_id, is_ev)
+
+    def get_vehicle_location(self, registration: str) -> Optional[Tuple[int, bool, int]]:
+        """Find a vehicle's (level, is_ev, space_id) by registration number
+
+        A plate parked on several levels is found on the level it reached last.
+        """
+        with self._registry_lock:
+            levels = list(self._registrations.get(registration, ()))
+        for level in reversed(levels):
+            location = self._levels[level].get_vehicle_location(registration)
+            if location is not None:
+                return (level,) + location
+        return None
+
+    def get_lot_status(self) -> Dict[int, Dict[str, List[Tuple[int, Vehicle]]]]:
+        """Get the status of every level"""
+        return {level: self._levels[level].get_lot_status() for level in self.levels}
+
+    def summary(self) -> Dict[str, Any]:
+        """Facility-wide occupancy from each level's counters, in O(levels)"""
+        levels = {level: self._levels[level].summary() for level in self.levels}
+        totals = {key: {'capacity': 0, 'occupied': 0, 'free': 0, 'retired': 0, 'held': 0} for key in ('regular', 'ev')}
+        vehicle_classes: Dict[str, int] = {}
+        charge_histogram = [0] * CHARGE_BUCKETS
+        for level_summary in levels.values():
+            for key, counts in totals.items():
+                for name in counts:
+                    counts[name] += level_summary[key][name]
+            for class_name, count in level_summary['vehicle_classes'].items():
+                vehicle_classes[class_name] = vehicle_classes.get(class_name, 0) + count
+            for bucket, count in enumerate(level_summary['ev_charge_histogram']):
+                charge_histogram[bucket] += count
+        return {'name': self._name, 'levels': levels, 'vehicle_classes': vehicle_classes,
+                'ev_charge_histogram': charge_histogram, **totals}
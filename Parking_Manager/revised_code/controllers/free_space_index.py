@@ -0,0 +1,153 @@
+import heapq
+from bisect import bisect_right
+from itertools import chain
+from typing import Iterable, List, Optional, Set, Tuple
+
+class FreeSpaceIndex:
+    """Free space IDs, lowest first, without one entry per untouched space
+
+    Runs of spaces that have never been handed out are kept as sorted,
+    disjoint [start, end] intervals, so a fresh lot of any size is a single
+    interval and building the index costs O(1). Spaces that are freed
+    again go into a min-heap with a membership set, keeping churn at
+    O(log n) however fragmented the lot becomes.
+
+    discard() is lazy for heap entries: the ID leaves the membership set at
+    once and its heap entry is dropped when it reaches the top.
+    """
+
+    def __init__(self, space_ids: Iterable[int] = ()):
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._run_count = 0
+        self._heap: List[int] = []
+        self._free: Set[int] = set()
+        if isinstance(space_ids, range) and space_ids.step == 1:
+            if space_ids:
+                self.add_range(space_ids.start, space_ids.stop - 1)
+        else:
+            # A sorted list already satisfies the heap invariant
+            self._heap = sorted(set(space_ids))
+            self._free = set(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._free) + self._run_count
+
+    def __contains__(self, space_id: int) -> bool:
+        return space_id in self._free or self._locate(space_id) >= 0
+
+    def _locate(self, space_id: int) -> int:
+        """Index of the interval holding space_id, or -1"""
+        i = bisect_right(self._starts, space_id) - 1
+        return i if i >= 0 and self._ends[i] >= space_id else -1
+
+    def intervals(self) -> List[Tuple[int, int]]:
+        """Untouched free runs as (start, end) pairs"""
+        return list(zip(self._starts, self._ends))
+
+    def add(self, space_id: int) -> None:
+        """Mark a space as free again"""
+        if space_id not in self:
+            self._free.add(space_id)
+            heapq.heappush(self._heap, space_id)
+
+    def add_range(self, start: int, end: int) -> None:
+        """Mark every space in [start, end] as free; none of them may be free already"""
+        starts, ends = self._starts, self._ends
+        i = bisect_right(starts, end)
+        if i > 0 and ends[i - 1] >= start:
+            raise ValueError(f"Spaces {start}-{end} overlap free spaces")
+        if i > 0 and ends[i - 1] == start - 1:
+            ends[i - 1] = end
+            if i < len(starts) and starts[i] == end + 1:
+                ends[i - 1] = ends[i]
+                del starts[i], ends[i]
+        elif i < len(starts) and starts[i] == end + 1:
+            starts[i] = start
+        else:
+            starts.insert(i, start)
+            ends.insert(i, end)
+        self._run_count += end - start + 1
+
+    def discard(self, space_id: int) -> None:
+        """Mark a specific space as no longer free"""
+        if space_id in self._free:
+            self._free.remove(space_id)
+            return
+        i = self._locate(space_id)
+        if i < 0:
+            return
+        starts, ends = self._starts, self._ends
+        start, end = starts[i], ends[i]
+        if start == end:
+            del starts[i], ends[i]
+        elif space_id == start:
+            starts[i] = start + 1
+        elif space_id == end:
+            ends[i] = end - 1
+        else:
+            ends[i] = space_id - 1
+            starts.insert(i + 1, space_id + 1)
+            ends.insert(i + 1, end)
+        self._run_count -= 1
+
+    def _prune(self) -> None:
+        heap = self._heap
+        while heap and heap[0] not in self._free:
+            heapq.heappop(heap)
+
+    def peek(self) -> Optional[int]:
+        """Return the lowest free space ID without claiming it"""
+        self._prune()
+        if self._heap and (not self._starts or self._heap[0] < self._starts[0]):
+            return self._heap[0]
+        return self._starts[0] if self._starts else None
+
+    def pop(self) -> Optional[int]:
+        """Claim and return the lowest free space ID"""
+        self._prune()
+        if self._heap and (not self._starts or self._heap[0] < self._starts[0]):
+            space_id = heapq.heappop(self._heap)
+            self._free.remove(space_id)
+            return space_id
+        if not self._starts:
+            return None
+        space_id = self._starts[0]
+        if space_id == self._ends[0]:
+            del self._starts[0], self._ends[0]
+        else:
+            self._starts[0] = space_id + 1
+        self._run_count -= 1
+        return space_id
+
+    def pop_many(self, count: int) -> List[int]:
+        """Claim up to count of the lowest free space IDs, in ascending order"""
+        if count >= len(self):
+            # Taking everything: a sorted drain beats repeated pops
+            space_ids = sorted(chain(self._free, *(range(start, end + 1)
+                                                   for start, end in zip(self._starts, self._ends))))
+            self._heap.clear()
+            self._free.clear()
+            self._starts.clear()
+            self._ends.clear()
+            self._run_count = 0
+            return space_ids
+        if self._free:
+            return [self.pop() for _ in range(count)]
+        # Only untouched runs left: hand them out a slice at a time
+        starts, ends = self._starts, self._ends
+        space_ids: List[int] = []
+        emptied = 0
+        while count > 0:
+            start, end = starts[emptied], ends[emptied]
+            take = min(count, end - start + 1)
+            space_ids.extend(range(start, start + take))
+            count -= take
+            if start + take > end:
+                emptied += 1
+            else:
+                starts[emptied] = start + take
+        del starts[:emptied], ends[:emptied]
+        self._run_count -= len(space_ids)
+        self._heap.clear()
+        return space_ids
@@ -0,0 +1,214 @@
+from typing import Any, List, Mapping, Optional
+from controllers.parking_controller import ParkingLotController
+from models.vehicle import Car, ElectricCar, Vehicle, VehicleInfo
+
+STATUS_HEADER = "Slot\tFloor\tReg No.\t\tColor \t\tMake \t\tModel\n"
+
+class LegacyParkingLot:
+    """The original_code ParkingLot method surface backed by ParkingLotController
+
+    Lookups go through the controller's indexes instead of scanning every
+    slot, and nothing touches Tk: status(), chargeStatus() and the button
+    handlers return their text and also write it to `output` (anything with
+    an insert(index, text) method, such as the legacy Text widget) when one
+    is given. The button handlers (makeLot, parkCar, ...) read their fields
+    from `inputs`, a mapping from the legacy variable names (num_value,
+    reg_value, slot1_value, ...) to anything with a get() method, such as
+    the legacy Tk variables.
+
+    Slot numbers are 1-based as in the legacy leave() and lookups, except
+    for getEmptySlot()/getEmptyEvSlot() and edit(), which kept the legacy
+    0-based list index. Where the legacy class was buggy this follows what
+    it meant to do:
+      * park() returns the slot the vehicle was given rather than a running
+        counter that drifts once anything has left
+      * motor=1 parks a motorcycle in a regular slot, not a car
+      * getSlotNumFromMakeEv/ModelEv filter on the value passed in
+      * leave(0, ...) and out-of-range slots return False rather than
+        freeing the last slot or raising IndexError
+    """
+
+    def __init__(self, controller: Optional[ParkingLotController] = None, output=None,
+                 inputs: Optional[Mapping[str, Any]] = None):
+        self.controller = controller or ParkingLotController()
+        self.output = output
+        self.inputs = inputs if inputs is not None else {}
+
+    # -- Lot state ----------------------------------------------------------
+
+    @property
+    def capacity(self) -> int:
+        return self.controller.capacity(False)
+
+    @property
+    def evCapacity(self) -> int:
+        return self.controller.capacity(True)
+
+    @property
+    def level(self) -> int:
+        return self.controller.level
+
+    @property
+    def numOfOccupiedSlots(self) -> int:
+        return self.controller.summary()['regular']['occupied']
+
+    @property
+    def numOfOccupiedEvSlots(self) -> int:
+        return self.controller.summary()['ev']['occupied']
+
+    def createParkingLot(self, capacity, evcapacity, level):
+        self.controller.initialize_lot(int(capacity), int(evcapacity), int(level))
+        return self.level
+
+    def getEmptySlot(self) -> Optional[int]:
+        return self._empty_index(False)
+
+    def getEmptyEvSlot(self) -> Optional[int]:
+        return self._empty_index(True)
+
+    def _empty_index(self, is_ev: bool) -> Optional[int]:
+        space = self.controller.find_available_space(is_ev)
+        return space.space_id - 1 if space is not None else None
+
+    def getEmptyLevel(self) -> Optional[int]:
+        summary = self.controller.summary()
+        if summary['regular']['occupied'] == 0 and summary['ev']['occupied'] == 0:
+            return self.level
+        return None
+
+    # -- Parking --------------------------------------------------------------
+
+    def park(self, regnum, make, model, color, ev, motor) -> int:
+        """Park a vehicle and return its slot number, or -1 when that type of slot is full"""
+        info = VehicleInfo(str(regnum), make, model, color)
+        space_id = self.controller.park_vehicle(info, ev == 1, motor == 1)
+        return -1 if space_id is None else space_id
+
+    def leave(self, slotid, ev) -> bool:
+        slotid = int(slotid)
+        return slotid >= 1 and self.controller.remove_vehicle(slotid, ev == 1)
+
+    def edit(self, slotid, regnum, make, model, color, ev) -> bool:
+        """Replace whatever is in 0-based slot index slotid with a car or electric car"""
+        is_ev = ev == 1
+        space_id = int(slotid) + 1
+        if not 1 <= space_id <= self.controller.max_space_id(is_ev):
+            return False
+        info = VehicleInfo(str(regnum), make, model, color)
+        self.controller.take_vehicle(space_id, is_ev)
+        return self.controller.place_vehicle(ElectricCar(info) if is_ev else Car(info), is_ev, space_id)
+
+    # -- Lookups --------------------------------------------------------------
+
+    def getSlotNumFromRegNum(self, regnum) -> int:
+        return self._slot_from_registration(regnum, False)
+
+    def getSlotNumFromRegNumEv(self, regnum) -> int:
+        return self._slot_from_registration(str(regnum), True)
+
+    def _slot_from_registration(self, regnum, is_ev: bool) -> int:
+        # A registration may be parked more than once; the legacy scan found the lowest slot
+        slots = [space_id for ev, space_id in self.controller.get_vehicle_locations(regnum) if ev == is_ev]
+        return min(slots) if slots else -1
+
+    def getRegNumFromColor(self, color) -> List[str]:
+        return [vehicle.registration for _, vehicle in self.controller.find_vehicles_by_color(color, False)]
+
+    def getRegNumFromColorEv(self, color) -> List[str]:
+        return [vehicle.registration for _, vehicle in self.controller.find_vehicles_by_color(color, True)]
+
+    def getSlotNumFromColor(self, color) -> List[str]:
+        return self._slots_by('color', color, False)
+
+    def getSlotNumFromMake(self, make) -> List[str]:
+        return self._slots_by('make', make, False)
+
+    def getSlotNumFromModel(self, model) -> List[str]:
+        return self._slots_by('model', model, False)
+
+    def getSlotNumFromColorEv(self, color) -> List[str]:
+        return self._slots_by('color', color, True)
+
+    def getSlotNumFromMakeEv(self, make) -> List[str]:
+        return self._slots_by('make', make, True)
+
+    def getSlotNumFromModelEv(self, model) -> List[str]:
+        return self._slots_by('model', model, True)
+
+    def _slots_by(self, attribute: str, value: str, is_ev: bool) -> List[str]:
+        """Slot numbers as strings, ascending, the way the legacy lookups returned them"""
+        return [str(space_id) for ev, space_id in self.controller.find_locations_by_attribute(attribute, value)
+                if ev == is_ev]
+
+    # -- Reports --------------------------------------------------------------
+
+    def status(self) -> str:
+        lot = self.controller.get_lot_status()
+        level = str(self.level)
+        lines = ["Vehicles\n" + STATUS_HEADER]
+        lines.extend(self._status_row(space_id, level, vehicle) for space_id, vehicle in lot['regular'])
+        lines.append("\nElectric Vehicles\n" + STATUS_HEADER)
+        lines.extend(self._status_row(space_id, level, vehicle) for space_id, vehicle in lot['ev'])
+        return self._write(lines)
+
+    @staticmethod
+    def _status_row(space_id: int, level: str, vehicle: Vehicle) -> str:
+        return (f"{space_id}\t{level}\t{vehicle.registration}\t\t{vehicle.color}"
+                f"\t\t{vehicle.make}\t\t{vehicle.model}\n")
+
+    def chargeStatus(self) -> str:
+        level = str(self.level)
+        lines = ["Electric Vehicle Charge Levels\nSlot\tFloor\tReg No.\t\tCharge %\n"]
+        lines.extend(f"{space_id}\t{level}\t{vehicle.registration}\t\t{vehicle.charge_level}\n"
+                     for space_id, vehicle in self.controller.iter_occupied(True))
+        return self._write(lines)
+
+    # -- Button handlers ------------------------------------------------------
+
+    def _input(self, name: str):
+        return self.inputs[name].get()
+
+    def makeLot(self) -> str:
+        regular, ev, level = self._input('num_value'), self._input('ev_value'), self._input('level_value')
+        self.createParkingLot(int(regular), int(ev), int(level))
+        return self._write([f"Created a parking lot with {regular} regular slots and {ev} ev slots "
+                            f"on level: {level}\n"])
+
+    def parkCar(self) -> str:
+        slot = self.park(self._input('reg_value'), self._input('make_value'), self._input('model_value'),
+                         self._input('color_value'), self._input('ev_car_value'), self._input('ev_motor_value'))
+        if slot == -1:
+            return self._write(["Sorry, parking lot is full\n"])
+        return self._write([f"Allocated slot number: {slot}\n"])
+
+    def removeCar(self) -> str:
+        slot = self._input('slot_value')
+        if self.leave(int(slot), int(self._input('ev_car2_value'))):
+            return self._write([f"Slot number {slot} is free\n"])
+        return self._write([f"Unable to remove a car from slot: {slot}\n"])
+
+    def slotNumByReg(self) -> str:
+        regnum = self._input('slot1_value')
+        slot, ev_slot = self.getSlotNumFromRegNum(regnum), self.getSlotNumFromRegNumEv(regnum)
+        if slot >= 0:
+            return self._write([f"Identified slot: {slot}\n"])
+        if ev_slot >= 0:
+            return self._write([f"Identified slot (EV): {ev_slot}\n"])
+        return self._write(["Not found\n"])
+
+    def slotNumByColor(self) -> str:
+        color = self._input('slot2_value')
+        return self._write([f"Identified slots: {', '.join(self.getSlotNumFromColor(color))}\n",
+                            f"Identified slots (EV): {', '.join(self.getSlotNumFromColorEv(color))}\n"])
+
+    def regNumByColor(self) -> str:
+        color = self._input('reg1_value')
+        # "Registation" is the legacy spelling, kept so the text matches
+        return self._write([f"Registation Numbers: {', '.join(self.getRegNumFromColor(color))}\n",
+                            f"Registation Numbers (EV): {', '.join(self.getRegNumFromColorEv(color))}\n"])
+
+    def _write(self, lines: List[str]) -> str:
+        if self.output is not None:
+            for line in lines:
+                self.output.insert('insert', line)
+        return ''.join(lines)
@@ -1,28 +1,111 @@
-from typing import List, Optional, Dict, Tuple
-from models.space import ParkingSpace, RegularSpace, EVSpace
+import threading
+from contextlib import ExitStack, contextmanager
+from typing import Any, Iterable, Iterator, List, Optional, Dict, Set, Tuple
+from models.space import ParkingSpace
+from models.space_store import SpaceStore
 from models.vehicle import Vehicle, VehicleInfo, Car, Motorcycle, ElectricCar, ElectricBike
+from controllers.free_space_index import FreeSpaceIndex
+from controllers.attribute_index import AttributeIndex
+from controllers.plate_index import PlateIndex
+from controllers.events import ParkingEventListener
+
+INDEXED_ATTRIBUTES = ('color', 'make', 'model')
+CHARGE_BUCKETS = 10  # EV charge histogram buckets: 0-9%, 10-19%, ..., 90-100%
+
+def charge_bucket(charge_level: int) -> int:
+    """Histogram bucket for a charge percentage"""
+    return min(charge_level * CHARGE_BUCKETS // 100, CHARGE_BUCKETS - 1)
 
 class ParkingLotController:
-    """Controller for parking lot operations"""
+    """Controller for parking lot operations
+
+    Safe to share between gate threads: each space type has its own lock
+    guarding its spaces and free-space index, so entry and exit on regular
+    and EV bays don't contend. The registration map and attribute indexes
+    sit behind a short index lock. Locks are always taken in one order:
+    the regular type lock before the EV one, then the index lock. Writers
+    take the index lock inside a type lock, while read-only lookups such
+    as summary() and the find_* searches may take it on its own.
+
+    Spaces live in columnar SpaceStores rather than one object per bay;
+    ParkingSpace objects handed out by the controller are views onto them.
+
+    Bays can be added, retired and converted from regular to EV while the
+    lot is live. A retired bay leaves the free-space index at once; if a
+    vehicle is still parked there it drains, i.e. the bay simply isn't
+    handed out again once that vehicle leaves.
+
+    Registered ParkingEventListeners are told about every state change
+    while the relevant lock is still held, so they observe changes in the
+    order they were applied.
+    """
     
     def __init__(self):
-        self._regular_spaces: Dict[int, RegularSpace] = {}
-        self._ev_spaces: Dict[int, EVSpace] = {}
+        self._stores: Dict[bool, SpaceStore] = {
+            False: SpaceStore(0, 0, False),
+            True: SpaceStore(0, 0, True)
+        }
         self._vehicle_locations: Dict[str, Tuple[bool, int]] = {}  # registration -> (is_ev, space_id)
+        # Plates are not unique: older locations of a registration parked more than once
+        self._duplicate_locations: Dict[str, List[Tuple[bool, int]]] = {}
+        self._free_spaces: Dict[bool, FreeSpaceIndex] = {False: FreeSpaceIndex(), True: FreeSpaceIndex()}  # is_ev -> free IDs
+        self._retired: Dict[bool, Set[int]] = {False: set(), True: set()}  # is_ev -> out-of-service IDs
+        self._conversions: Dict[int, int] = {}  # draining regular space_id -> EV space_id it becomes
+        self._held: Dict[bool, Set[int]] = {False: set(), True: set()}  # is_ev -> IDs kept back for a booking
+        self._attribute_indexes: Dict[str, AttributeIndex] = {
+            attribute: AttributeIndex() for attribute in INDEXED_ATTRIBUTES
+        }
+        self._plate_index = PlateIndex()
+        self._type_locks: Dict[bool, threading.Lock] = {False: threading.Lock(), True: threading.Lock()}
+        self._index_lock = threading.Lock()
+        # Running counters so summary() never has to walk the lot
+        self._class_counts: Dict[str, int] = {}
+        self._charge_histogram: List[int] = [0] * CHARGE_BUCKETS
+        self._listeners: List[ParkingEventListener] = []
+
+    def add_listener(self, listener: ParkingEventListener) -> None:
+        """Subscribe to park, remove, charge and initialization events"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: ParkingEventListener) -> None:
+        self._listeners.remove(listener)
+
+    @contextmanager
+    def locked(self):
+        """Hold every controller lock, e.g. to take a consistent snapshot"""
+        with ExitStack() as stack:
+            for is_ev in (False, True):
+                stack.enter_context(self._type_locks[is_ev])
+            yield self
 
     def initialize_lot(self, regular_capacity: int, ev_capacity: int, level: int) -> None:
         """Initialize the parking lot with given capacities"""
-        self._regular_spaces = {
-            i: RegularSpace(i, level) for i in range(1, regular_capacity + 1)
-        }
-        self._ev_spaces = {
-            i: EVSpace(i, level) for i in range(1, ev_capacity + 1)
-        }
+        with self._type_locks[False], self._type_locks[True], self._index_lock:
+            self._stores = {
+                False: SpaceStore(regular_capacity, level, False),
+                True: SpaceStore(ev_capacity, level, True)
+            }
+            self._free_spaces = {
+                is_ev: FreeSpaceIndex(store.space_ids()) for is_ev, store in self._stores.items()
+            }
+            self._retired = {False: set(), True: set()}
+            self._conversions = {}
+            self._held = {False: set(), True: set()}
+            for index in self._attribute_indexes.values():
+                index.clear()
+            self._plate_index.clear()
+            self._vehicle_locations = {}
+            self._duplicate_locations = {}
+            self._class_counts = {}
+            self._charge_histogram = [0] * CHARGE_BUCKETS
+            for listener in self._listeners:
+                listener.on_lot_initialized(regular_capacity, ev_capacity, level)
 
     def find_available_space(self, is_ev: bool) -> Optional[ParkingSpace]:
-        """Find an available parking space"""
-        spaces = self._ev_spaces if is_ev else self._regular_spaces
-        return next((space for space in spaces.values() if not space.is_occupied), None)
+        """Find the lowest numbered available parking space"""
+        with self._type_locks[is_ev]:
+            space_id = self._free_spaces[is_ev].peek()
+            return self._stores[is_ev].space(space_id) if space_id is not None else None
 
     def park_vehicle(self, info: VehicleInfo, is_ev: bool, is_motorcycle: bool) -> Optional[int]:
         """Park a vehicle and return the space ID if successful"""
@@ -32,54 +115,421 @@ class ParkingLotController:
         else:
             vehicle = Motorcycle(info) if is_motorcycle else Car(info)
 
-        # Find available space
-        space = self.find_available_space(is_ev)
-        if not space:
-            return None
+        # Claim the lowest free space and park while holding the type lock
+        # so no other gate can be handed the same space
+        with self._type_locks[is_ev]:
+            free_spaces = self._free_spaces[is_ev]
+            space_id = free_spaces.peek()
+            if space_id is None or not self._stores[is_ev].occupy(space_id, vehicle):
+                return None
+            free_spaces.pop()
+            location = (is_ev, space_id)
+            with self._index_lock:
+                self._index_vehicle(vehicle, location)
+            for listener in self._listeners:
+                listener.on_park(is_ev, space_id, vehicle)
+            return space_id
+
+    def place_vehicle(self, vehicle: Vehicle, is_ev: bool, space_id: int) -> bool:
+        """Park a vehicle in a specific free or held space, e.g. when restoring saved state
+
+        Parking in a held space ends the hold.
+        """
+        with self._type_locks[is_ev]:
+            free_spaces, held = self._free_spaces[is_ev], self._held[is_ev]
+            if space_id not in free_spaces and space_id not in held:
+                return False
+            if not self._stores[is_ev].occupy(space_id, vehicle):
+                return False
+            free_spaces.discard(space_id)
+            held.discard(space_id)
+            location = (is_ev, space_id)
+            with self._index_lock:
+                self._index_vehicle(vehicle, location)
+            for listener in self._listeners:
+                listener.on_park(is_ev, space_id, vehicle)
+            return True
+
+    def park_many(self, infos: Iterable[VehicleInfo], is_ev: bool,
+                  is_motorcycle: bool = False) -> List[Optional[int]]:
+        """Park a burst of vehicles of one type and return each one's space ID
+
+        Spaces are claimed from the free index in one go and every index is
+        updated under a single lock acquisition. Vehicles that don't fit get
+        None, in arrival order, exactly as repeated park_vehicle calls would.
+        """
+        if is_ev:
+            vehicle_class = ElectricBike if is_motorcycle else ElectricCar
+        else:
+            vehicle_class = Motorcycle if is_motorcycle else Car
+        vehicles = [vehicle_class(info) for info in infos]
 
-        # Park vehicle
-        if space.park_vehicle(vehicle):
-            self._vehicle_locations[info.registration] = (is_ev, space.space_id)
-            return space.space_id
-        return None
+        with self._type_locks[is_ev]:
+            store = self._stores[is_ev]
+            space_ids = self._free_spaces[is_ev].pop_many(len(vehicles))
+            parked = list(zip(space_ids, vehicles))
+            for space_id, vehicle in parked:
+                store.occupy(space_id, vehicle)
+            with self._index_lock:
+                for space_id, vehicle in parked:
+                    location = (is_ev, space_id)
+                    self._index_vehicle(vehicle, location)
+            for listener in self._listeners:
+                for space_id, vehicle in parked:
+                    listener.on_park(is_ev, space_id, vehicle)
+        return space_ids + [None] * (len(vehicles) - len(space_ids))
 
     def remove_vehicle(self, space_id: int, is_ev: bool) -> bool:
         """Remove a vehicle from a parking space"""
-        spaces = self._ev_spaces if is_ev else self._regular_spaces
-        if space_id not in spaces:
-            return False
-
-        space = spaces[space_id]
-        vehicle = space.remove_vehicle()
-        if vehicle:
-            self._vehicle_locations.pop(vehicle.registration, None)
+        return self.take_vehicle(space_id, is_ev) is not None
+
+    def take_vehicle(self, space_id: int, is_ev: bool) -> Optional[Vehicle]:
+        """Remove and return the vehicle parked in a space"""
+        with self._type_locks[is_ev]:
+            store = self._stores[is_ev]
+            if space_id not in store:
+                return None
+
+            vehicle = store.release(space_id)
+            if vehicle:
+                self._return_space(is_ev, space_id)
+                with self._index_lock:
+                    self._unindex_vehicle(vehicle, (is_ev, space_id))
+                for listener in self._listeners:
+                    listener.on_remove(is_ev, space_id, vehicle)
+            return vehicle
+
+    def remove_many(self, space_ids: Iterable[int], is_ev: bool) -> List[bool]:
+        """Remove vehicles from many spaces of one type under a single lock acquisition"""
+        results = []
+        with self._type_locks[is_ev]:
+            store = self._stores[is_ev]
+            removed = []
+            for space_id in space_ids:
+                vehicle = store.release(space_id) if space_id in store else None
+                results.append(vehicle is not None)
+                if vehicle is not None:
+                    self._return_space(is_ev, space_id)
+                    removed.append((space_id, vehicle))
+            with self._index_lock:
+                for space_id, vehicle in removed:
+                    self._unindex_vehicle(vehicle, (is_ev, space_id))
+            for listener in self._listeners:
+                for space_id, vehicle in removed:
+                    listener.on_remove(is_ev, space_id, vehicle)
+        return results
+
+    def _return_space(self, is_ev: bool, space_id: int) -> None:
+        """Put a vacated space back in service unless it is draining or held (type lock held)"""
+        if space_id not in self._retired[is_ev]:
+            if space_id not in self._held[is_ev]:
+                self._free_spaces[is_ev].add(space_id)
+            return
+        ev_space_id = self._conversions.pop(space_id, None) if not is_ev else None
+        if ev_space_id is not None:
+            # Regular before EV is the controller's lock order
+            with self._type_locks[True]:
+                self._retired[True].discard(ev_space_id)
+                self._free_spaces[True].add(ev_space_id)
+
+    def add_spaces(self, count: int, is_ev: bool) -> range:
+        """Add count new spaces after the highest existing ID and return their IDs"""
+        if count < 0:
+            raise ValueError("count must not be negative")
+        with self._type_locks[is_ev]:
+            space_ids = self._stores[is_ev].extend(count)
+            if space_ids:
+                self._free_spaces[is_ev].add_range(space_ids[0], space_ids[-1])
+            for listener in self._listeners:
+                listener.on_spaces_added(is_ev, space_ids)
+            return space_ids
+
+    def retire_spaces(self, space_ids: Iterable[int], is_ev: bool) -> List[int]:
+        """Take spaces out of service and return the ones that are still occupied
+
+        Those drain: their vehicles stay until they leave, after which the
+        space is not handed out again. Unknown or already retired IDs are
+        ignored.
+        """
+        with self._type_locks[is_ev]:
+            store = self._stores[is_ev]
+            retired = self._retired[is_ev]
+            free_spaces = self._free_spaces[is_ev]
+            changed = []
+            for space_id in space_ids:
+                if space_id in store and space_id not in retired:
+                    retired.add(space_id)
+                    free_spaces.discard(space_id)
+                    changed.append(space_id)
+            if changed:
+                for listener in self._listeners:
+                    listener.on_spaces_retired(is_ev, changed)
+            return [space_id for space_id in changed if store.is_occupied(space_id)]
+
+    def convert_space(self, space_id: int, ev_space_id: Optional[int] = None) -> Optional[int]:
+        """Turn a regular space into an EV space and return the EV space ID
+
+        The regular space is retired and a new EV space added in its place.
+        If a vehicle is still parked in the regular space, the EV space stays
+        out of service until that vehicle leaves. Passing ev_space_id reuses
+        an existing retired, empty EV space instead, e.g. when restoring a
+        snapshot. Returns None if the regular space is unknown or retired.
+        """
+        with self._type_locks[False], self._type_locks[True]:
+            regular, ev = self._stores[False], self._stores[True]
+            if space_id not in regular or space_id in self._retired[False]:
+                return None
+            if ev_space_id is None:
+                ev_space_id = ev.extend(1)[0]
+            elif ev_space_id not in self._retired[True] or ev.is_occupied(ev_space_id):
+                return None
+            self._retired[False].add(space_id)
+            self._free_spaces[False].discard(space_id)
+            if regular.is_occupied(space_id):
+                self._retired[True].add(ev_space_id)
+                self._conversions[space_id] = ev_space_id
+            else:
+                self._retired[True].discard(ev_space_id)
+                self._free_spaces[True].add(ev_space_id)
+            for listener in self._listeners:
+                listener.on_space_converted(space_id, ev_space_id)
+            return ev_space_id
+
+    def hold_space(self, space_id: int, is_ev: bool) -> bool:
+        """Keep a space back from walk-in allocation, e.g. ahead of a reservation
+
+        An occupied space is held from the moment its vehicle leaves. Only
+        place_vehicle can park in a held space. Returns False if the space
+        is unknown or retired.
+        """
+        with self._type_locks[is_ev]:
+            if space_id not in self._stores[is_ev] or space_id in self._retired[is_ev]:
+                return False
+            self._held[is_ev].add(space_id)
+            self._free_spaces[is_ev].discard(space_id)
+            return True
+
+    def release_space(self, space_id: int, is_ev: bool) -> None:
+        """End a hold, returning the space to walk-in allocation if it is empty"""
+        with self._type_locks[is_ev]:
+            held = self._held[is_ev]
+            if space_id not in held:
+                return
+            held.discard(space_id)
+            if not self._stores[is_ev].is_occupied(space_id) and space_id not in self._retired[is_ev]:
+                self._free_spaces[is_ev].add(space_id)
+
+    def held_spaces(self, is_ev: bool) -> List[int]:
+        """IDs of spaces held back from walk-ins; lock-free, like retired_spaces()"""
+        return sorted(self._held[is_ev])
+
+    def retired_spaces(self, is_ev: bool) -> List[int]:
+        """IDs of spaces that are out of service, including ones still draining
+
+        Takes no lock so snapshots can call it inside locked(); do the same
+        if the lot may be changing.
+        """
+        return sorted(self._retired[is_ev])
+
+    def is_retired(self, space_id: int, is_ev: bool) -> bool:
+        """Whether a space is out of service; lock-free, like retired_spaces()"""
+        return space_id in self._retired[is_ev]
+
+    def pending_conversions(self) -> Dict[int, int]:
+        """Occupied regular spaces awaiting conversion, mapped to their EV space IDs
+
+        Lock-free, like retired_spaces().
+        """
+        return dict(self._conversions)
+
+    def get_vehicle(self, space_id: int, is_ev: bool) -> Optional[Vehicle]:
+        """Return the vehicle parked in a space, if any"""
+        store = self._stores[is_ev]
+        return store.vehicle(space_id) if space_id in store else None
+
+    def highest_empty_space(self, is_ev: bool, low: int, high: int) -> Optional[int]:
+        """Highest unoccupied space ID of one type in [low, high], or None; lock-free, like get_vehicle()"""
+        return self._stores[is_ev].highest_empty(low, high)
+
+    @property
+    def level(self) -> int:
+        return self._stores[False].level
+
+    def capacity(self, is_ev: bool) -> int:
+        """Number of spaces of one type that are in service"""
+        return self._stores[is_ev].capacity - len(self._retired[is_ev])
+
+    def max_space_id(self, is_ev: bool) -> int:
+        """Highest space ID of one type, counting retired spaces"""
+        return self._stores[is_ev].capacity
+
+    def free_space_count(self, is_ev: bool) -> int:
+        """Number of unoccupied spaces of one type"""
+        return len(self._free_spaces[is_ev])
+
+    def set_charge_level(self, space_id: int, charge_level: int,
+                         expected: Optional[Vehicle] = None) -> bool:
+        """Update the charge of the EV in a space, keeping the charge histogram current
+
+        Setting ElectricVehicle.charge_level directly bypasses the histogram.
+        With expected, nothing changes unless that vehicle is still the one
+        in the space.
+        """
+        with self._type_locks[True]:
+            store = self._stores[True]
+            vehicle = store.vehicle(space_id) if space_id in store else None
+            if vehicle is None or (expected is not None and vehicle is not expected):
+                return False
+            with self._index_lock:
+                self._charge_histogram[charge_bucket(vehicle.charge_level)] -= 1
+                vehicle.charge_level = charge_level
+                self._charge_histogram[charge_bucket(vehicle.charge_level)] += 1
+            for listener in self._listeners:
+                listener.on_charge(space_id, vehicle)
             return True
-        return False
 
     def get_vehicle_location(self, registration: str) -> Optional[Tuple[bool, int]]:
-        """Find vehicle location by registration number"""
+        """Find vehicle location by registration number; the latest arrival if the plate is parked twice"""
         return self._vehicle_locations.get(registration)
 
-    def find_vehicles_by_color(self, color: str, is_ev: bool) -> List[Tuple[int, Vehicle]]:
+    def get_vehicle_locations(self, registration: str) -> List[Tuple[bool, int]]:
+        """Every (is_ev, space_id) holding a vehicle with this registration, in space order"""
+        with self._index_lock:
+            location = self._vehicle_locations.get(registration)
+            if location is None:
+                return []
+            return sorted([location] + self._duplicate_locations.get(registration, []))
+
+    def find_vehicles_by_color(self, color: str, is_ev: bool, ignore_case: bool = False) -> List[Tuple[int, Vehicle]]:
         """Find vehicles by color"""
-        spaces = self._ev_spaces if is_ev else self._regular_spaces
-        return [(space_id, space.vehicle) 
-                for space_id, space in spaces.items()
-                if space.is_occupied and space.vehicle.color == color]
+        return self._find_vehicles_by('color', color, is_ev, ignore_case)
+
+    def find_vehicles_by_make(self, make: str, is_ev: bool, ignore_case: bool = False) -> List[Tuple[int, Vehicle]]:
+        """Find vehicles by make"""
+        return self._find_vehicles_by('make', make, is_ev, ignore_case)
+
+    def find_vehicles_by_model(self, model: str, is_ev: bool, ignore_case: bool = False) -> List[Tuple[int, Vehicle]]:
+        """Find vehicles by model"""
+        return self._find_vehicles_by('model', model, is_ev, ignore_case)
+
+    def find_locations_by_attribute(self, attribute: str, value: str,
+                                    ignore_case: bool = False) -> List[Tuple[bool, int]]:
+        """Find (is_ev, space_id) of every vehicle whose color, make or model matches"""
+        with self._index_lock:
+            return sorted(self._attribute_indexes[attribute].lookup(value, ignore_case))
+
+    def _find_vehicles_by(self, attribute: str, value: str, is_ev: bool,
+                          ignore_case: bool) -> List[Tuple[int, Vehicle]]:
+        """Look up matching vehicles of one space type in O(matches)"""
+        with self._type_locks[is_ev]:
+            store = self._stores[is_ev]
+            with self._index_lock:
+                locations = self._attribute_indexes[attribute].lookup(value, ignore_case)
+                space_ids = sorted(space_id for ev, space_id in locations if ev == is_ev)
+            return [(space_id, store.vehicle(space_id)) for space_id in space_ids]
+
+    def find_registrations_by_prefix(self, prefix: str, limit: int = 100) -> List[Tuple[str, Tuple[bool, int]]]:
+        """Find (registration, location) of parked vehicles whose plate starts with prefix"""
+        with self._index_lock:
+            return self._plate_locations(self._plate_index.prefix(prefix, limit))
+
+    def find_registrations_matching(self, pattern: str, limit: int = 100) -> List[Tuple[str, Tuple[bool, int]]]:
+        """Find (registration, location) of parked vehicles whose plate matches a ?/* wildcard pattern"""
+        with self._index_lock:
+            return self._plate_locations(self._plate_index.wildcard(pattern, limit))
+
+    def find_similar_registrations(self, registration: str, max_distance: int = 1,
+                                   limit: int = 100) -> List[Tuple[str, int, Tuple[bool, int]]]:
+        """Find (registration, edit distance, location) of plates within max_distance edits, closest first"""
+        with self._index_lock:
+            return [(match, distance, self._vehicle_locations[match])
+                    for match, distance in self._plate_index.similar(registration, max_distance, limit)]
+
+    def _plate_locations(self, registrations: List[str]) -> List[Tuple[str, Tuple[bool, int]]]:
+        return [(registration, self._vehicle_locations[registration]) for registration in registrations]
+
+    def _index_vehicle(self, vehicle: Vehicle, location: Tuple[bool, int]) -> None:
+        """Add a parked vehicle to the location map, indexes and counters (index lock held)"""
+        registration = vehicle.registration
+        previous = self._vehicle_locations.get(registration)
+        if previous is not None:
+            self._duplicate_locations.setdefault(registration, []).append(previous)
+        self._vehicle_locations[registration] = location
+        for attribute, index in self._attribute_indexes.items():
+            index.add(getattr(vehicle, attribute), location)
+        self._plate_index.add(registration)
+        class_name = type(vehicle).__name__
+        self._class_counts[class_name] = self._class_counts.get(class_name, 0) + 1
+        if vehicle.is_electric:
+            self._charge_histogram[charge_bucket(vehicle.charge_level)] += 1
+
+    def _unindex_vehicle(self, vehicle: Vehicle, location: Tuple[bool, int]) -> None:
+        """Remove a departed vehicle from the location map, indexes and counters (index lock held)
+
+        park_vehicle doesn't reject a plate that is already parked, so the
+        registration may still be parked elsewhere; it then keeps its plate
+        index entry and its most recent remaining location.
+        """
+        registration = vehicle.registration
+        duplicates = self._duplicate_locations.get(registration)
+        if duplicates:
+            if self._vehicle_locations.get(registration) == location:
+                self._vehicle_locations[registration] = duplicates.pop()
+            else:
+                duplicates.remove(location)
+            if not duplicates:
+                del self._duplicate_locations[registration]
+        else:
+            self._vehicle_locations.pop(registration, None)
+            self._plate_index.remove(registration)
+        for attribute, index in self._attribute_indexes.items():
+            index.remove(getattr(vehicle, attribute), location)
+        class_name = type(vehicle).__name__
+        self._class_counts[class_name] -= 1
+        if not self._class_counts[class_name]:
+            del self._class_counts[class_name]
+        if vehicle.is_electric:
+            self._charge_histogram[charge_bucket(vehicle.charge_level)] -= 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Occupancy summary read from running counters in O(1)"""
+        with self._index_lock:
+            summary = {'level': self.level}
+            for key, is_ev in (('regular', False), ('ev', True)):
+                summary[key] = {'capacity': self.capacity(is_ev),
+                                'occupied': self._stores[is_ev].occupied_count,
+                                'free': len(self._free_spaces[is_ev]),
+                                'retired': len(self._retired[is_ev]),
+                                'held': len(self._held[is_ev])}
+            summary['vehicle_classes'] = dict(self._class_counts)
+            summary['ev_charge_histogram'] = list(self._charge_histogram)
+            return summary
+
+    def iter_occupied(self, is_ev: bool) -> Iterator[Tuple[int, Vehicle]]:
+        """Yield (space_id, vehicle) for occupied spaces only, in space order
+
+        Does not hold a lock between items, so a vehicle that leaves while
+        the caller is iterating is simply skipped.
+        """
+        store = self._stores[is_ev]
+        for space_id in store.occupied_ids():
+            vehicle = store.vehicle(space_id)
+            if vehicle is not None:
+                yield space_id, vehicle
 
     def get_lot_status(self) -> Dict[str, List[Tuple[int, Vehicle]]]:
         """Get current status of all parking spaces"""
-        return {
-            'regular': [(space_id, space.vehicle) 
-                       for space_id, space in self._regular_spaces.items()
-                       if space.is_occupied],
-            'ev': [(space_id, space.vehicle)
-                  for space_id, space in self._ev_spaces.items()
-                  if space.is_occupied]
-        }
+        status = {}
+        for key, is_ev in (('regular', False), ('ev', True)):
+            with self._type_locks[is_ev]:
+                store = self._stores[is_ev]
+                status[key] = [(space_id, store.vehicle(space_id))
+                               for space_id in store.occupied_ids()]
+        return status
 
     def get_ev_charge_status(self) -> List[Tuple[int, int]]:
         """Get charging status of all EVs"""
-        return [(space_id, space.vehicle.charge_level)
-                for space_id, space in self._ev_spaces.items()
-                if space.is_occupied]
\ No newline at end of file
+        with self._type_locks[True]:
+            store = self._stores[True]
+            return [(space_id, store.vehicle(space_id).charge_level)
+                    for space_id in store.occupied_ids()]
@@ -0,0 +1,213 @@
+import re
+from array import array
+from collections import Counter
+from itertools import chain, compress, filterfalse
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+_START, _END = '^', '$'
+_SEPARATORS = str.maketrans('', '', ' -\t')
+# Fuzzy search skips the longest posting lists while candidates must still share this many bigrams
+_MIN_SHARED = 3
+# Posting entries one park or remove scans while compacting stale lists
+_COMPACT_BUDGET = 2048
+
+def normalize_plate(registration: str) -> str:
+    """Plates match regardless of case, spaces and dashes"""
+    return registration.translate(_SEPARATORS).upper()
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, giving up with limit + 1 once it must exceed limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+def _bigrams(plate: str) -> Set[str]:
+    padded = _START + plate + _END
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+class PlateIndex:
+    """Bigram index over registrations for prefix, wildcard and fuzzy search
+
+    Each plate gets an integer ID and every distinct bigram of the padded
+    plate ('^AB12CD$') lists the IDs containing it in a compact uint32
+    array. A query reads the posting lists of its own bigrams, so it
+    touches a few thousand IDs rather than every plate; candidates are
+    then verified exactly.
+
+    Removal is lazy and incremental: the ID is retired at once, and a
+    posting list more than half stale is queued for compaction. Each park
+    or remove then compacts the queued lists in place for at most
+    _COMPACT_BUDGET entries, resuming where the last one stopped, so
+    cleanup is spread over mutations and nothing ever rebuilds the whole
+    index. An ID is reused once every list has dropped it.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}  # registration -> plate ID
+        self._registrations: List[Optional[str]] = []  # plate ID -> registration, None once removed
+        self._plates: List[Optional[str]] = []  # plate ID -> normalized plate
+        self._live = bytearray()  # plate ID -> 1 while indexed, for filtering posting lists at C speed
+        self._postings: Dict[str, array] = {}
+        self._stale: Dict[str, int] = {}  # bigram -> removed IDs still in its posting list
+        self._pending = array('I')  # plate ID -> posting lists still holding it once removed
+        self._free_ids: List[int] = []
+        self._dirty: Dict[str, int] = {}  # bigram of a list over half stale -> where compaction resumes
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, registration: str) -> None:
+        if registration in self._ids:
+            return
+        plate = normalize_plate(registration)
+        if self._free_ids:
+            plate_id = self._free_ids.pop()
+            self._registrations[plate_id] = registration
+            self._plates[plate_id] = plate
+            self._live[plate_id] = 1
+        else:
+            plate_id = len(self._plates)
+            self._registrations.append(registration)
+            self._plates.append(plate)
+            self._live.append(1)
+            self._pending.append(0)
+        self._ids[registration] = plate_id
+        for gram in _bigrams(plate):
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array('I')
+            postings.append(plate_id)
+        self._compact_some()
+
+    def remove(self, registration: str) -> None:
+        plate_id = self._ids.pop(registration, None)
+        if plate_id is None:
+            return
+        grams = _bigrams(self._plates[plate_id])
+        self._registrations[plate_id] = None
+        self._plates[plate_id] = None
+        self._live[plate_id] = 0
+        self._pending[plate_id] = len(grams)
+        for gram in grams:
+            stale = self._stale[gram] = self._stale.get(gram, 0) + 1
+            if 2 * stale > len(self._postings[gram]):
+                self._dirty.setdefault(gram, 0)
+        self._compact_some()
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def _compact_some(self) -> None:
+        budget = _COMPACT_BUDGET
+        while self._dirty and budget > 0:
+            gram, position = next(iter(self._dirty.items()))
+            postings = self._postings[gram]
+            end = min(position + budget, len(postings))
+            budget -= end - position
+            kept = self._compact(gram, postings, position, end)
+            if position + kept < len(postings):
+                self._dirty[gram] = position + kept
+            else:
+                del self._dirty[gram]
+                if not postings:
+                    del self._postings[gram], self._stale[gram]
+
+    def _compact(self, gram: str, postings: array, start: int, end: int) -> int:
+        """Drop removed IDs from postings[start:end] in place and return how many entries remain there
+
+        Freed IDs go back on the free list once no list holds them.
+        """
+        chunk, live, pending = postings[start:end], self._live, self._pending
+        for plate_id in filterfalse(live.__getitem__, chunk):
+            pending[plate_id] -= 1
+            if not pending[plate_id]:
+                self._free_ids.append(plate_id)
+        kept = array('I', compress(chunk, map(live.__getitem__, chunk)))
+        postings[start:end] = kept
+        self._stale[gram] -= len(chunk) - len(kept)
+        return len(kept)
+
+    def _candidates(self, grams: Iterable[str]) -> Optional[array]:
+        """Shortest posting list among grams, or None if no gram narrows the search"""
+        shortest = None
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings is None:
+                return array('I')
+            if shortest is None or len(postings) < len(shortest):
+                shortest = postings
+        return shortest
+
+    def _collect(self, plate_ids: Iterable[int], matches, limit: int) -> List[str]:
+        found = []
+        registrations, plates = self._registrations, self._plates
+        for plate_id in plate_ids:
+            plate = plates[plate_id]
+            if plate is not None and matches(plate):
+                found.append(registrations[plate_id])
+                if len(found) >= limit:
+                    break
+        return found
+
+    def prefix(self, prefix: str, limit: int = 100) -> List[str]:
+        """Up to limit registrations starting with prefix"""
+        prefix = normalize_plate(prefix)
+        if not prefix:
+            return [registration for registration in self._registrations if registration is not None][:limit]
+        candidates = self._candidates(_bigrams(prefix) - {prefix[-1] + _END})
+        return self._collect(candidates, lambda plate: plate.startswith(prefix), limit)
+
+    def wildcard(self, pattern: str, limit: int = 100) -> List[str]:
+        """Registrations matching a pattern where ? is one character and * any run"""
+        pattern = normalize_plate(pattern)
+        regex = re.compile(''.join('.' if char == '?' else '.*' if char == '*' else re.escape(char)
+                                   for char in pattern) + r'\Z')
+        # Bigrams of the literal runs, anchored where the pattern is
+        padded = _START + pattern + _END
+        grams = {padded[i:i + 2] for i in range(len(padded) - 1)
+                 if not set(padded[i:i + 2]) & {'?', '*'}}
+        candidates = self._candidates(grams) if grams else None
+        if candidates is None:
+            candidates = range(len(self._plates))
+        return self._collect(candidates, regex.match, limit)
+
+    def similar(self, plate: str, max_distance: int = 1, limit: int = 100) -> List[Tuple[str, int]]:
+        """(registration, edit distance) within max_distance of plate, closest first
+
+        One edit removes at most two of a plate's distinct bigrams, so a
+        match must share all but 2 * max_distance of the query's bigrams;
+        counting shared bigrams over the posting lists prunes everything
+        else before any distance is computed. Leaving out a list lowers the
+        bar by one, so the longest lists (usually the anchors) are skipped
+        while the bar stays high enough to keep the candidates few.
+        """
+        plate = normalize_plate(plate)
+        grams = _bigrams(plate)
+        needed = len(grams) - 2 * max_distance
+        if needed <= 0:
+            candidates: Iterable[int] = range(len(self._plates))
+        else:
+            postings = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+            skipped = max(0, min(needed - _MIN_SHARED, len(postings)))
+            needed -= skipped
+            counts = Counter(chain.from_iterable(postings[:len(postings) - skipped]))
+            candidates = [plate_id for plate_id, shared in counts.items() if shared >= needed]
+        found = []
+        for plate_id in candidates:
+            other = self._plates[plate_id]
+            if other is None:
+                continue
+            distance = edit_distance(plate, other, max_distance)
+            if distance <= max_distance:
+                found.append((self._registrations[plate_id], distance))
+        found.sort(key=lambda match: (match[1], match[0]))
+        return found[:limit]
@@ -0,0 +1,359 @@
+import heapq
+import math
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from itertools import count
+from typing import Callable, Dict, List, Optional, Tuple
+from controllers.booking_index import GapIndex, SpaceRuns
+from controllers.parking_controller import ParkingLotController
+from models.vehicle import Car, ElectricBike, ElectricCar, Motorcycle, VehicleInfo
+
+HOLD, NO_SHOW, END = 0, 1, 2
+
+@dataclass
+class Reservation:
+    """A booking of one space for the half-open window [start, end), in epoch seconds"""
+    reservation_id: int
+    is_ev: bool
+    space_id: int
+    start: float
+    end: float
+    registration: Optional[str] = None
+    holding: bool = False
+    checked_in: bool = False
+
+class SpaceSchedule:
+    """Disjoint bookings of one space as parallel lists sorted by start"""
+
+    __slots__ = ('starts', 'ends', 'ids')
+
+    def __init__(self):
+        self.starts: List[float] = []
+        self.ends: List[float] = []
+        self.ids: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def conflicts(self, start: float, end: float) -> bool:
+        """Whether [start, end) overlaps a booking, in O(log bookings)"""
+        i = bisect_right(self.starts, start)
+        if i and self.ends[i - 1] > start:
+            return True
+        return i < len(self.starts) and self.starts[i] < end
+
+    def add(self, start: float, end: float, reservation_id: int) -> int:
+        """Insert a booking and return its position"""
+        i = bisect_left(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.ids.insert(i, reservation_id)
+        return i
+
+    def remove(self, start: float, reservation_id: int) -> int:
+        """Delete a booking and return the position it had"""
+        i = bisect_left(self.starts, start)
+        while self.ids[i] != reservation_id:
+            i += 1
+        del self.starts[i], self.ends[i], self.ids[i]
+        return i
+
+    def gap_around(self, i: int) -> Tuple[float, float]:
+        """The free gap just before position i: (end of the booking before it, start of the one at it)"""
+        return (self.ends[i - 1] if i else -math.inf,
+                self.starts[i] if i < len(self.starts) else math.inf)
+
+class ReservationBook:
+    """Advance bookings of individual spaces on one controller
+
+    Each booked space keeps its bookings in a SpaceSchedule, so checking a
+    space for a clash is a bisect. The free gaps between bookings are also
+    indexed per space type in a GapIndex, so finding a booked space that
+    fits, or the next gap long enough, is a logarithmic search rather than
+    a pass over every booked space; the gap that opened most recently
+    before the window wins, packing bookings back to back. Spaces with no
+    bookings are kept as ordered runs and handed out from the top of the
+    lot down, away from the low IDs walk-ins are given.
+
+    hold_ahead seconds before a booking starts its space is held on the
+    controller, which keeps it out of find_available_space and
+    park_vehicle; an occupied space is held from the moment it empties.
+    The hold ends at check-in, when the booking is cancelled, or `grace`
+    seconds after the start if nobody turns up. Timed holds and expiries
+    are applied by advance(), which every method calls and which should
+    also run periodically. Bookings live in memory only.
+    """
+
+    def __init__(self, controller: ParkingLotController, hold_ahead: float = 900.0,
+                 grace: float = 900.0, clock: Callable[[], float] = time.time):
+        self._controller = controller
+        self._hold_ahead = hold_ahead
+        self._grace = grace
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._reservations: Dict[int, Reservation] = {}
+        self._schedules: Dict[bool, Dict[int, SpaceSchedule]] = {False: {}, True: {}}
+        self._gaps: Dict[bool, GapIndex] = {False: GapIndex(), True: GapIndex()}
+        self._unbooked: Dict[bool, SpaceRuns] = {False: SpaceRuns(), True: SpaceRuns()}
+        self._known_max: Dict[bool, int] = {False: 0, True: 0}  # highest ID added to _unbooked
+        self._hold_counts: Dict[Tuple[bool, int], int] = {}
+        self._timeline: List[Tuple[float, int, int, int]] = []  # (when, order, event, reservation_id)
+        self._order = count()
+        self._ids = count(1)
+
+    # -- Queries ---------------------------------------------------------------
+
+    def get(self, reservation_id: int) -> Optional[Reservation]:
+        return self._reservations.get(reservation_id)
+
+    def reservations_for(self, space_id: int, is_ev: bool) -> List[Reservation]:
+        """Bookings of one space, earliest first"""
+        with self._lock:
+            schedule = self._schedules[is_ev].get(space_id)
+            return [self._reservations[reservation_id] for reservation_id in schedule.ids] if schedule else []
+
+    def is_available(self, start: float, end: float, is_ev: bool) -> bool:
+        """Whether some space of the type could be booked for [start, end)"""
+        return self.find_space(start, end, is_ev) is not None
+
+    def find_space(self, start: float, end: float, is_ev: bool) -> Optional[int]:
+        """The space reserve() would book for [start, end), or None"""
+        with self._lock:
+            now = self._clock()
+            self._advance(now)
+            return self._choose_space(start, end, is_ev, now)
+
+    def next_available(self, is_ev: bool, duration: float,
+                       after: Optional[float] = None) -> Optional[Tuple[float, int]]:
+        """Earliest (start, space_id) at or after `after` where a booking of duration fits"""
+        with self._lock:
+            now = self._clock()
+            self._advance(now)
+            after = now if after is None else max(after, now)
+            space_id = self._choose_space(after, after + duration, is_ev, now)
+            if space_id is not None:
+                return after, space_id
+            best = None
+            # Past the hold window occupancy no longer matters, so any unbooked space will do
+            later = max(after, now + self._hold_ahead + 1)
+            if later > after:
+                space_id = self._choose_space(later, later + duration, is_ev, now)
+                if space_id is not None:
+                    best = (later, space_id)
+            # Nothing fits at `after`, so any earlier start is where some booking ends
+            for start, space_id in self._gaps[is_ev].opening_after(after, duration):
+                if best is not None and (start, space_id) >= best:
+                    break
+                if self._usable(space_id, is_ev, start - self._hold_ahead <= now):
+                    return start, space_id
+            return best
+
+    # -- Booking -----------------------------------------------------------------
+
+    def reserve(self, start: float, end: float, is_ev: bool, registration: Optional[str] = None,
+                space_id: Optional[int] = None) -> Optional[Reservation]:
+        """Book a space for [start, end), or a given space if space_id is passed
+
+        Returns None if nothing suitable is free for the whole window.
+        """
+        if end <= start:
+            raise ValueError("a reservation must end after it starts")
+        with self._lock:
+            now = self._clock()
+            self._advance(now)
+            if end <= now:
+                raise ValueError("a reservation must end in the future")
+            if space_id is None:
+                space_id = self._choose_space(start, end, is_ev, now)
+            elif not 1 <= space_id <= self._controller.max_space_id(is_ev) or not self._fits(
+                    space_id, start, end, is_ev, start - self._hold_ahead <= now):
+                space_id = None
+            if space_id is None:
+                return None
+            reservation = Reservation(next(self._ids), is_ev, space_id, start, end, registration)
+            self._reservations[reservation.reservation_id] = reservation
+            self._schedule(reservation)
+            self._push(start - self._hold_ahead, HOLD, reservation)
+            self._push(min(start + self._grace, end), NO_SHOW, reservation)
+            self._push(end, END, reservation)
+            self._advance(now)
+            return reservation
+
+    def cancel(self, reservation_id: int) -> bool:
+        with self._lock:
+            reservation = self._reservations.get(reservation_id)
+            if reservation is None:
+                return False
+            self._drop(reservation)
+            return True
+
+    def check_in(self, reservation_id: int, info: VehicleInfo, is_motorcycle: bool = False) -> Optional[int]:
+        """Park the booked vehicle and return its space ID
+
+        If the booked space is still occupied, e.g. by a vehicle that
+        overstayed, the booking moves to another space that is free for the
+        rest of its window. Returns None if the booking is unknown, not yet
+        open, or no space can take it.
+        """
+        with self._lock:
+            now = self._clock()
+            self._advance(now)
+            reservation = self._reservations.get(reservation_id)
+            if reservation is None or reservation.checked_in or now < reservation.start - self._hold_ahead:
+                return None
+            is_ev = reservation.is_ev
+            if is_ev:
+                vehicle = ElectricBike(info) if is_motorcycle else ElectricCar(info)
+            else:
+                vehicle = Motorcycle(info) if is_motorcycle else Car(info)
+
+            space_id = reservation.space_id
+            if self._controller.place_vehicle(vehicle, is_ev, space_id):
+                self._release(reservation, parked=True)
+            else:
+                # Free the booked window before looking, so the move may land anywhere else
+                self._unschedule(reservation)
+                space_id = self._choose_space(now, reservation.end, is_ev, now)
+                if space_id is None or not self._controller.place_vehicle(vehicle, is_ev, space_id):
+                    self._schedule(reservation)
+                    return None
+                self._release(reservation)
+                reservation.space_id = space_id
+                self._schedule(reservation)
+            if self._hold_counts.get((is_ev, space_id)):
+                # place_vehicle ended the hold another booking of this space still needs
+                self._controller.hold_space(space_id, is_ev)
+            reservation.checked_in = True
+            return space_id
+
+    def advance(self, now: Optional[float] = None) -> None:
+        """Start holds that are due and expire no-shows and finished bookings"""
+        with self._lock:
+            self._advance(self._clock() if now is None else now)
+
+    # -- Internals (book lock held) -----------------------------------------
+
+    def _push(self, when: float, event: int, reservation: Reservation) -> None:
+        heapq.heappush(self._timeline, (when, next(self._order), event, reservation.reservation_id))
+
+    def _advance(self, now: float) -> None:
+        timeline = self._timeline
+        while timeline and timeline[0][0] <= now:
+            _, _, event, reservation_id = heapq.heappop(timeline)
+            reservation = self._reservations.get(reservation_id)
+            if reservation is None:
+                continue  # cancelled or already finished
+            if event == HOLD:
+                if not reservation.checked_in:
+                    self._hold(reservation)
+            elif event == NO_SHOW:
+                if not reservation.checked_in:
+                    self._drop(reservation)
+            else:
+                self._drop(reservation)
+
+    def _hold(self, reservation: Reservation) -> None:
+        key = (reservation.is_ev, reservation.space_id)
+        if reservation.holding:
+            return
+        if self._hold_counts.get(key, 0) == 0 and not self._controller.hold_space(reservation.space_id,
+                                                                                  reservation.is_ev):
+            return  # retired since booking; check_in will move it
+        self._hold_counts[key] = self._hold_counts.get(key, 0) + 1
+        reservation.holding = True
+
+    def _release(self, reservation: Reservation, parked: bool = False) -> None:
+        """Drop this booking's hold; parked means place_vehicle has already ended the controller hold"""
+        if not reservation.holding:
+            return
+        key = (reservation.is_ev, reservation.space_id)
+        reservation.holding = False
+        remaining = self._hold_counts[key] - 1
+        if remaining:
+            self._hold_counts[key] = remaining
+        else:
+            del self._hold_counts[key]
+            if not parked:
+                self._controller.release_space(reservation.space_id, reservation.is_ev)
+
+    def _schedule(self, reservation: Reservation) -> None:
+        """Book the reservation's window on its space, splitting the gap it lands in"""
+        is_ev, space_id = reservation.is_ev, reservation.space_id
+        schedule = self._schedules[is_ev].get(space_id)
+        gaps = self._gaps[is_ev]
+        if schedule is None:
+            schedule = self._schedules[is_ev][space_id] = SpaceSchedule()
+            self._sync_unbooked(is_ev)
+            self._unbooked[is_ev].discard(space_id)
+            gaps.add(-math.inf, space_id, math.inf)
+        i = schedule.add(reservation.start, reservation.end, reservation.reservation_id)
+        opens, _ = schedule.gap_around(i)
+        _, closes = schedule.gap_around(i + 1)
+        gaps.set_closes(opens, space_id, reservation.start)
+        gaps.add(reservation.end, space_id, closes)
+
+    def _unschedule(self, reservation: Reservation) -> None:
+        """Free the reservation's window, merging the gaps on either side"""
+        is_ev, space_id = reservation.is_ev, reservation.space_id
+        schedules, gaps = self._schedules[is_ev], self._gaps[is_ev]
+        schedule = schedules[space_id]
+        i = schedule.remove(reservation.start, reservation.reservation_id)
+        gaps.remove(reservation.end, space_id)
+        opens, closes = schedule.gap_around(i)
+        if schedule:
+            gaps.set_closes(opens, space_id, closes)
+        else:
+            del schedules[space_id]
+            gaps.remove(opens, space_id)
+            self._unbooked[is_ev].add(space_id)
+
+    def _sync_unbooked(self, is_ev: bool) -> None:
+        """Add spaces the lot has gained since the last call to the unbooked runs"""
+        highest = self._controller.max_space_id(is_ev)
+        if highest > self._known_max[is_ev]:
+            self._unbooked[is_ev].add_range(self._known_max[is_ev] + 1, highest)
+            self._known_max[is_ev] = highest
+
+    def _drop(self, reservation: Reservation) -> None:
+        self._release(reservation)
+        self._unschedule(reservation)
+        del self._reservations[reservation.reservation_id]
+
+    def _usable(self, space_id: int, is_ev: bool, soon: bool) -> bool:
+        """Whether a space is in service and, for a booking about to start, empty now"""
+        if self._controller.is_retired(space_id, is_ev):
+            return False
+        return not soon or self._controller.get_vehicle(space_id, is_ev) is None
+
+    def _fits(self, space_id: int, start: float, end: float, is_ev: bool, soon: bool) -> bool:
+        """Whether a space can take [start, end)"""
+        schedule = self._schedules[is_ev].get(space_id)
+        if schedule is not None and schedule.conflicts(start, end):
+            return False
+        return self._usable(space_id, is_ev, soon)
+
+    def _choose_space(self, start: float, end: float, is_ev: bool, now: float) -> Optional[int]:
+        """Prefer booked spaces that free up just before start, then untouched spaces from the top down
+
+        Searches the gap index and then the unbooked runs, stepping over
+        only retired spaces and, for a booking about to start, occupied
+        ones; occupied runs are skipped with one scan of the occupancy column.
+        """
+        soon = start - self._hold_ahead <= now
+        for space_id in self._gaps[is_ev].containing(start, end):
+            if self._usable(space_id, is_ev, soon):
+                return space_id
+        self._sync_unbooked(is_ev)
+        controller = self._controller
+        for run_start, space_id in self._unbooked[is_ev].descending(controller.max_space_id(is_ev)):
+            while space_id >= run_start:
+                if soon:
+                    space_id = controller.highest_empty_space(is_ev, run_start, space_id)
+                    if space_id is None:
+                        break
+                if not controller.is_retired(space_id, is_ev):
+                    return space_id
+                space_id -= 1
+        return None
@@ -4,7 +4,9 @@ from models.vehicle import Vehicle
 
 class ParkingSpace(ABC):
     """Abstract base class for parking spaces"""
-    
+
+    __slots__ = ('_space_id', '_level', '_vehicle', '_is_occupied')
+
     def __init__(self, space_id: int, level: int):
         self._space_id = space_id
         self._level = level
@@ -51,12 +53,16 @@ class ParkingSpace(ABC):
 
 class RegularSpace(ParkingSpace):
     """Regular parking space for non-electric vehicles"""
-    
+
+    __slots__ = ()
+
     def can_park(self, vehicle: Vehicle) -> bool:
         return not self.is_occupied and not vehicle.is_electric
 
 class EVSpace(ParkingSpace):
     """Specialized parking space for electric vehicles"""
-    
+
+    __slots__ = ()
+
     def can_park(self, vehicle: Vehicle) -> bool:
         return not self.is_occupied and vehicle.is_electric
\ No newline at end of file
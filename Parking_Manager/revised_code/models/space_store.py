@@ -0,0 +1,175 @@
+from array import array
+from typing import Iterator, List, Optional
+from models.space import ParkingSpace
+from models.vehicle import Vehicle
+
+class VehicleTable:
+    """Interned table of parked vehicles addressed by small integer handles"""
+
+    __slots__ = ('_vehicles', '_free_handles')
+
+    def __init__(self):
+        self._vehicles: List[Optional[Vehicle]] = [None]  # handle 0 means "no vehicle"
+        self._free_handles: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._vehicles) - 1 - len(self._free_handles)
+
+    def add(self, vehicle: Vehicle) -> int:
+        """Store a vehicle and return its handle"""
+        if self._free_handles:
+            handle = self._free_handles.pop()
+            self._vehicles[handle] = vehicle
+        else:
+            handle = len(self._vehicles)
+            self._vehicles.append(vehicle)
+        return handle
+
+    def get(self, handle: int) -> Optional[Vehicle]:
+        return self._vehicles[handle]
+
+    def release(self, handle: int) -> Vehicle:
+        """Drop a vehicle from the table so its handle can be reused"""
+        vehicle = self._vehicles[handle]
+        self._vehicles[handle] = None
+        self._free_handles.append(handle)
+        return vehicle
+
+class SpaceStore:
+    """Columnar storage for every space of one type on one level
+
+    Occupancy is one byte per space and the parked vehicle is an integer
+    handle into the store's own VehicleTable, so an empty bay costs five
+    bytes instead of a Python object. The table is not shared with the
+    other space type, so the lock guarding a store also guards its table. Space IDs index the columns directly.
+    The columns only cover spaces up to the highest one ever occupied and
+    grow on demand, so creating or enlarging a store costs O(1).
+    """
+
+    __slots__ = ('_capacity', '_is_ev', '_level', '_occupied', '_occupied_count', '_handles', '_vehicles')
+
+    def __init__(self, capacity: int, level: int, is_ev: bool):
+        self._capacity = capacity
+        self._is_ev = is_ev
+        self._level = level
+        self._occupied = bytearray(1)  # slot 0 unused
+        self._occupied_count = 0
+        self._handles = array('i', [0])
+        self._vehicles = VehicleTable()
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def occupied_count(self) -> int:
+        return self._occupied_count
+
+    @property
+    def level(self) -> int:
+        return self._level
+
+    @property
+    def is_ev(self) -> bool:
+        return self._is_ev
+
+    def __contains__(self, space_id: int) -> bool:
+        return 1 <= space_id <= self._capacity
+
+    def space_ids(self) -> range:
+        return range(1, self._capacity + 1)
+
+    def extend(self, count: int) -> range:
+        """Add count spaces after the current last one and return their IDs"""
+        first = self._capacity + 1
+        self._capacity += count
+        return range(first, self._capacity + 1)
+
+    def _grow(self, space_id: int) -> None:
+        """Extend the columns to cover space_id, doubling to amortise the copies"""
+        size = len(self._occupied)
+        target = min(max(space_id + 1, 2 * size), self._capacity + 1)
+        self._occupied.extend(bytes(target - size))
+        self._handles.frombytes(bytes((target - size) * self._handles.itemsize))
+
+    def is_occupied(self, space_id: int) -> bool:
+        return space_id < len(self._occupied) and self._occupied[space_id] == 1
+
+    def vehicle(self, space_id: int) -> Optional[Vehicle]:
+        if space_id >= len(self._handles):
+            return None
+        return self._vehicles.get(self._handles[space_id])
+
+    def can_park(self, space_id: int, vehicle: Vehicle) -> bool:
+        return not self.is_occupied(space_id) and vehicle.is_electric == self._is_ev
+
+    def occupy(self, space_id: int, vehicle: Vehicle) -> bool:
+        """Park a vehicle in a space"""
+        if not self.can_park(space_id, vehicle):
+            return False
+        if space_id >= len(self._occupied):
+            self._grow(space_id)
+        self._handles[space_id] = self._vehicles.add(vehicle)
+        self._occupied[space_id] = 1
+        self._occupied_count += 1
+        return True
+
+    def release(self, space_id: int) -> Optional[Vehicle]:
+        """Empty a space and return the vehicle that was in it"""
+        if not self.is_occupied(space_id):
+            return None
+        vehicle = self._vehicles.release(self._handles[space_id])
+        self._handles[space_id] = 0
+        self._occupied[space_id] = 0
+        self._occupied_count -= 1
+        return vehicle
+
+    def occupied_ids(self) -> Iterator[int]:
+        """Yield occupied space IDs in order, skipping empty runs at C speed"""
+        occupied = self._occupied
+        space_id = occupied.find(1, 1)
+        while space_id != -1:
+            yield space_id
+            space_id = occupied.find(1, space_id + 1)
+
+    def highest_empty(self, low: int, high: int) -> Optional[int]:
+        """Highest empty space ID in [low, high], found at C speed, or None"""
+        occupied = self._occupied
+        if high >= len(occupied):
+            return high
+        space_id = occupied.rfind(0, low, high + 1)
+        return space_id if space_id != -1 else None
+
+    def space(self, space_id: int) -> 'StoredSpace':
+        """Return a ParkingSpace view of one space"""
+        return StoredSpace(self, space_id)
+
+class StoredSpace(ParkingSpace):
+    """Lightweight ParkingSpace view reading through to a SpaceStore"""
+
+    __slots__ = ('_store',)
+
+    def __init__(self, store: SpaceStore, space_id: int):
+        self._store = store
+        self._space_id = space_id
+
+    @property
+    def is_occupied(self) -> bool:
+        return self._store.is_occupied(self._space_id)
+
+    @property
+    def level(self) -> int:
+        return self._store.level
+
+    @property
+    def vehicle(self) -> Optional[Vehicle]:
+        return self._store.vehicle(self._space_id)
+
+    def can_park(self, vehicle: Vehicle) -> bool:
+        return self._store.can_park(self._space_id, vehicle)
+
+    def park_vehicle(self, vehicle: Vehicle) -> bool:
+        return self._store.occupy(self._space_id, vehicle)
+
+    def remove_vehicle(self) -> Optional[Vehicle]:
+        return self._store.release(self._space_id)
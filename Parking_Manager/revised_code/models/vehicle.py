@@ -2,7 +2,7 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Optional
 
-@dataclass
+@dataclass(slots=True)
 class VehicleInfo:
     """Data class for vehicle information"""
     registration: str
@@ -12,7 +12,9 @@ class VehicleInfo:
 
 class Vehicle(ABC):
     """Abstract base class for all vehicles"""
-    
+
+    __slots__ = ('_info', '_is_electric')
+
     def __init__(self, info: VehicleInfo):
         self._info = info
         self._is_electric = False
@@ -55,15 +57,17 @@ class Vehicle(ABC):
 
 class Car(Vehicle):
     """Regular car implementation"""
-    pass
+    __slots__ = ()
 
 class Motorcycle(Vehicle):
     """Regular motorcycle implementation"""
-    pass
+    __slots__ = ()
 
 class ElectricVehicle(Vehicle):
     """Base class for electric vehicles"""
-    
+
+    __slots__ = ('_charge_level',)
+
     def __init__(self, info: VehicleInfo):
         super().__init__(info)
         self._is_electric = True
@@ -86,8 +90,12 @@ class ElectricVehicle(Vehicle):
 
 class ElectricCar(ElectricVehicle):
     """Electric car implementation"""
-    pass
+    __slots__ = ()
 
 class ElectricBike(ElectricVehicle):
     """Electric motorcycle implementation"""
-    pass
\ No newline at end of file
+    __slots__ = ()
+
+# Vehicle classes are stored on disk as their position in this tuple; only append to it
+VEHICLE_TYPES = (Car, Motorcycle, ElectricCar, ElectricBike)
+VEHICLE_TYPE_CODES = {vehicle_type: code for code, vehicle_type in enumerate(VEHICLE_TYPES)}
@@ -0,0 +1,350 @@
+"""Headless asyncio HTTP/JSON service in front of ParkingLotController.
+
+Usage: python services/parking_service.py [--host H] [--port P] [--regular N] [--ev N]
+                                          [--level N] [--journal DIR | --database FILE]
+
+Endpoints:
+    POST   /api/parking/vehicle/park          park {registration, make, model, color, is_ev, is_motorcycle}
+    DELETE /api/parking/vehicle/{space_id}    remove; ?is_ev=1 for EV spaces
+    GET    /api/parking/vehicle/{registration} where is this vehicle
+    GET    /api/parking/search                 ?color=|make=|model=, optional ignore_case=1
+    GET    /api/parking/plates                 ?prefix=|pattern=|similar= (with distance=N), optional limit=N
+    GET    /api/parking/status                 occupancy summary
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.parking_controller import INDEXED_ATTRIBUTES, ParkingLotController
+from models.vehicle import VehicleInfo
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           409: 'Conflict', 413: 'Payload Too Large', 500: 'Internal Server Error',
+           503: 'Service Unavailable'}
+MAX_BODY = 64 * 1024
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class WriteBatcher:
+    """Coalesce park/remove requests that arrive within a short window
+
+    Requests wait in a bounded queue; when it is full, submit() raises
+    HttpError(503) so callers shed load instead of piling up latency. A
+    single task drains the queue and applies each window in arrival order,
+    as one park_many or remove_many call per run of consecutive requests
+    of the same kind and vehicle type, so a remove frees its space before
+    any park that arrived after it.
+
+    Batches are applied on a writer thread, since the controller's
+    listeners may write to disk, and the event loop keeps serving reads
+    meanwhile. If commit is given (e.g. the journal's or storage backend's
+    commit) it runs after each batch and callers only get their results
+    once it returns, so an acknowledged write is durable.
+    """
+
+    def __init__(self, controller: ParkingLotController, window: float = 0.002,
+                 max_batch: int = 512, max_queue: int = 4096,
+                 commit: Optional[Callable[[], None]] = None):
+        self._controller = controller
+        self._window = window
+        self._max_batch = max_batch
+        self._commit = commit
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='parking-writes')
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._writer.shutdown(wait=True)
+
+    def submit(self, operation: Tuple) -> 'asyncio.Future':
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((operation, future))
+        except asyncio.QueueFull:
+            raise HttpError(503, "Too many pending requests, retry shortly")
+        return future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._window
+            while len(batch) < self._max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                results = await loop.run_in_executor(self._writer, self._apply, batch)
+            except Exception as error:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            # Futures belong to the event loop, so they are resolved here rather than on the writer thread
+            for future, result in results:
+                if not future.done():
+                    future.set_result(result)
+
+    def _apply(self, batch: List[Tuple[Tuple, 'asyncio.Future']]) -> List[Tuple['asyncio.Future', Any]]:
+        """Apply a batch on the writer thread and return (future, result) pairs once committed"""
+        results = []
+        # ('park', info, is_ev, is_motorcycle) runs group on (is_ev, is_motorcycle), ('remove', space_id, is_ev) on is_ev
+        for (kind, *flags), run in groupby(batch, key=lambda item: (item[0][0], *item[0][2:])):
+            items = list(run)
+            if kind == 'park':
+                outcomes = self._controller.park_many([operation[1] for operation, _ in items], *flags)
+            else:
+                outcomes = self._controller.remove_many([operation[1] for operation, _ in items], *flags)
+            results.extend((future, outcome) for (_, future), outcome in zip(items, outcomes))
+        if self._commit is not None:
+            self._commit()
+        return results
+
+class ParkingService:
+    """Routes HTTP requests to the controller; writes go through the batcher"""
+
+    def __init__(self, controller: ParkingLotController, batcher: WriteBatcher):
+        self._controller = controller
+        self._batcher = batcher
+
+    async def handle(self, method: str, target: str, body: bytes) -> Tuple[int, Any]:
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.strip('/').split('/')]
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if parts[:2] != ['api', 'parking'] or len(parts) < 3:
+            raise HttpError(404, "Unknown endpoint")
+        resource = parts[2:]
+
+        if resource == ['vehicle', 'park']:
+            self._require(method, 'POST')
+            return await self._park(body)
+        if resource[0] == 'vehicle' and len(resource) == 2:
+            if method == 'DELETE':
+                return await self._remove(resource[1], query)
+            self._require(method, 'GET')
+            return self._lookup(resource[1])
+        if resource == ['search']:
+            self._require(method, 'GET')
+            return self._search(query)
+        if resource == ['plates']:
+            self._require(method, 'GET')
+            return self._plates(query)
+        if resource == ['status']:
+            self._require(method, 'GET')
+            return 200, self._controller.summary()
+        raise HttpError(404, "Unknown endpoint")
+
+    @staticmethod
+    def _require(method: str, expected: str) -> None:
+        if method != expected:
+            raise HttpError(405, f"Use {expected}")
+
+    async def _park(self, body: bytes) -> Tuple[int, Any]:
+        try:
+            data = json.loads(body or b'{}')
+            info = VehicleInfo(str(data['registration']), str(data.get('make', '')),
+                               str(data.get('model', '')), str(data.get('color', '')))
+        except (ValueError, KeyError, TypeError):
+            raise HttpError(400, "Expected JSON with at least a registration")
+        is_ev, is_motorcycle = data.get('is_ev', False), data.get('is_motorcycle', False)
+        # bool() would read the string "false" as true
+        if not isinstance(is_ev, bool) or not isinstance(is_motorcycle, bool):
+            raise HttpError(400, "is_ev and is_motorcycle must be JSON booleans")
+        space_id = await self._batcher.submit(('park', info, is_ev, is_motorcycle))
+        if space_id is None:
+            raise HttpError(409, "No available spaces")
+        return 200, {'space_id': space_id, 'is_ev': is_ev}
+
+    async def _remove(self, space_id: str, query: Dict[str, str]) -> Tuple[int, Any]:
+        if not space_id.isdigit():
+            raise HttpError(400, "Space ID must be a number")
+        is_ev = query.get('is_ev', '0') in ('1', 'true')
+        if not await self._batcher.submit(('remove', int(space_id), is_ev)):
+            raise HttpError(404, f"No vehicle in space {space_id}")
+        return 200, {'space_id': int(space_id), 'is_ev': is_ev}
+
+    def _lookup(self, registration: str) -> Tuple[int, Any]:
+        location = self._controller.get_vehicle_location(registration)
+        if location is None:
+            raise HttpError(404, f"{registration} is not parked here")
+        is_ev, space_id = location
+        return 200, {'registration': registration, 'is_ev': is_ev, 'space_id': space_id}
+
+    def _search(self, query: Dict[str, str]) -> Tuple[int, Any]:
+        attributes = [attribute for attribute in INDEXED_ATTRIBUTES if attribute in query]
+        if len(attributes) != 1:
+            raise HttpError(400, "Search by exactly one of color, make or model")
+        attribute = attributes[0]
+        ignore_case = query.get('ignore_case', '0') in ('1', 'true')
+        locations = self._controller.find_locations_by_attribute(attribute, query[attribute], ignore_case)
+        results = []
+        for is_ev, space_id in locations:
+            vehicle = self._controller.get_vehicle(space_id, is_ev)
+            if vehicle is not None:
+                results.append({'is_ev': is_ev, 'space_id': space_id, 'registration': vehicle.registration,
+                                'make': vehicle.make, 'model': vehicle.model, 'color': vehicle.color})
+        return 200, {'results': results}
+
+    def _plates(self, query: Dict[str, str]) -> Tuple[int, Any]:
+        try:
+            limit = int(query.get('limit', 100))
+            distance = int(query.get('distance', 1))
+        except ValueError:
+            raise HttpError(400, "limit and distance must be numbers")
+        if not 0 < limit <= 1000 or not 0 <= distance <= 3:
+            raise HttpError(400, "limit must be 1-1000 and distance 0-3")
+        if 'prefix' in query:
+            matches = [(registration, None, location) for registration, location
+                       in self._controller.find_registrations_by_prefix(query['prefix'], limit)]
+        elif 'pattern' in query:
+            matches = [(registration, None, location) for registration, location
+                       in self._controller.find_registrations_matching(query['pattern'], limit)]
+        elif 'similar' in query:
+            matches = self._controller.find_similar_registrations(query['similar'], distance, limit)
+        else:
+            raise HttpError(400, "Search by one of prefix, pattern or similar")
+        results = []
+        for registration, edits, (is_ev, space_id) in matches:
+            result = {'registration': registration, 'is_ev': is_ev, 'space_id': space_id}
+            if edits is not None:
+                result['distance'] = edits
+            results.append(result)
+        return 200, {'results': results}
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve HTTP/1.1 requests on one keep-alive connection"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                # Without a usable length the body can't be skipped, so the connection closes after the reply
+                framing_lost = True
+
+                try:
+                    try:
+                        length = int(headers.get('content-length', 0) or 0)
+                    except ValueError:
+                        length = -1
+                    if length < 0:
+                        raise HttpError(400, "Invalid Content-Length")
+                    if length > MAX_BODY:
+                        raise HttpError(413, "Request body too large")
+                    framing_lost = False
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload = await self.handle(method, target, body)
+                except HttpError as error:
+                    status, payload = error.status, {'error': str(error)}
+                except Exception as error:
+                    status, payload = 500, {'error': str(error)}
+
+                data = json.dumps(payload).encode()
+                head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                        f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n")
+                if status == 503:
+                    head += "Retry-After: 1\r\n"
+                keep_alive = keep_alive and not framing_lost
+                if not keep_alive:
+                    head += "Connection: close\r\n"
+                writer.write(head.encode() + b"\r\n" + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+async def serve(controller: ParkingLotController, host: str, port: int, window: float,
+                max_queue: int, commit: Optional[Callable[[], None]] = None) -> None:
+    batcher = WriteBatcher(controller, window=window, max_queue=max_queue, commit=commit)
+    batcher.start()
+    service = ParkingService(controller, batcher)
+    server = await asyncio.start_server(service.serve_connection, host, port, backlog=1024)
+    print(f"EasyPark service listening on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.stop()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--regular', type=int, default=1000)
+    parser.add_argument('--ev', type=int, default=200)
+    parser.add_argument('--level', type=int, default=1)
+    storage = parser.add_mutually_exclusive_group()
+    storage.add_argument('--journal', help="journal directory; state is recovered from it on start")
+    storage.add_argument('--database', help="SQLite file shared with other kiosks; this level is restored from it")
+    parser.add_argument('--window', type=float, default=0.002, help="write batching window in seconds")
+    parser.add_argument('--max-queue', type=int, default=4096, help="pending writes before returning 503")
+    args = parser.parse_args()
+
+    journal = backend = commit = None
+    if args.journal:
+        from storage.journal import ParkingJournal
+        journal = ParkingJournal(args.journal)
+        controller = journal.recover()
+        commit = journal.commit
+    else:
+        controller = ParkingLotController()
+    if not controller.capacity(False) and not controller.capacity(True):
+        controller.initialize_lot(args.regular, args.ev, args.level)
+    if args.database:
+        from storage.backends import SQLiteBackend
+        # Restores the level if the database has it, otherwise stores the new lot
+        backend = SQLiteBackend(args.database)
+        backend.attach(controller, args.level)
+        commit = backend.commit
+
+    try:
+        asyncio.run(serve(controller, args.host, args.port, args.window, args.max_queue, commit))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if journal is not None:
+            journal.close()
+        if backend is not None:
+            backend.close()
+
+if __name__ == "__main__":
+    main()
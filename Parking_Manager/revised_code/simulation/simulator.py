@@ -0,0 +1,316 @@
+"""Discrete-event parking simulator for capacity planning.
+
+Replays an arrival process against a real ParkingLotController in
+simulated time and reports rejection rate, time-to-full and what the
+allocator cost per park. Sweeps run one scenario per process.
+
+Usage: python simulation/simulator.py [--regular N ...] [--ev N ...] [--rate PER_HOUR ...]
+                                      [--ev-mix FRACTION ...] [--mean-dwell MINUTES ...]
+                                      [--dwell exponential|lognormal] [--trace FILE]
+                                      [--hours H] [--seed N] [--workers N] [--json]
+Every option that takes several values adds a sweep dimension.
+"""
+import argparse
+import csv
+import heapq
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+from abc import ABC, abstractmethod
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.parking_controller import ParkingLotController
+from models.vehicle import VehicleInfo
+
+Arrival = Tuple[float, Optional[float], Optional[bool]]  # time, dwell if known, is_ev if known
+
+# -- Arrival processes ------------------------------------------------------
+
+class ArrivalProcess(ABC):
+    """Source of arrival times in seconds, ascending"""
+
+    @abstractmethod
+    def arrivals(self, rng: random.Random, duration: float) -> Iterator[Arrival]:
+        pass
+
+class PoissonArrivals(ArrivalProcess):
+    """Poisson arrivals, optionally with a different rate for each hour of the day"""
+
+    def __init__(self, rate_per_hour: float, hourly_profile: Optional[Sequence[float]] = None):
+        if hourly_profile is not None and len(hourly_profile) != 24:
+            raise ValueError("hourly_profile needs 24 multipliers")
+        self.rate_per_hour = rate_per_hour
+        self.hourly_profile = list(hourly_profile) if hourly_profile else None
+
+    def arrivals(self, rng: random.Random, duration: float) -> Iterator[Arrival]:
+        # Thinning: draw at the peak rate and keep each arrival in proportion
+        # to the rate of the hour it lands in
+        peak = max(self.hourly_profile) if self.hourly_profile else 1.0
+        peak_rate = self.rate_per_hour * peak / 3600
+        if peak_rate <= 0:
+            return
+        now = 0.0
+        while True:
+            now += rng.expovariate(peak_rate)
+            if now >= duration:
+                return
+            if self.hourly_profile:
+                hour = int(now // 3600) % 24
+                if rng.random() * peak > self.hourly_profile[hour]:
+                    continue
+            yield now, None, None
+
+class TraceArrivals(ArrivalProcess):
+    """Arrivals replayed from a CSV file of arrival[,dwell[,is_ev]] rows in seconds
+
+    Lines starting with # and a header row are skipped. Missing dwell or
+    is_ev values are drawn from the scenario instead. The file is read a
+    row at a time, so it must be sorted by arrival time.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def arrivals(self, rng: random.Random, duration: float) -> Iterator[Arrival]:
+        previous = float('-inf')
+        with open(self.path, newline='') as trace:
+            for row in csv.reader(line for line in trace if not line.startswith('#')):
+                if not row:
+                    continue
+                try:
+                    arrival = float(row[0])
+                except ValueError:
+                    continue  # header
+                if arrival < previous:
+                    raise ValueError(f"{self.path}: arrival {arrival} comes after {previous}; "
+                                     "sort the trace by arrival time")
+                if arrival >= duration:
+                    return
+                previous = arrival
+                dwell = float(row[1]) if len(row) > 1 and row[1].strip() else None
+                is_ev = row[2].strip().lower() in ('1', 'true', 'ev') if len(row) > 2 and row[2].strip() else None
+                yield arrival, dwell, is_ev
+
+# -- Dwell time distributions ----------------------------------------------
+
+class DwellDistribution(ABC):
+    """How long a vehicle stays, in seconds"""
+
+    @abstractmethod
+    def sample(self, rng: random.Random) -> float:
+        pass
+
+class ExponentialDwell(DwellDistribution):
+    def __init__(self, mean: float):
+        self.mean = mean
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.expovariate(1 / self.mean)
+
+class LogNormalDwell(DwellDistribution):
+    """Right-skewed stays: most short, a long tail of all-day parkers"""
+
+    def __init__(self, median: float, sigma: float = 0.8):
+        self.median = median
+        self.sigma = sigma
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.lognormvariate(math.log(self.median), self.sigma)
+
+class EmpiricalDwell(DwellDistribution):
+    """Resample dwell times observed elsewhere, e.g. from a SessionLog"""
+
+    def __init__(self, samples: Sequence[float]):
+        if not samples:
+            raise ValueError("need at least one sample")
+        self.samples = list(samples)
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.choice(self.samples)
+
+# -- Scenarios and results ----------------------------------------------------
+
+@dataclass
+class Scenario:
+    """One simulated site and demand pattern; must pickle so it can run in a worker"""
+    regular_capacity: int
+    ev_capacity: int
+    arrivals: ArrivalProcess
+    dwell: DwellDistribution
+    ev_mix: float = 0.1
+    motorcycle_mix: float = 0.05
+    duration: float = 24 * 3600.0
+    seed: int = 0
+    label: str = ''
+
+@dataclass
+class SimulationResult:
+    label: str
+    arrivals: int = 0
+    parked: int = 0
+    rejected: int = 0
+    rejected_ev: int = 0
+    peak_occupancy: int = 0
+    time_to_full: Dict[str, Optional[float]] = field(default_factory=lambda: {'regular': None, 'ev': None})
+    allocator_ns_mean: float = 0.0
+    allocator_ns_p99: float = 0.0
+    wall_seconds: float = 0.0
+
+    @property
+    def rejection_rate(self) -> float:
+        return self.rejected / self.arrivals if self.arrivals else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), 'rejection_rate': self.rejection_rate}
+
+# -- Engine -------------------------------------------------------------------
+
+ARRIVE, DEPART = 0, 1
+
+class Simulator:
+    """Heap-ordered event loop driving a ParkingLotController in simulated time
+
+    now is the simulated clock; hand `lambda: simulator.now` to listeners
+    such as SessionRecorder or ChargingScheduler to record simulated time.
+    """
+
+    def __init__(self, scenario: Scenario, controller: Optional[ParkingLotController] = None):
+        self.scenario = scenario
+        self.controller = controller or ParkingLotController()
+        self.controller.initialize_lot(scenario.regular_capacity, scenario.ev_capacity, 1)
+        self.now = 0.0
+        self._rng = random.Random(scenario.seed)
+        self._events: List[Tuple[float, int, int, Any]] = []
+        self._order = itertools.count()
+
+    def _schedule(self, when: float, kind: int, payload: Any) -> None:
+        heapq.heappush(self._events, (when, next(self._order), kind, payload))
+
+    def run(self) -> SimulationResult:
+        scenario, controller, rng = self.scenario, self.controller, self._rng
+        result = SimulationResult(label=scenario.label)
+        costs = array('q')
+        arrivals = scenario.arrivals.arrivals(rng, scenario.duration)
+        # Only the next arrival sits in the queue, so traces of any length stream through
+        first = next(arrivals, None)
+        if first is not None:
+            self._schedule(first[0], ARRIVE, first)
+        occupied = 0
+        started = time.perf_counter()
+
+        while self._events:
+            self.now, _, kind, payload = heapq.heappop(self._events)
+            if kind == DEPART:
+                is_ev, space_id = payload
+                if controller.remove_vehicle(space_id, is_ev):
+                    occupied -= 1
+                continue
+
+            _, dwell, is_ev = payload
+            upcoming = next(arrivals, None)
+            if upcoming is not None:
+                self._schedule(upcoming[0], ARRIVE, upcoming)
+            if is_ev is None:
+                is_ev = rng.random() < scenario.ev_mix
+            if dwell is None:
+                dwell = scenario.dwell.sample(rng)
+            result.arrivals += 1
+            info = VehicleInfo(f"SIM{result.arrivals:08d}", "Sim", "Car", "Grey")
+            is_motorcycle = rng.random() < scenario.motorcycle_mix
+
+            start = time.perf_counter_ns()
+            space_id = controller.park_vehicle(info, is_ev, is_motorcycle)
+            costs.append(time.perf_counter_ns() - start)
+
+            if space_id is None:
+                result.rejected += 1
+                result.rejected_ev += is_ev
+                continue
+            result.parked += 1
+            occupied += 1
+            result.peak_occupancy = max(result.peak_occupancy, occupied)
+            key = 'ev' if is_ev else 'regular'
+            if result.time_to_full[key] is None and controller.free_space_count(is_ev) == 0:
+                result.time_to_full[key] = self.now
+            self._schedule(self.now + dwell, DEPART, (is_ev, space_id))
+
+        result.wall_seconds = time.perf_counter() - started
+        if costs:
+            ordered = sorted(costs)
+            result.allocator_ns_mean = sum(ordered) / len(ordered)
+            result.allocator_ns_p99 = float(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))])
+        return result
+
+def run_scenario(scenario: Scenario) -> SimulationResult:
+    return Simulator(scenario).run()
+
+def sweep(scenarios: Sequence[Scenario], workers: Optional[int] = None) -> List[SimulationResult]:
+    """Run scenarios in parallel, one per process, and return results in the same order"""
+    if workers == 1 or len(scenarios) <= 1:
+        return [run_scenario(scenario) for scenario in scenarios]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_scenario, scenarios))
+
+# -- Command line -----------------------------------------------------------
+
+def build_scenarios(args: argparse.Namespace) -> List[Scenario]:
+    scenarios = []
+    for regular, ev, rate, ev_mix, dwell_minutes in itertools.product(
+            args.regular, args.ev, args.rate, args.ev_mix, args.mean_dwell):
+        if args.dwell == 'lognormal':
+            dwell = LogNormalDwell(dwell_minutes * 60)
+        else:
+            dwell = ExponentialDwell(dwell_minutes * 60)
+        arrivals = TraceArrivals(args.trace) if args.trace else PoissonArrivals(rate)
+        label = (f"regular={regular} ev={ev} "
+                 + ("trace " if args.trace else f"rate={rate:g}/h ")
+                 + f"ev_mix={ev_mix:g} dwell={dwell_minutes:g}m")
+        scenarios.append(Scenario(regular, ev, arrivals, dwell, ev_mix=ev_mix,
+                                  duration=args.hours * 3600, seed=args.seed, label=label))
+    return scenarios
+
+def format_time(seconds: Optional[float]) -> str:
+    return '-' if seconds is None else f"{seconds / 3600:.2f}h"
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--regular', type=int, nargs='+', default=[500])
+    parser.add_argument('--ev', type=int, nargs='+', default=[50])
+    parser.add_argument('--rate', type=float, nargs='+', default=[120.0], help="Poisson arrivals per hour")
+    parser.add_argument('--ev-mix', type=float, nargs='+', default=[0.1], help="fraction of arrivals that are EVs")
+    parser.add_argument('--mean-dwell', type=float, nargs='+', default=[180.0], help="minutes")
+    parser.add_argument('--dwell', choices=('exponential', 'lognormal'), default='exponential')
+    parser.add_argument('--trace', help="CSV of arrival[,dwell[,is_ev]] seconds, sorted by arrival, instead of Poisson arrivals")
+    parser.add_argument('--hours', type=float, default=24.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, help="processes for the sweep (default: every core)")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    scenarios = build_scenarios(args)
+    started = time.perf_counter()
+    results = sweep(scenarios, args.workers)
+    elapsed = time.perf_counter() - started
+
+    if args.json:
+        json.dump([result.as_dict() for result in results], sys.stdout, indent=2)
+        print()
+        return
+    for result in results:
+        print(f"{result.label:<58} arrivals {result.arrivals:>8,}  rejected {result.rejection_rate:6.1%}  "
+              f"full regular {format_time(result.time_to_full['regular']):>7} ev {format_time(result.time_to_full['ev']):>7}  "
+              f"alloc {result.allocator_ns_mean / 1000:5.1f}us mean {result.allocator_ns_p99 / 1000:6.1f}us p99")
+    print(f"{len(results)} scenario(s) in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,509 @@
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+from controllers.events import ParkingEventListener
+from controllers.parking_controller import ParkingLotController
+from models.vehicle import VEHICLE_TYPE_CODES, VEHICLE_TYPES, Vehicle, VehicleInfo
+
+VehicleRow = Tuple[int, str, str, str, str, int]  # vehicle type, registration, make, model, color, charge
+Location = Tuple[int, bool, int]                  # level, is_ev, space_id
+
+def vehicle_row(vehicle: Vehicle) -> VehicleRow:
+    return (VEHICLE_TYPE_CODES[type(vehicle)], vehicle.registration, vehicle.make, vehicle.model,
+            vehicle.color, getattr(vehicle, 'charge_level', 0))
+
+def row_vehicle(row: VehicleRow) -> Vehicle:
+    code, registration, make, model, color, charge = row
+    vehicle = VEHICLE_TYPES[code](VehicleInfo(registration, make, model, color))
+    if vehicle.is_electric:
+        vehicle.charge_level = charge
+    return vehicle
+
+@dataclass
+class LotState:
+    """Everything needed to rebuild one controller"""
+    level: int
+    regular_max: int
+    ev_max: int
+    vehicles: Dict[Tuple[bool, int], VehicleRow] = field(default_factory=dict)
+    retired: Dict[bool, Set[int]] = field(default_factory=lambda: {False: set(), True: set()})
+    conversions: Dict[int, int] = field(default_factory=dict)  # draining regular space_id -> EV space_id
+
+    @classmethod
+    def capture(cls, controller: ParkingLotController) -> 'LotState':
+        """Read a controller's state; hold controller.locked() for a consistent copy"""
+        state = cls(controller.level, controller.max_space_id(False), controller.max_space_id(True))
+        for is_ev in (False, True):
+            for space_id, vehicle in controller.iter_occupied(is_ev):
+                state.vehicles[(is_ev, space_id)] = vehicle_row(vehicle)
+            state.retired[is_ev] = set(controller.retired_spaces(is_ev))
+        state.conversions = controller.pending_conversions()
+        return state
+
+    def restore(self, controller: ParkingLotController) -> None:
+        """Rebuild the controller from this state, in the same order as a journal snapshot"""
+        controller.initialize_lot(self.regular_max, self.ev_max, self.level)
+        for (is_ev, space_id), row in sorted(self.vehicles.items()):
+            controller.place_vehicle(row_vehicle(row), is_ev, space_id)
+        # Conversion sources are retired by convert_space itself
+        controller.retire_spaces(sorted(self.retired[False] - self.conversions.keys()), False)
+        controller.retire_spaces(sorted(self.retired[True]), True)
+        for space_id, ev_space_id in sorted(self.conversions.items()):
+            controller.convert_space(space_id, ev_space_id)
+
+class StorageBackend(ParkingEventListener, ABC):
+    """Durable home for one controller's state, kept current from its events
+
+    attach() restores the controller from the backend, or seeds an empty
+    backend from the controller, and then subscribes to its events.
+    Implementations may batch writes, save_state() included; commit() makes
+    everything received so far durable.
+    """
+
+    def __init__(self):
+        self._controller: Optional[ParkingLotController] = None
+
+    def attach(self, controller: Optional[ParkingLotController] = None,
+               level: Optional[int] = None) -> ParkingLotController:
+        """Restore or seed level (default: the controller's) and start mirroring the controller"""
+        controller = controller or ParkingLotController()
+        state = self.load_state(controller.level if level is None else level)
+        if state is not None:
+            state.restore(controller)
+        with controller.locked():
+            if state is None:
+                state = LotState.capture(controller)
+                self.save_state(state)
+            self._attached(state)
+            controller.add_listener(self)
+        self._controller = controller
+        self.commit()
+        return controller
+
+    def detach(self) -> None:
+        if self._controller is not None:
+            self._controller.remove_listener(self)
+            self._controller = None
+        self.commit()
+
+    @abstractmethod
+    def load_state(self, level: int) -> Optional[LotState]:
+        """Stored state of one level, or None if there is none"""
+        pass
+
+    @abstractmethod
+    def save_state(self, state: LotState) -> None:
+        """Replace whatever is stored for state.level"""
+        pass
+
+    @abstractmethod
+    def _attached(self, state: LotState) -> None:
+        """Start tracking the level the controller now holds"""
+        pass
+
+    @abstractmethod
+    def commit(self) -> None:
+        pass
+
+    @abstractmethod
+    def find_location(self, registration: str) -> Optional[Location]:
+        pass
+
+    @abstractmethod
+    def find_by_color(self, color: str) -> List[Location]:
+        pass
+
+    @abstractmethod
+    def occupancy(self) -> Dict[int, int]:
+        """Parked vehicles per level"""
+        pass
+
+    def close(self) -> None:
+        self.detach()
+
+class InMemoryBackend(StorageBackend):
+    """Keeps LotState objects in memory; a baseline and a hand-off between controllers
+
+    Several controllers (one per level) can share one instance. Lookups scan
+    the stored vehicles.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._states: Dict[int, LotState] = {}
+        self._level: Optional[int] = None
+
+    def load_state(self, level: int) -> Optional[LotState]:
+        with self._lock:
+            state = self._states.get(level)
+            if state is None:
+                return None
+            return LotState(state.level, state.regular_max, state.ev_max, dict(state.vehicles),
+                            {is_ev: set(ids) for is_ev, ids in state.retired.items()}, dict(state.conversions))
+
+    def save_state(self, state: LotState) -> None:
+        with self._lock:
+            self._states[state.level] = state
+
+    def _attached(self, state: LotState) -> None:
+        with self._lock:
+            self._level = state.level
+
+    def commit(self) -> None:
+        pass
+
+    @property
+    def _state(self) -> LotState:
+        return self._states[self._level]
+
+    def on_lot_initialized(self, regular_capacity: int, ev_capacity: int, level: int) -> None:
+        with self._lock:
+            self._states.pop(self._level, None)
+            self._states[level] = LotState(level, regular_capacity, ev_capacity)
+            self._level = level
+
+    def on_park(self, is_ev: bool, space_id: int, vehicle: Vehicle) -> None:
+        with self._lock:
+            self._state.vehicles[(is_ev, space_id)] = vehicle_row(vehicle)
+
+    def on_remove(self, is_ev: bool, space_id: int, vehicle: Vehicle) -> None:
+        with self._lock:
+            state = self._state
+            state.vehicles.pop((is_ev, space_id), None)
+            ev_space_id = state.conversions.pop(space_id, None) if not is_ev else None
+            if ev_space_id is not None:
+                state.retired[True].discard(ev_space_id)
+
+    def on_charge(self, space_id: int, vehicle: Vehicle) -> None:
+        with self._lock:
+            self._state.vehicles[(True, space_id)] = vehicle_row(vehicle)
+
+    def on_spaces_added(self, is_ev: bool, space_ids: range) -> None:
+        with self._lock:
+            state = self._state
+            if is_ev:
+                state.ev_max = max(state.ev_max, space_ids.stop - 1)
+            else:
+                state.regular_max = max(state.regular_max, space_ids.stop - 1)
+
+    def on_spaces_retired(self, is_ev: bool, space_ids: List[int]) -> None:
+        with self._lock:
+            self._state.retired[is_ev].update(space_ids)
+
+    def on_space_converted(self, space_id: int, ev_space_id: int) -> None:
+        with self._lock:
+            state = self._state
+            state.ev_max = max(state.ev_max, ev_space_id)
+            state.retired[False].add(space_id)
+            if (False, space_id) in state.vehicles:
+                state.retired[True].add(ev_space_id)
+                state.conversions[space_id] = ev_space_id
+            else:
+                state.retired[True].discard(ev_space_id)
+
+    def find_location(self, registration: str) -> Optional[Location]:
+        with self._lock:
+            for level, state in self._states.items():
+                for (is_ev, space_id), row in state.vehicles.items():
+                    if row[1] == registration:
+                        return level, is_ev, space_id
+            return None
+
+    def find_by_color(self, color: str) -> List[Location]:
+        with self._lock:
+            return sorted((level, is_ev, space_id) for level, state in self._states.items()
+                          for (is_ev, space_id), row in state.vehicles.items() if row[4] == color)
+
+    def occupancy(self) -> Dict[int, int]:
+        with self._lock:
+            return {level: len(state.vehicles) for level, state in self._states.items()}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lots (
+    level INTEGER PRIMARY KEY,
+    regular_max INTEGER NOT NULL,
+    ev_max INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS vehicles (
+    level INTEGER NOT NULL,
+    is_ev INTEGER NOT NULL,
+    space_id INTEGER NOT NULL,
+    vehicle_type INTEGER NOT NULL,
+    registration TEXT NOT NULL,
+    make TEXT NOT NULL,
+    model TEXT NOT NULL,
+    color TEXT NOT NULL,
+    charge INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (level, is_ev, space_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS vehicles_registration ON vehicles (registration);
+CREATE INDEX IF NOT EXISTS vehicles_color ON vehicles (color, level);
+CREATE TABLE IF NOT EXISTS retired (
+    level INTEGER NOT NULL,
+    is_ev INTEGER NOT NULL,
+    space_id INTEGER NOT NULL,
+    PRIMARY KEY (level, is_ev, space_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS conversions (
+    level INTEGER NOT NULL,
+    space_id INTEGER NOT NULL,
+    ev_space_id INTEGER NOT NULL,
+    PRIMARY KEY (level, space_id)
+) WITHOUT ROWID;
+"""
+
+# Statements are fixed strings so the connection's statement cache prepares each once
+_PARK_SQL = ("INSERT OR REPLACE INTO vehicles (level, is_ev, space_id, vehicle_type, registration, "
+             "make, model, color, charge) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+_REMOVE_SQL = "DELETE FROM vehicles WHERE level = ? AND is_ev = ? AND space_id = ?"
+_CHARGE_SQL = "UPDATE vehicles SET charge = ? WHERE level = ? AND is_ev = 1 AND space_id = ?"
+_LOT_SQL = "INSERT OR REPLACE INTO lots (level, regular_max, ev_max) VALUES (?, ?, ?)"
+_GROW_REGULAR_SQL = "UPDATE lots SET regular_max = max(regular_max, ?) WHERE level = ?"
+_GROW_EV_SQL = "UPDATE lots SET ev_max = max(ev_max, ?) WHERE level = ?"
+_RETIRE_SQL = "INSERT OR IGNORE INTO retired (level, is_ev, space_id) VALUES (?, ?, ?)"
+_UNRETIRE_SQL = "DELETE FROM retired WHERE level = ? AND is_ev = ? AND space_id = ?"
+_CONVERT_SQL = "INSERT OR REPLACE INTO conversions (level, space_id, ev_space_id) VALUES (?, ?, ?)"
+_CONVERTED_SQL = "DELETE FROM conversions WHERE level = ? AND space_id = ?"
+_CLEAR_SQL = tuple(f"DELETE FROM {table} WHERE level = ?" for table in ('lots', 'vehicles', 'retired', 'conversions'))
+
+class SQLiteBackend(StorageBackend):
+    """Keeps controller state in a SQLite database that several processes can share
+
+    The database runs in WAL mode, so readers in other processes never block
+    the writer. Events are queued and written in one transaction per batch
+    of batch_size statements, or after at most flush_interval seconds;
+    consecutive statements of the same kind go through one executemany.
+    A background thread commits the queue, so neither the gates nor the
+    controller locks they hold ever wait on the database; commit() flushes
+    from the caller's thread. Rows are keyed by level, so each process can own one level of a
+    facility in the same file while any process can answer lookups from
+    the registration and color indexes.
+
+    synchronous='NORMAL' makes a commit durable against process crashes
+    and, in WAL mode, keeps the database consistent after power loss, at
+    the cost of the last transactions; 'FULL' syncs every commit.
+    """
+
+    def __init__(self, path: str, batch_size: int = 512, flush_interval: float = 0.05,
+                 synchronous: str = 'NORMAL', busy_timeout: float = 30.0):
+        super().__init__()
+        if synchronous not in ('OFF', 'NORMAL', 'FULL'):
+            raise ValueError("synchronous must be OFF, NORMAL or FULL")
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        # _lock guards the queue and listener state and is only held briefly;
+        # _db_lock serializes use of the connection and is taken first
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._queue: List[Tuple[str, tuple]] = []
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._flush_thread: Optional[threading.Thread] = None
+        self._level = 0
+        self._conversions: Dict[int, int] = {}
+        self._committed_rows = 0
+        # Autocommit mode: transactions are opened explicitly around each batch
+        self._db = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None,
+                                   check_same_thread=False, cached_statements=64)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"PRAGMA synchronous={synchronous}")
+        self._db.execute("PRAGMA temp_store=MEMORY")
+        self._db.executescript(_SCHEMA)
+
+    def _transaction(self, work) -> None:
+        # IMMEDIATE takes the write lock up front, so a busy database waits
+        # in busy_timeout instead of failing halfway through the batch
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            work()
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    # -- Whole-lot state ----------------------------------------------------
+
+    def load_state(self, level: int) -> Optional[LotState]:
+        with self._db_lock:
+            self._flush_locked()
+            db = self._db
+            lot = db.execute("SELECT regular_max, ev_max FROM lots WHERE level = ?", (level,)).fetchone()
+            if lot is None:
+                return None
+            state = LotState(level, *lot)
+            for is_ev, space_id, *row in db.execute(
+                    "SELECT is_ev, space_id, vehicle_type, registration, make, model, color, charge "
+                    "FROM vehicles WHERE level = ?", (level,)):
+                state.vehicles[(bool(is_ev), space_id)] = tuple(row)
+            for is_ev, space_id in db.execute("SELECT is_ev, space_id FROM retired WHERE level = ?", (level,)):
+                state.retired[bool(is_ev)].add(space_id)
+            state.conversions = dict(db.execute(
+                "SELECT space_id, ev_space_id FROM conversions WHERE level = ?", (level,)))
+            return state
+
+    def save_state(self, state: LotState) -> None:
+        """Queue a replacement of state.level behind any pending events; commit() writes it"""
+        level = state.level
+        with self._lock:
+            queue = self._queue
+            queue.extend((sql, (level,)) for sql in _CLEAR_SQL)
+            queue.append((_LOT_SQL, (level, state.regular_max, state.ev_max)))
+            queue.extend((_PARK_SQL, (level, is_ev, space_id, *row))
+                         for (is_ev, space_id), row in state.vehicles.items())
+            queue.extend((_RETIRE_SQL, (level, is_ev, space_id))
+                         for is_ev, ids in state.retired.items() for space_id in ids)
+            queue.extend((_CONVERT_SQL, (level, space_id, ev_space_id))
+                         for space_id, ev_space_id in state.conversions.items())
+
+    def _attached(self, state: LotState) -> None:
+        with self._lock:
+            self._level = state.level
+            self._conversions = dict(state.conversions)
+        if self._flush_thread is None:
+            self._stopping.clear()
+            self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flush_thread.start()
+
+    # -- Listener callbacks ------------------------------------------------
+
+    def on_lot_initialized(self, regular_capacity: int, ev_capacity: int, level: int) -> None:
+        with self._lock:
+            for old_level in {self._level, level}:
+                for sql in _CLEAR_SQL:
+                    self._queue.append((sql, (old_level,)))
+            self._queue.append((_LOT_SQL, (level, regular_capacity, ev_capacity)))
+            self._level = level
+            self._conversions = {}
+            self._queued()
+
+    def on_park(self, is_ev: bool, space_id: int, vehicle: Vehicle) -> None:
+        with self._lock:
+            self._queue.append((_PARK_SQL, (self._level, is_ev, space_id, *vehicle_row(vehicle))))
+            self._queued()
+
+    def on_remove(self, is_ev: bool, space_id: int, vehicle: Vehicle) -> None:
+        with self._lock:
+            self._queue.append((_REMOVE_SQL, (self._level, is_ev, space_id)))
+            ev_space_id = self._conversions.pop(space_id, None) if not is_ev else None
+            if ev_space_id is not None:
+                self._queue.append((_UNRETIRE_SQL, (self._level, True, ev_space_id)))
+                self._queue.append((_CONVERTED_SQL, (self._level, space_id)))
+            self._queued()
+
+    def on_charge(self, space_id: int, vehicle: Vehicle) -> None:
+        with self._lock:
+            self._queue.append((_CHARGE_SQL, (vehicle.charge_level, self._level, space_id)))
+            self._queued()
+
+    def on_spaces_added(self, is_ev: bool, space_ids: range) -> None:
+        with self._lock:
+            self._queue.append((_GROW_EV_SQL if is_ev else _GROW_REGULAR_SQL, (space_ids.stop - 1, self._level)))
+            self._queued()
+
+    def on_spaces_retired(self, is_ev: bool, space_ids: List[int]) -> None:
+        with self._lock:
+            self._queue.extend((_RETIRE_SQL, (self._level, is_ev, space_id)) for space_id in space_ids)
+            self._queued()
+
+    def on_space_converted(self, space_id: int, ev_space_id: int) -> None:
+        # Listeners may read the controller's lock-free state; a pending
+        # conversion means the regular space was still occupied
+        pending = self._controller is not None and space_id in self._controller.pending_conversions()
+        with self._lock:
+            level = self._level
+            self._queue.append((_GROW_EV_SQL, (ev_space_id, level)))
+            self._queue.append((_RETIRE_SQL, (level, False, space_id)))
+            if pending:
+                self._conversions[space_id] = ev_space_id
+                self._queue.append((_RETIRE_SQL, (level, True, ev_space_id)))
+                self._queue.append((_CONVERT_SQL, (level, space_id, ev_space_id)))
+            else:
+                self._queue.append((_UNRETIRE_SQL, (level, True, ev_space_id)))
+            self._queued()
+
+    # -- Batching -------------------------------------------------------------
+
+    def _queued(self) -> None:
+        # Called with _lock held, often under a controller lock too: hand
+        # full batches to the flush thread rather than writing here
+        if len(self._queue) >= self._batch_size:
+            self._wake.set()
+
+    def _flush_loop(self) -> None:
+        """Commit the queue whenever a batch fills up, and at least every flush_interval"""
+        while not self._stopping.is_set():
+            self._wake.wait(self._flush_interval)
+            self._wake.clear()
+            try:
+                with self._db_lock:
+                    self._flush_locked()
+            except sqlite3.Error:
+                # The batch went back on the queue; retry it next round,
+                # and commit() will raise if the database stays unusable
+                continue
+
+    def _flush_locked(self) -> None:
+        """Commit everything queued so far; the caller holds _db_lock"""
+        with self._lock:
+            queue, self._queue = self._queue, []
+        if not queue:
+            return
+
+        def write():
+            executemany = self._db.executemany
+            start = 0
+            # Runs of the same statement keep their order and share one executemany
+            for i in range(1, len(queue) + 1):
+                if i == len(queue) or queue[i][0] is not queue[start][0]:
+                    executemany(queue[start][0], [params for _, params in queue[start:i]])
+                    start = i
+
+        try:
+            self._transaction(write)
+        except BaseException:
+            with self._lock:
+                self._queue[:0] = queue
+            raise
+        self._committed_rows += len(queue)
+
+    def commit(self) -> None:
+        with self._db_lock:
+            self._flush_locked()
+
+    @property
+    def committed_rows(self) -> int:
+        """Row writes committed so far, by the flush thread or commit()"""
+        return self._committed_rows
+
+    def close(self) -> None:
+        super().close()
+        self._stopping.set()
+        self._wake.set()
+        if self._flush_thread is not None:
+            self._flush_thread.join()
+            self._flush_thread = None
+        with self._db_lock:
+            self._flush_locked()
+            self._db.close()
+
+    # -- Queries --------------------------------------------------------------
+
+    def find_location(self, registration: str) -> Optional[Location]:
+        """Where a vehicle is parked, as committed by any process sharing the database"""
+        with self._db_lock:
+            row = self._db.execute("SELECT level, is_ev, space_id FROM vehicles WHERE registration = ? "
+                                   "ORDER BY level, is_ev, space_id LIMIT 1", (registration,)).fetchone()
+        return (row[0], bool(row[1]), row[2]) if row else None
+
+    def find_by_color(self, color: str) -> List[Location]:
+        with self._db_lock:
+            rows = self._db.execute("SELECT level, is_ev, space_id FROM vehicles WHERE color = ? "
+                                    "ORDER BY level, is_ev, space_id", (color,)).fetchall()
+        return [(level, bool(is_ev), space_id) for level, is_ev, space_id in rows]
+
+    def occupancy(self) -> Dict[int, int]:
+        with self._db_lock:
+            return dict(self._db.execute("SELECT level, count(*) FROM vehicles GROUP BY level"))
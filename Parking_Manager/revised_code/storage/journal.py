@@ -0,0 +1,434 @@
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+from controllers.events import ParkingEventListener
+from controllers.parking_controller import ParkingLotController
+from models.vehicle import VEHICLE_TYPE_CODES, VEHICLE_TYPES, Vehicle, VehicleInfo
+
+FSYNC_POLICIES = ('always', 'interval', 'never')
+
+OP_INIT, OP_PARK, OP_REMOVE, OP_CHARGE = 1, 2, 3, 4
+OP_ADD_SPACES, OP_RETIRE_SPACES, OP_CONVERT_SPACE = 5, 6, 7
+
+_RECORD_HEADER = struct.Struct('<HI')  # payload length, crc32 of payload
+_INIT = struct.Struct('<BIIi')         # op, regular capacity, ev capacity, level
+_PARK = struct.Struct('<B?IBB')        # op, is_ev, space_id, vehicle type, charge; then text fields
+_TEXT_LENGTH = struct.Struct('<H')     # byte length of each text field, before its UTF-8 bytes
+_REMOVE = struct.Struct('<B?I')        # op, is_ev, space_id
+_CHARGE = struct.Struct('<BIB')        # op, space_id, charge
+_ADD_SPACES = struct.Struct('<B?I')    # op, is_ev, count
+_RETIRE = struct.Struct('<B?')         # op, is_ev; then uint32 space IDs
+_CONVERT = struct.Struct('<BII')       # op, regular space_id, EV space_id
+_RETIRE_BATCH = 16_000                 # space IDs per retire record, within the 16-bit length
+
+_SNAPSHOT_MAGIC = b'EPSNAP02'
+_SNAPSHOT_HEADER = struct.Struct('<8sQIIiI')  # magic, seq, regular max ID, ev max ID, level, vehicle count
+_SNAPSHOT_ENTRY = struct.Struct('<H')          # length of the park payload that follows
+_SNAPSHOT_COUNT = struct.Struct('<I')          # length of each uint32 list after the vehicles
+_CRC = struct.Struct('<I')
+
+_SEGMENT_NAME = re.compile(r'^journal-(\d{12})\.log$')
+_SNAPSHOT_NAME = re.compile(r'^snapshot-(\d{12})\.bin$')
+
+def encode_park(is_ev: bool, space_id: int, vehicle: Vehicle, charge: int) -> bytes:
+    # Length-prefixed rather than separated, since plates and the other fields are free text
+    parts = [_PARK.pack(OP_PARK, is_ev, space_id, VEHICLE_TYPE_CODES[type(vehicle)], charge)]
+    for text in (vehicle.registration, vehicle.make, vehicle.model, vehicle.color):
+        encoded = text.encode()
+        parts.append(_TEXT_LENGTH.pack(len(encoded)))
+        parts.append(encoded)
+    return b''.join(parts)
+
+def decode_park(payload: bytes) -> Tuple[bool, int, Vehicle]:
+    _, is_ev, space_id, code, charge = _PARK.unpack_from(payload)
+    fields = []
+    offset = _PARK.size
+    for _ in range(4):
+        (length,) = _TEXT_LENGTH.unpack_from(payload, offset)
+        offset += _TEXT_LENGTH.size
+        fields.append(bytes(payload[offset:offset + length]).decode())
+        offset += length
+    info = VehicleInfo(*fields)
+    vehicle = VEHICLE_TYPES[code](info)
+    if vehicle.is_electric:
+        vehicle.charge_level = charge
+    return is_ev, space_id, vehicle
+
+def _pack_ids(space_ids: List[int]) -> bytes:
+    return _SNAPSHOT_COUNT.pack(len(space_ids)) + struct.pack(f'<{len(space_ids)}I', *space_ids)
+
+def _unpack_ids(view: memoryview, offset: int) -> Tuple[List[int], int]:
+    (count,) = _SNAPSHOT_COUNT.unpack_from(view, offset)
+    offset += _SNAPSHOT_COUNT.size
+    return list(struct.unpack_from(f'<{count}I', view, offset)), offset + 4 * count
+
+class ParkingJournal(ParkingEventListener):
+    """Append-only write-ahead journal of controller events with snapshot recovery
+
+    With fsync='always' every event is written and fsynced before the
+    listener callback returns, so a park is on disk by the time
+    park_vehicle returns. Otherwise events are buffered and written in
+    groups of up to group_size records, and a background thread writes out
+    whatever a burst left behind once flush_interval passes without a
+    write; fsync then runs at most every fsync_interval seconds
+    ('interval') or is left to the OS ('never').
+
+    Every snapshot_every events a background checkpoint writes a compact
+    binary snapshot and starts a new journal segment. Recovery loads the
+    newest snapshot and replays only the segments written after it.
+    """
+
+    def __init__(self, directory: str, fsync: str = 'interval', group_size: int = 256,
+                 flush_interval: float = 0.01, fsync_interval: float = 1.0,
+                 snapshot_every: int = 100_000):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}")
+        self._directory = directory
+        self._fsync = fsync
+        self._group_size = group_size
+        self._flush_interval = flush_interval
+        self._fsync_interval = fsync_interval
+        self._snapshot_every = snapshot_every
+        self._lock = threading.Lock()
+        self._buffer = bytearray()
+        self._pending = 0
+        self._seq = 0  # sequence number of the last journaled event
+        self._since_snapshot = 0
+        self._last_flush = time.monotonic()
+        self._last_sync = self._last_flush
+        self._unsynced = False  # written since the last fsync
+        self._file = None
+        self._controller: Optional[ParkingLotController] = None
+        self._checkpoint_thread: Optional[threading.Thread] = None
+        self._flush_thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def sequence(self) -> int:
+        return self._seq
+
+    # -- Recovery ---------------------------------------------------------
+
+    def recover(self, controller: Optional[ParkingLotController] = None) -> ParkingLotController:
+        """Rebuild controller state from disk and start journaling its events"""
+        controller = controller or ParkingLotController()
+        seq = self._load_latest_snapshot(controller)
+        segments = self._segments()
+        replay = _TailReplay(controller)
+        for i, (base, path) in enumerate(segments):
+            if i + 1 < len(segments) and segments[i + 1][0] <= seq:
+                continue  # every event in this segment is already in the snapshot
+            seq = self._replay_segment(replay, path, base, seq)
+        replay.flush()
+        self._seq = seq
+        self._open_segment(seq)
+        self._controller = controller
+        controller.add_listener(self)
+        if self._fsync != 'always':
+            self._stopping.clear()
+            self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flush_thread.start()
+        return controller
+
+    def _load_latest_snapshot(self, controller: ParkingLotController) -> int:
+        for seq, path in reversed(self._snapshots()):
+            with open(path, 'rb') as snapshot:
+                data = snapshot.read()
+            if len(data) < _SNAPSHOT_HEADER.size + _CRC.size:
+                continue
+            body, (crc,) = data[:-_CRC.size], _CRC.unpack_from(data, len(data) - _CRC.size)
+            if zlib.crc32(body) != crc:
+                continue
+            magic, seq, regular, ev, level, count = _SNAPSHOT_HEADER.unpack_from(body)
+            if magic != _SNAPSHOT_MAGIC:
+                continue
+            controller.initialize_lot(regular, ev, level)
+            view = memoryview(body)
+            offset = _SNAPSHOT_HEADER.size
+            for _ in range(count):
+                (length,) = _SNAPSHOT_ENTRY.unpack_from(view, offset)
+                offset += _SNAPSHOT_ENTRY.size
+                is_ev, space_id, vehicle = decode_park(view[offset:offset + length])
+                offset += length
+                controller.place_vehicle(vehicle, is_ev, space_id)
+            retired_regular, offset = _unpack_ids(view, offset)
+            retired_ev, offset = _unpack_ids(view, offset)
+            conversions, offset = _unpack_ids(view, offset)
+            controller.retire_spaces(retired_regular, False)
+            controller.retire_spaces(retired_ev, True)
+            for space_id, ev_space_id in zip(conversions[::2], conversions[1::2]):
+                controller.convert_space(space_id, ev_space_id)
+            return seq
+        return 0
+
+    def _replay_segment(self, replay: '_TailReplay', path: str, base: int, seq: int) -> int:
+        """Apply records newer than seq; truncate a torn tail left by a crash"""
+        with open(path, 'rb') as segment:
+            data = segment.read()
+        view = memoryview(data)
+        offset = 0
+        record_seq = base
+        while offset + _RECORD_HEADER.size <= len(data):
+            length, crc = _RECORD_HEADER.unpack_from(view, offset)
+            start = offset + _RECORD_HEADER.size
+            payload = view[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            offset = start + length
+            record_seq += 1
+            if record_seq > seq:
+                replay.apply(payload)
+                seq = record_seq
+        if offset < len(data):
+            with open(path, 'r+b') as segment:
+                segment.truncate(offset)
+        return seq
+
+    # -- Listener callbacks ------------------------------------------------
+
+    def on_lot_initialized(self, regular_capacity: int, ev_capacity: int, level: int) -> None:
+        self._append(_INIT.pack(OP_INIT, regular_capacity, ev_capacity, level))
+
+    def on_park(self, is_ev: bool, space_id: int, vehicle: Vehicle) -> None:
+        self._append(encode_park(is_ev, space_id, vehicle, getattr(vehicle, 'charge_level', 0)))
+
+    def on_remove(self, is_ev: bool, space_id: int, vehicle: Vehicle) -> None:
+        self._append(_REMOVE.pack(OP_REMOVE, is_ev, space_id))
+
+    def on_charge(self, space_id: int, vehicle: Vehicle) -> None:
+        self._append(_CHARGE.pack(OP_CHARGE, space_id, vehicle.charge_level))
+
+    def on_spaces_added(self, is_ev: bool, space_ids: range) -> None:
+        self._append(_ADD_SPACES.pack(OP_ADD_SPACES, is_ev, len(space_ids)))
+
+    def on_spaces_retired(self, is_ev: bool, space_ids: List[int]) -> None:
+        for start in range(0, len(space_ids), _RETIRE_BATCH):
+            batch = space_ids[start:start + _RETIRE_BATCH]
+            self._append(_RETIRE.pack(OP_RETIRE_SPACES, is_ev) + struct.pack(f'<{len(batch)}I', *batch))
+
+    def on_space_converted(self, space_id: int, ev_space_id: int) -> None:
+        self._append(_CONVERT.pack(OP_CONVERT_SPACE, space_id, ev_space_id))
+
+    def _append(self, payload: bytes) -> None:
+        with self._lock:
+            self._buffer += _RECORD_HEADER.pack(len(payload), zlib.crc32(payload))
+            self._buffer += payload
+            self._seq += 1
+            self._pending += 1
+            self._since_snapshot += 1
+            if self._fsync == 'always':
+                self._flush_locked(sync=True)
+            elif (self._pending >= self._group_size
+                    or time.monotonic() - self._last_flush >= self._flush_interval):
+                self._flush_locked()
+            if self._snapshot_every and self._since_snapshot >= self._snapshot_every:
+                self._start_checkpoint()
+
+    # -- Group commit -------------------------------------------------------
+
+    def commit(self) -> None:
+        """Write buffered events and fsync them unless the policy is 'never'"""
+        with self._lock:
+            self._flush_locked(sync=self._fsync != 'never')
+
+    def _flush_locked(self, sync: bool = False) -> None:
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._file.flush()
+            self._buffer.clear()
+            self._pending = 0
+            self._unsynced = True
+        now = time.monotonic()
+        self._last_flush = now
+        if self._unsynced and (sync or self._fsync == 'always' or (
+                self._fsync == 'interval' and now - self._last_sync >= self._fsync_interval)):
+            os.fsync(self._file.fileno())
+            self._last_sync = now
+            self._unsynced = False
+
+    def _flush_loop(self) -> None:
+        """Write out the tail of a burst once it goes quiet, and keep 'interval' fsyncs on schedule"""
+        while not self._stopping.wait(self._flush_interval):
+            with self._lock:
+                if self._file is None:
+                    continue
+                if self._buffer and time.monotonic() - self._last_flush >= self._flush_interval:
+                    self._flush_locked()
+                elif self._unsynced and self._fsync == 'interval':
+                    self._flush_locked()
+
+    def close(self) -> None:
+        """Flush outstanding events and stop journaling"""
+        thread = self._checkpoint_thread
+        if thread is not None:
+            thread.join()
+        self._stopping.set()
+        if self._flush_thread is not None:
+            self._flush_thread.join()
+            self._flush_thread = None
+        if self._controller is not None:
+            self._controller.remove_listener(self)
+            self._controller = None
+        with self._lock:
+            if self._file is not None:
+                self._flush_locked(sync=self._fsync != 'never')
+                self._file.close()
+                self._file = None
+
+    # -- Snapshots ----------------------------------------------------------
+
+    def _start_checkpoint(self) -> None:
+        if self._checkpoint_thread is not None and self._checkpoint_thread.is_alive():
+            return
+        self._since_snapshot = 0
+        # The callback runs under a controller lock, so the checkpoint has to
+        # wait for it on another thread
+        self._checkpoint_thread = threading.Thread(target=self.checkpoint, daemon=True)
+        self._checkpoint_thread.start()
+
+    def checkpoint(self) -> None:
+        """Write a snapshot of the controller and start a fresh journal segment"""
+        controller = self._controller
+        if controller is None:
+            return
+        with controller.locked():
+            # No events can be journaled while every controller lock is held,
+            # so the captured state matches self._seq exactly
+            with self._lock:
+                self._flush_locked(sync=self._fsync != 'never')
+                seq = self._seq
+                self._since_snapshot = 0
+                self._open_segment(seq)
+            header = (controller.max_space_id(False), controller.max_space_id(True), controller.level)
+            parked = [(is_ev, space_id, vehicle, getattr(vehicle, 'charge_level', 0))
+                      for is_ev in (False, True)
+                      for space_id, vehicle in controller.iter_occupied(is_ev)]
+            conversions = controller.pending_conversions()
+            # Conversion targets are restored by convert_space, not as plain retirements
+            retired_regular = [space_id for space_id in controller.retired_spaces(False)
+                               if space_id not in conversions]
+            retired_ev = controller.retired_spaces(True)
+
+        body = bytearray(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, seq, *header, len(parked)))
+        for is_ev, space_id, vehicle, charge in parked:
+            payload = encode_park(is_ev, space_id, vehicle, charge)
+            body += _SNAPSHOT_ENTRY.pack(len(payload))
+            body += payload
+        body += _pack_ids(retired_regular)
+        body += _pack_ids(retired_ev)
+        body += _pack_ids([space_id for pair in sorted(conversions.items()) for space_id in pair])
+        body += _CRC.pack(zlib.crc32(body))
+
+        path = os.path.join(self._directory, f'snapshot-{seq:012d}.bin')
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as snapshot:
+            snapshot.write(body)
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        os.replace(temp_path, path)
+        self._sync_directory()
+        self._prune(seq)
+
+    def _open_segment(self, base: int) -> None:
+        if self._file is not None:
+            self._file.close()
+        path = os.path.join(self._directory, f'journal-{base:012d}.log')
+        self._file = open(path, 'ab')
+        self._sync_directory()
+
+    def _prune(self, seq: int) -> None:
+        """Delete segments and snapshots made redundant by the snapshot at seq"""
+        for base, path in self._segments():
+            if base < seq:
+                os.remove(path)
+        for snapshot_seq, path in self._snapshots():
+            if snapshot_seq < seq:
+                os.remove(path)
+
+    def _sync_directory(self) -> None:
+        if hasattr(os, 'O_DIRECTORY'):
+            fd = os.open(self._directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _segments(self) -> List[Tuple[int, str]]:
+        return self._list(_SEGMENT_NAME)
+
+    def _snapshots(self) -> List[Tuple[int, str]]:
+        return self._list(_SNAPSHOT_NAME)
+
+    def _list(self, pattern) -> List[Tuple[int, str]]:
+        found = []
+        for name in os.listdir(self._directory):
+            match = pattern.match(name)
+            if match:
+                found.append((int(match.group(1)), os.path.join(self._directory, name)))
+        return sorted(found)
+
+class _TailReplay:
+    """Collapse journal records to their net effect before touching the controller
+
+    A vehicle that arrived and left within the tail never needs to be
+    parked at all, so replay costs one decode per record plus one
+    controller call per space that actually changed.
+    """
+
+    def __init__(self, controller: ParkingLotController):
+        self._controller = controller
+        self._spaces: Dict[Tuple[bool, int], Optional[memoryview]] = {}  # final park payload, None if emptied
+        self._charges: Dict[int, int] = {}  # EV space_id -> latest charge of its current occupant
+
+    def apply(self, payload: memoryview) -> None:
+        op = payload[0]
+        if op == OP_PARK:
+            _, is_ev, space_id, _, _ = _PARK.unpack_from(payload)
+            self._spaces[(is_ev, space_id)] = payload
+            if is_ev:
+                self._charges.pop(space_id, None)
+        elif op == OP_REMOVE:
+            _, is_ev, space_id = _REMOVE.unpack_from(payload)
+            self._spaces[(is_ev, space_id)] = None
+            if is_ev:
+                self._charges.pop(space_id, None)
+        elif op == OP_CHARGE:
+            _, space_id, charge = _CHARGE.unpack_from(payload)
+            self._charges[space_id] = charge
+        elif op == OP_INIT:
+            _, regular, ev, level = _INIT.unpack_from(payload)
+            self._spaces.clear()
+            self._charges.clear()
+            self._controller.initialize_lot(regular, ev, level)
+        else:
+            # Lot layout changes depend on occupancy at that point, so settle the
+            # collapsed tail first and then apply them in order
+            self.flush()
+            if op == OP_ADD_SPACES:
+                _, is_ev, count = _ADD_SPACES.unpack_from(payload)
+                self._controller.add_spaces(count, is_ev)
+            elif op == OP_RETIRE_SPACES:
+                _, is_ev = _RETIRE.unpack_from(payload)
+                count = (len(payload) - _RETIRE.size) // 4
+                self._controller.retire_spaces(struct.unpack_from(f'<{count}I', payload, _RETIRE.size), is_ev)
+            elif op == OP_CONVERT_SPACE:
+                _, space_id, _ = _CONVERT.unpack_from(payload)
+                self._controller.convert_space(space_id)
+
+    def flush(self) -> None:
+        controller = self._controller
+        # Ascending order carves the free-space runs from the front, one split at a time
+        for (is_ev, space_id), payload in sorted(self._spaces.items()):
+            controller.remove_vehicle(space_id, is_ev)
+            if payload is not None:
+                _, _, vehicle = decode_park(payload)
+                controller.place_vehicle(vehicle, is_ev, space_id)
+        for space_id, charge in self._charges.items():
+            controller.set_charge_level(space_id, charge)
+        self._spaces.clear()
+        self._charges.clear()
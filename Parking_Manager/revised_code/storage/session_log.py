@@ -0,0 +1,97 @@
+import threading
+import time
+from array import array
+from typing import Callable, Dict, List, Tuple, Union
+from controllers.events import ParkingEventListener
+from models.vehicle import VEHICLE_TYPE_CODES, Vehicle
+
+class SessionLog:
+    """Fixed-size ring buffer of completed parking sessions in typed columns
+
+    Once full, each new session overwrites the oldest, so memory stays flat
+    at about 30 bytes a session however long the lot runs. Several
+    recorders, e.g. one per facility level, can share one log.
+    """
+
+    def __init__(self, capacity: int = 1_000_000):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self._capacity = capacity
+        self._arrivals = array('d', bytes(8 * capacity))
+        self._departures = array('d', bytes(8 * capacity))
+        self._levels = array('i', bytes(4 * capacity))
+        self._space_ids = array('I', bytes(4 * capacity))
+        self._is_ev = bytearray(capacity)
+        self._vehicle_types = bytearray(capacity)
+        self._next = 0
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self._total, self._capacity)
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def total_recorded(self) -> int:
+        """Sessions ever appended, including ones since overwritten"""
+        return self._total
+
+    def append(self, arrival: float, departure: float, level: int, is_ev: bool,
+               space_id: int, vehicle_type: int) -> None:
+        with self._lock:
+            i = self._next
+            self._arrivals[i] = arrival
+            self._departures[i] = departure
+            self._levels[i] = level
+            self._space_ids[i] = space_id
+            self._is_ev[i] = is_ev
+            self._vehicle_types[i] = vehicle_type
+            self._next = (i + 1) % self._capacity
+            self._total += 1
+
+    def columns(self) -> Dict[str, Union[array, bytearray]]:
+        """Copy out every retained session, oldest first, one column per field"""
+        with self._lock:
+            count = len(self)
+            start = self._next if self._total > self._capacity else 0
+            columns = {}
+            for name, column in (('arrival', self._arrivals), ('departure', self._departures),
+                                 ('level', self._levels), ('space_id', self._space_ids),
+                                 ('is_ev', self._is_ev), ('vehicle_type', self._vehicle_types)):
+                columns[name] = column[start:count] + column[:start] if start else column[:count]
+            return columns
+
+class SessionRecorder(ParkingEventListener):
+    """Timestamp arrivals and departures on one controller into a SessionLog
+
+    clock returns the current time in seconds; pass a simulated clock to
+    record simulated time. Vehicles already parked when the recorder was
+    attached have no arrival time and are not recorded when they leave.
+    """
+
+    def __init__(self, log: SessionLog, level: int = 0, clock: Callable[[], float] = time.time):
+        self._log = log
+        self._level = level
+        self._clock = clock
+        self._open: Dict[Tuple[bool, int], Tuple[float, int]] = {}  # (is_ev, space_id) -> arrival, type code
+
+    def on_lot_initialized(self, regular_capacity: int, ev_capacity: int, level: int) -> None:
+        self._level = level
+        self._open.clear()
+
+    def on_park(self, is_ev: bool, space_id: int, vehicle: Vehicle) -> None:
+        self._open[(is_ev, space_id)] = (self._clock(), VEHICLE_TYPE_CODES[type(vehicle)])
+
+    def on_remove(self, is_ev: bool, space_id: int, vehicle: Vehicle) -> None:
+        session = self._open.pop((is_ev, space_id), None)
+        if session is not None:
+            arrival, vehicle_type = session
+            self._log.append(arrival, self._clock(), self._level, is_ev, space_id, vehicle_type)
+
+    def open_sessions(self) -> List[Tuple[bool, int, float, int]]:
+        """(is_ev, space_id, arrival, vehicle type code) for every vehicle currently parked"""
+        return [(is_ev, space_id, arrival, vehicle_type)
+                for (is_ev, space_id), (arrival, vehicle_type) in list(self._open.items())]
@@ -0,0 +1,223 @@
+"""Run random operation sequences against the legacy ParkingLot and LegacyParkingLot and compare results.
+
+Usage: python tools/legacy_equivalence.py [--sequences N] [--ops N] [--seed N]
+Exits non-zero on the first divergence, printing the seed and operations that led to it.
+
+Some parks and edits reuse a registration already in the lot, and the
+lookups must still return the lowest matching slot as the legacy scans did.
+The GUI button handlers are driven through stand-ins for the legacy Tk
+variables and their text compared. Where the legacy class is buggy the
+comparison is made against what it meant to do: park() and parkCar() are
+checked by the slot the vehicle ended up in rather than the returned
+counter, edit() only targets occupied slots, and the Ev make/model lookups
+(which raise NameError in the legacy code) are checked against a scan of
+the legacy EV slots.
+"""
+import argparse
+import os
+import random
+import sys
+
+REVISED_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEGACY_DIR = os.path.join(os.path.dirname(REVISED_DIR), 'original_code')
+
+# Add the revised and legacy code to the Python path
+sys.path.append(REVISED_DIR)
+sys.path.append(LEGACY_DIR)
+
+from controllers.legacy_parking_lot import LegacyParkingLot
+import ParkingManager as legacy_manager
+
+COLORS = ['Red', 'Blue', 'Black', 'White']
+MAKES = ['Toyota', 'Honda', 'Tesla']
+MODELS = ['A', 'B', 'C']
+# The module-global Tk variables the legacy button handlers read
+LEGACY_INPUTS = ('num_value', 'ev_value', 'level_value', 'reg_value', 'make_value', 'model_value',
+                 'color_value', 'ev_car_value', 'ev_motor_value', 'slot_value', 'ev_car2_value',
+                 'slot1_value', 'slot2_value', 'reg1_value')
+
+class TextSink:
+    """Stands in for the Tk Text widget the legacy reports write into"""
+
+    def __init__(self):
+        self.parts = []
+
+    def insert(self, index, text: str) -> None:
+        self.parts.append(text)
+
+    def take(self) -> str:
+        text, self.parts = ''.join(self.parts), []
+        return text
+
+class Field:
+    """Stands in for a Tk variable: holds a value for get()"""
+
+    def __init__(self):
+        self.value = ''
+
+    def get(self):
+        return self.value
+
+def fill(fields: dict, **values) -> None:
+    for name, value in values.items():
+        fields[name].value = value
+
+class Divergence(Exception):
+    pass
+
+def check(label: str, legacy, facade) -> None:
+    if legacy != facade:
+        raise Divergence(f"{label}: legacy {legacy!r} != facade {facade!r}")
+
+def ev_slots_by(legacy, attribute: str, value: str) -> list:
+    """What getSlotNumFromMakeEv/ModelEv were meant to return"""
+    return [str(i + 1) for i, vehicle in enumerate(legacy.evSlots)
+            if vehicle != -1 and getattr(vehicle, attribute) == value]
+
+def compare_queries(legacy, facade, rng: random.Random, registrations: list, sink: TextSink,
+                    fields: dict) -> None:
+    check("getEmptySlot", legacy.getEmptySlot(), facade.getEmptySlot())
+    check("getEmptyEvSlot", legacy.getEmptyEvSlot(), facade.getEmptyEvSlot())
+    check("getEmptyLevel", legacy.getEmptyLevel(), facade.getEmptyLevel())
+    check("numOfOccupiedSlots", legacy.numOfOccupiedSlots, facade.numOfOccupiedSlots)
+    check("numOfOccupiedEvSlots", legacy.numOfOccupiedEvSlots, facade.numOfOccupiedEvSlots)
+    if registrations:
+        regnum = rng.choice(registrations)
+        check(f"getSlotNumFromRegNum({regnum})", legacy.getSlotNumFromRegNum(regnum),
+              facade.getSlotNumFromRegNum(regnum))
+        check(f"getSlotNumFromRegNumEv({regnum})", legacy.getSlotNumFromRegNumEv(regnum),
+              facade.getSlotNumFromRegNumEv(regnum))
+        fill(fields, slot1_value=regnum)
+        legacy.slotNumByReg()
+        check(f"slotNumByReg({regnum})", sink.take(), facade.slotNumByReg())
+    color, make, model = rng.choice(COLORS), rng.choice(MAKES), rng.choice(MODELS)
+    check(f"getRegNumFromColor({color})", legacy.getRegNumFromColor(color), facade.getRegNumFromColor(color))
+    check(f"getRegNumFromColorEv({color})", legacy.getRegNumFromColorEv(color), facade.getRegNumFromColorEv(color))
+    check(f"getSlotNumFromColor({color})", legacy.getSlotNumFromColor(color), facade.getSlotNumFromColor(color))
+    check(f"getSlotNumFromMake({make})", legacy.getSlotNumFromMake(make), facade.getSlotNumFromMake(make))
+    check(f"getSlotNumFromModel({model})", legacy.getSlotNumFromModel(model), facade.getSlotNumFromModel(model))
+    check(f"getSlotNumFromColorEv({color})", legacy.getSlotNumFromColorEv(color),
+          facade.getSlotNumFromColorEv(color))
+    check(f"getSlotNumFromMakeEv({make})", ev_slots_by(legacy, 'make', make), facade.getSlotNumFromMakeEv(make))
+    check(f"getSlotNumFromModelEv({model})", ev_slots_by(legacy, 'model', model),
+          facade.getSlotNumFromModelEv(model))
+    fill(fields, slot2_value=color, reg1_value=color)
+    legacy.slotNumByColor()
+    check(f"slotNumByColor({color})", sink.take(), facade.slotNumByColor())
+    legacy.regNumByColor()
+    check(f"regNumByColor({color})", sink.take(), facade.regNumByColor())
+    legacy.status()
+    check("status", sink.take(), facade.status())
+    legacy.chargeStatus()
+    check("chargeStatus", sink.take(), facade.chargeStatus())
+
+def registration(rng: random.Random, registrations: list, fresh: str) -> str:
+    """A new registration, or now and then one that has been used before"""
+    if registrations and rng.random() < 0.3:
+        return rng.choice(registrations)
+    registrations.append(fresh)
+    return fresh
+
+def run_sequence(seed: int, ops: int, sink: TextSink, fields: dict, trace: list) -> None:
+    rng = random.Random(seed)
+    legacy, facade = legacy_manager.ParkingLot(), LegacyParkingLot(inputs=fields)
+    capacity, ev_capacity, level = rng.randint(1, 30), rng.randint(0, 10), rng.randint(1, 5)
+    if rng.random() < 0.5:
+        trace.append(f"makeLot({capacity}, {ev_capacity}, {level})")
+        fill(fields, num_value=str(capacity), ev_value=str(ev_capacity), level_value=str(level))
+        legacy.makeLot()
+        check("makeLot", sink.take(), facade.makeLot())
+    else:
+        trace.append(f"createParkingLot({capacity}, {ev_capacity}, {level})")
+        check("createParkingLot", legacy.createParkingLot(capacity, ev_capacity, level),
+              facade.createParkingLot(capacity, ev_capacity, level))
+    registrations = []
+
+    for op in range(ops):
+        roll = rng.random()
+        if roll < 0.45:
+            regnum = registration(rng, registrations, f"R{seed}-{op}")
+            ev, motor = int(rng.random() < 0.3), int(rng.random() < 0.2)
+            args = (regnum, rng.choice(MAKES), rng.choice(MODELS), rng.choice(COLORS), ev, motor)
+            slots = legacy.evSlots if ev else legacy.slots
+            free = [i for i, vehicle in enumerate(slots) if vehicle == -1]
+            if rng.random() < 0.3:
+                trace.append(f"parkCar{args}")
+                fill(fields, **dict(zip(('reg_value', 'make_value', 'model_value', 'color_value',
+                                         'ev_car_value', 'ev_motor_value'), args)))
+                legacy.parkCar()
+                legacy_text, text = sink.take(), facade.parkCar()
+                parked = not legacy_text.startswith("Sorry")
+                check("parkCar succeeded", parked, not text.startswith("Sorry"))
+                slot = int(text.split(': ')[1]) if parked else -1
+            else:
+                trace.append(f"park{args}")
+                parked = legacy.park(*args) != -1
+                slot = facade.park(*args)
+                check("park succeeded", parked, slot != -1)
+            if parked:
+                check("park slot", [i + 1 for i in free if slots[i] != -1], [slot])
+        elif roll < 0.8:
+            ev = int(rng.random() < 0.3)
+            slotid = rng.randint(1, max(1, ev_capacity if ev else capacity))
+            if ev and not ev_capacity:
+                continue
+            if rng.random() < 0.3:
+                trace.append(f"removeCar({slotid}, {ev})")
+                fill(fields, slot_value=str(slotid), ev_car2_value=ev)
+                legacy.removeCar()
+                check("removeCar", sink.take(), facade.removeCar())
+            else:
+                trace.append(f"leave({slotid}, {ev})")
+                check("leave", legacy.leave(slotid, ev), facade.leave(slotid, ev))
+        elif roll < 0.87:
+            ev = int(rng.random() < 0.3)
+            slots = legacy.evSlots if ev else legacy.slots
+            occupied = [i for i, vehicle in enumerate(slots) if vehicle != -1]
+            if not occupied:
+                continue
+            regnum = registration(rng, registrations, f"E{seed}-{op}")
+            args = (rng.choice(occupied), regnum, rng.choice(MAKES), rng.choice(MODELS), rng.choice(COLORS), ev)
+            trace.append(f"edit{args}")
+            check("edit", legacy.edit(*args), facade.edit(*args))
+        elif roll < 0.92:
+            occupied = [i for i, vehicle in enumerate(legacy.evSlots) if vehicle != -1]
+            if not occupied:
+                continue
+            i, charge = rng.choice(occupied), rng.randint(0, 100)
+            trace.append(f"charge slot {i + 1} to {charge}")
+            # ElectricCar/ElectricBike don't inherit setCharge, so set the field directly
+            legacy.evSlots[i].charge = charge
+            facade.controller.set_charge_level(i + 1, charge)
+        else:
+            trace.append("queries")
+            compare_queries(legacy, facade, rng, registrations, sink, fields)
+    compare_queries(legacy, facade, rng, registrations, sink, fields)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sequences', type=int, default=500)
+    parser.add_argument('--ops', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first sequence")
+    args = parser.parse_args()
+
+    # The legacy reports write into a module-global Text widget, and the
+    # button handlers read module-global Tk variables
+    sink = TextSink()
+    legacy_manager.tfield = sink
+    fields = {name: Field() for name in LEGACY_INPUTS}
+    for name, field in fields.items():
+        setattr(legacy_manager, name, field)
+    for seed in range(args.seed, args.seed + args.sequences):
+        trace = []
+        try:
+            run_sequence(seed, args.ops, sink, fields, trace)
+        except Divergence as error:
+            print(f"seed {seed}: {error}")
+            print("after: " + "; ".join(trace[-20:]))
+            return 1
+    print(f"{args.sequences} sequences of {args.ops} operations matched")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
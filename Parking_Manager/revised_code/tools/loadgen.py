@@ -0,0 +1,92 @@
+"""Load generator for services/parking_service.py reporting latency percentiles and throughput.
+
+Each client holds a keep-alive connection and loops: park a vehicle, look
+it up, then remove it.
+
+Usage: python tools/loadgen.py [--url http://127.0.0.1:8080] [--clients N] [--duration S]
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import List, Tuple
+from urllib.parse import urlsplit
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str,
+                  path: str, payload: dict = None) -> Tuple[int, dict]:
+    body = json.dumps(payload).encode() if payload is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: loadgen\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length)) if length else {}
+
+async def client(host: str, port: int, client_id: int, deadline: float,
+                 latencies: List[float], statuses: dict) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    n = 0
+    try:
+        while time.perf_counter() < deadline:
+            n += 1
+            registration = f"LG{client_id:04d}-{n}"
+            is_ev = n % 5 == 0
+            calls = [('POST', '/api/parking/vehicle/park',
+                      {'registration': registration, 'make': 'Loadgen', 'model': 'X', 'color': 'Red', 'is_ev': is_ev}),
+                     ('GET', f'/api/parking/vehicle/{registration}', None)]
+            space_id = None
+            for method, path, payload in calls:
+                start = time.perf_counter()
+                status, data = await request(reader, writer, method, path, payload)
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+                if method == 'POST':
+                    space_id = data.get('space_id')
+                    if space_id is None:
+                        break
+            if space_id is not None:
+                start = time.perf_counter()
+                status, _ = await request(reader, writer, 'DELETE',
+                                          f'/api/parking/vehicle/{space_id}?is_ev={int(is_ev)}')
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+async def run(url: str, clients: int, duration: float) -> None:
+    parts = urlsplit(url)
+    latencies: List[float] = []
+    statuses: dict = {}
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(client(parts.hostname, parts.port or 80, i, deadline, latencies, statuses)
+                           for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(f"{len(latencies):,} requests from {clients} clients in {elapsed:.1f}s "
+          f"({len(latencies) / elapsed:,.0f} req/s)")
+    print(f"latency p50 {percentile(latencies, 0.50) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms, max {latencies[-1] * 1000:.2f} ms")
+    print("status codes: " + ", ".join(f"{code}={count}" for code, count in sorted(statuses.items())))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8080')
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=10.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.clients, args.duration))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Check that SQLiteBackend commits on its own and never stalls the controller on the database.
+
+Usage: python tools/sqlite_backend.py [--dir PATH]
+Exits non-zero if any check fails.
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.parking_controller import ParkingLotController
+from models.vehicle import VehicleInfo
+from storage.backends import LotState, SQLiteBackend
+
+BURST = 5
+
+def parked_rows(path: str) -> int:
+    """Vehicles visible to a separate connection, as another process would see them"""
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT count(*) FROM vehicles").fetchone()[0]
+
+def attached_lot(path: str, **options) -> tuple:
+    controller = ParkingLotController()
+    controller.initialize_lot(100, 10, 1)
+    backend = SQLiteBackend(path, **options)
+    backend.attach(controller)
+    return controller, backend
+
+def check_idle_flush(directory: str) -> list:
+    """A short burst reaches other connections within flush_interval, without a commit()"""
+    path = os.path.join(directory, 'idle.db')
+    controller, backend = attached_lot(path, flush_interval=0.05)
+    for i in range(BURST):
+        controller.park_vehicle(VehicleInfo(f"IDLE{i}", "Kia", "Niro", "Grey"), False, False)
+    time.sleep(0.5)
+    visible = parked_rows(path)
+    backend.close()
+    return [] if visible == BURST else [f"another connection saw {visible} of {BURST} vehicles after 0.5s idle"]
+
+def check_locked_database(directory: str) -> list:
+    """Parking stays fast while another connection holds the write lock, and catches up afterwards"""
+    errors = []
+    path = os.path.join(directory, 'locked.db')
+    controller, backend = attached_lot(path, batch_size=2, flush_interval=0.01)
+    blocker = sqlite3.connect(path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    start = time.perf_counter()
+    for i in range(50):
+        controller.park_vehicle(VehicleInfo(f"LOCK{i}", "Kia", "Niro", "Grey"), False, False)
+    elapsed = time.perf_counter() - start
+    if elapsed > 0.2:
+        errors.append(f"50 parks took {elapsed:.2f}s while the database was locked")
+    time.sleep(0.1)
+    blocker.execute("ROLLBACK")
+    blocker.close()
+    backend.commit()
+    if parked_rows(path) != 50:
+        errors.append(f"{parked_rows(path)} of 50 vehicles written once the lock was released")
+    backend.close()
+    return errors
+
+def check_round_trip(directory: str) -> list:
+    """Random parks, removals, retirements and conversions restore to the same state"""
+    path = os.path.join(directory, 'round_trip.db')
+    controller, backend = attached_lot(path, batch_size=64, flush_interval=0.001)
+    rng = random.Random(7)
+    for op in range(5000):
+        choice = rng.random()
+        is_ev = rng.random() < 0.3
+        if choice < 0.5:
+            controller.park_vehicle(VehicleInfo(f"RT{op}", "Kia", "Niro", "Red"), is_ev, False)
+        elif choice < 0.9:
+            controller.remove_vehicle(rng.randint(1, controller.max_space_id(is_ev)), is_ev)
+        elif choice < 0.95:
+            controller.retire_spaces([rng.randint(1, controller.max_space_id(is_ev))], is_ev)
+        else:
+            controller.convert_space(rng.randint(1, controller.max_space_id(False)))
+    with controller.locked():
+        expected = LotState.capture(controller)
+    backend.close()
+
+    restored = SQLiteBackend(path)
+    restored_state = LotState.capture(restored.attach(level=1))
+    restored.close()
+    return [] if restored_state == expected else ["restored state differs from the controller's"]
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dir', default=None, help="where to create scratch databases (default: a temp dir)")
+    args = parser.parse_args()
+    root = tempfile.mkdtemp(prefix='sqlite-backend-', dir=args.dir)
+
+    checks = [check_idle_flush, check_locked_database, check_round_trip]
+    failed = False
+    try:
+        for check in checks:
+            errors = check(root)
+            print(f"{check.__name__}: {'FAILED' if errors else 'ok'}")
+            for error in errors:
+                print(f"  {error}")
+            failed = failed or bool(errors)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
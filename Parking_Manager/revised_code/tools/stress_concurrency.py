@@ -0,0 +1,127 @@
+"""Hammer a shared ParkingLotController from many gate threads and verify its invariants.
+
+Usage: python tools/stress_concurrency.py [--threads N] [--ops N] [--capacity N] [--resize]
+Exits non-zero if any invariant is violated.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.parking_controller import ParkingLotController
+from models.vehicle import VehicleInfo
+
+COLORS = ['Red', 'Blue', 'Black', 'White', 'Silver']
+
+def gate_worker(controller: ParkingLotController, worker_id: int, ops: int, capacity: int,
+                barrier: threading.Barrier, stats: dict) -> None:
+    """Randomly park our own vehicles and remove arbitrary ones"""
+    rng = random.Random(worker_id)
+    parked = 0
+    removed = 0
+    barrier.wait()
+    for op in range(ops):
+        is_ev = rng.random() < 0.3
+        if rng.random() < 0.55:
+            info = VehicleInfo(f"W{worker_id}-{op}", "Make", "Model", rng.choice(COLORS))
+            if controller.park_vehicle(info, is_ev, rng.random() < 0.1) is not None:
+                parked += 1
+        elif controller.remove_vehicle(rng.randint(1, capacity), is_ev):
+            removed += 1
+    stats[worker_id] = (parked, removed)
+
+def resize_worker(controller: ParkingLotController, capacity: int, stop: threading.Event) -> None:
+    """Add, retire and convert bays while the gates are busy"""
+    rng = random.Random(-1)
+    while not stop.is_set():
+        choice = rng.random()
+        is_ev = rng.random() < 0.3
+        if choice < 0.4:
+            controller.add_spaces(rng.randint(1, 5), is_ev)
+        elif choice < 0.8:
+            controller.retire_spaces([rng.randint(1, capacity) for _ in range(3)], is_ev)
+        else:
+            controller.convert_space(rng.randint(1, capacity))
+        time.sleep(0.001)
+
+def check_invariants(controller: ParkingLotController) -> list:
+    """Return a list of human-readable invariant violations"""
+    errors = []
+    seen = set()
+    for is_ev in (False, True):
+        store = controller._stores[is_ev]
+        unavailable = set(controller.retired_spaces(is_ev)) | set(controller.held_spaces(is_ev))
+        free = {space_id for space_id in store.space_ids()
+                if not store.is_occupied(space_id) and space_id not in unavailable}
+        if controller.free_space_count(is_ev) != len(free):
+            errors.append(f"free count {controller.free_space_count(is_ev)} != {len(free)} (ev={is_ev})")
+        for space_id in free:
+            if space_id not in controller._free_spaces[is_ev]:
+                errors.append(f"free space {space_id} missing from index (ev={is_ev})")
+        for space_id in store.occupied_ids():
+            space = store.space(space_id)
+            if space_id in controller._free_spaces[is_ev]:
+                errors.append(f"occupied space {space_id} listed as free (ev={is_ev})")
+            registration = space.vehicle.registration
+            if registration in seen:
+                errors.append(f"{registration} parked twice")
+            seen.add(registration)
+            if controller.get_vehicle_location(registration) != (is_ev, space_id):
+                errors.append(f"{registration} location drifted")
+            if (is_ev, space_id) not in controller.find_locations_by_attribute('color', space.vehicle.color):
+                errors.append(f"{registration} missing from color index")
+    if len(controller._vehicle_locations) != len(seen):
+        errors.append(f"{len(controller._vehicle_locations)} locations for {len(seen)} parked vehicles")
+    return errors
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--ops', type=int, default=20000)
+    parser.add_argument('--capacity', type=int, default=500)
+    parser.add_argument('--resize', action='store_true', help="add, retire and convert bays concurrently")
+    args = parser.parse_args()
+
+    controller = ParkingLotController()
+    controller.initialize_lot(args.capacity, args.capacity, 1)
+    barrier = threading.Barrier(args.threads)
+    stats = {}
+    threads = [threading.Thread(target=gate_worker,
+                                args=(controller, i, args.ops, args.capacity, barrier, stats))
+               for i in range(args.threads)]
+    stop = threading.Event()
+    resizer = threading.Thread(target=resize_worker, args=(controller, args.capacity, stop))
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    if args.resize:
+        resizer.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    if args.resize:
+        resizer.join()
+
+    parked = sum(p for p, _ in stats.values())
+    removed = sum(r for _, r in stats.values())
+    summary = controller.summary()
+    occupied = summary['regular']['occupied'] + summary['ev']['occupied']
+    errors = check_invariants(controller)
+    if parked - removed != occupied:
+        errors.append(f"parked {parked} - removed {removed} != occupied {occupied}")
+
+    total_ops = args.threads * args.ops
+    print(f"{total_ops} ops on {args.threads} threads in {elapsed:.2f}s "
+          f"({total_ops / elapsed:,.0f} ops/s), {occupied} occupied")
+    for error in errors:
+        print(f"INVARIANT VIOLATED: {error}")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,9 @@
 import tkinter as tk
-from tkinter import messagebox
-from typing import Optional
+from tkinter import messagebox, ttk
+from itertools import chain, islice
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import queue
+import threading
 import sys
 import os
 
@@ -10,8 +13,66 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from controllers.parking_controller import ParkingLotController
 from models.vehicle import VehicleInfo
 
+PAGE_SIZE = 100
+POLL_MS = 30
+REFRESH_MS = 1000
+COLUMNS = ('type', 'space', 'registration', 'make', 'model', 'color', 'charge')
+
+class ControllerWorker:
+    """Run controller calls on a background thread and hand results back to the Tk thread
+
+    Tk widgets may only be touched from the thread running mainloop, so
+    the worker never calls back directly: finished jobs wait in a queue
+    that the UI drains from an after() callback.
+    """
+
+    def __init__(self, root: tk.Tk):
+        self._root = root
+        self._jobs: queue.Queue = queue.Queue()
+        self._results: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._root.after(POLL_MS, self._poll)
+
+    def submit(self, job: Callable[[], Any], on_done: Callable[[Any], None],
+               on_error: Optional[Callable[[Exception], None]] = None) -> None:
+        self._jobs.put((job, on_done, on_error))
+
+    def stop(self) -> None:
+        self._jobs.put(None)
+
+    def _run(self) -> None:
+        while True:
+            item = self._jobs.get()
+            if item is None:
+                return
+            job, on_done, on_error = item
+            try:
+                self._results.put((on_done, on_error, job(), None))
+            except Exception as error:
+                self._results.put((on_done, on_error, None, error))
+
+    def _poll(self) -> None:
+        while True:
+            try:
+                on_done, on_error, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if error is None:
+                on_done(result)
+            elif on_error is not None:
+                on_error(error)
+            else:
+                messagebox.showerror("Error", str(error))
+        self._root.after(POLL_MS, self._poll)
+
 class ParkingLotView:
-    """View class for the parking lot management system"""
+    """View class for the parking lot management system
+
+    Controller calls run on a ControllerWorker so a large lot never blocks
+    the window. Status is a paginated ttk.Treeview refreshed in place:
+    only rows whose values changed are touched.
+    """
     
     def __init__(self):
         self.controller = ParkingLotController()
@@ -34,9 +95,22 @@ class ParkingLotView:
         self.search_term = tk.StringVar()
 
         # Output area
-        self.output_area = tk.Text(self.root, width=70, height=15)
+        self.output_area = tk.Text(self.root, width=70, height=4)
+
+        # Status table, one page at a time
+        self.status_table = ttk.Treeview(self.root, columns=COLUMNS, show='headings', height=14)
+        self.status_scroll = ttk.Scrollbar(self.root, orient=tk.VERTICAL, command=self.status_table.yview)
+        self.status_table.configure(yscrollcommand=self.status_scroll.set)
+        self.page_label = tk.StringVar(value="No lot created")
+        self._status_mode: Optional[str] = None  # 'all', 'ev' or None before the first request
+        self._page = 0
+        self._view_generation = 0  # bumped whenever the user picks another mode or page
+        self._refresh_pending = False
+        self._rows: Dict[str, Tuple] = {}  # item id -> values currently shown
 
+        self.worker = ControllerWorker(self.root)
         self._setup_ui()
+        self.root.after(REFRESH_MS, self._auto_refresh)
 
     def _setup_ui(self):
         """Set up the user interface"""
@@ -95,8 +169,21 @@ class ParkingLotView:
         tk.Button(self.root, text="Show EV Status", command=self._show_ev_status,
                  font="Arial 12", bg="PaleGreen1").grid(row=12, column=1, pady=5)
 
+        # Status table with pager
+        widths = (60, 50, 120, 90, 90, 80, 60)
+        for column, width in zip(COLUMNS, widths):
+            self.status_table.heading(column, text=column.title())
+            self.status_table.column(column, width=width, anchor=tk.W)
+        self.status_table.grid(row=13, column=0, columnspan=4, padx=(10, 0), pady=5, sticky='nsew')
+        self.status_scroll.grid(row=13, column=4, sticky='ns', pady=5)
+        tk.Button(self.root, text="< Prev", command=lambda: self._turn_page(-1),
+                  font="Arial 11").grid(row=14, column=0, pady=5)
+        tk.Label(self.root, textvariable=self.page_label, font="Arial 11").grid(row=14, column=1, columnspan=2)
+        tk.Button(self.root, text="Next >", command=lambda: self._turn_page(1),
+                  font="Arial 11").grid(row=14, column=3, pady=5)
+
         # Output area
-        self.output_area.grid(row=13, column=0, columnspan=4, padx=10, pady=10)
+        self.output_area.grid(row=15, column=0, columnspan=4, padx=10, pady=5)
 
     def _create_header(self, text: str, row: int):
         """Create a section header"""
@@ -109,11 +196,15 @@ class ParkingLotView:
             regular = int(self.regular_spaces.get())
             ev = int(self.ev_spaces.get())
             level = int(self.level.get())
-            
-            self.controller.initialize_lot(regular, ev, level)
-            self._show_message(f"Created parking lot with {regular} regular and {ev} EV spaces on level {level}")
         except ValueError:
             messagebox.showerror("Error", "Please enter valid numbers")
+            return
+
+        def created(_):
+            self._show_message(f"Created parking lot with {regular} regular and {ev} EV spaces on level {level}")
+            self._go_to_page(0)
+
+        self.worker.submit(lambda: self.controller.initialize_lot(regular, ev, level), created)
 
     def _park_vehicle(self):
         """Handle vehicle parking"""
@@ -123,57 +214,122 @@ class ParkingLotView:
             self.model.get(),
             self.color.get()
         )
-        
-        space_id = self.controller.park_vehicle(
-            info, 
-            self.is_ev.get(),
-            self.is_motorcycle.get()
-        )
-        
-        if space_id:
-            self._show_message(f"Vehicle parked in space {space_id}")
-        else:
-            self._show_message("No available spaces")
+        is_ev, is_motorcycle = self.is_ev.get(), self.is_motorcycle.get()
+
+        def parked(space_id):
+            if space_id:
+                self._show_message(f"Vehicle parked in space {space_id}")
+            else:
+                self._show_message("No available spaces")
+            self._request_refresh()
+
+        self.worker.submit(lambda: self.controller.park_vehicle(info, is_ev, is_motorcycle), parked)
 
     def _remove_vehicle(self):
         """Handle vehicle removal"""
         try:
             space_id = int(self.space_id.get())
-            is_ev = self.is_ev.get()
-            
-            if self.controller.remove_vehicle(space_id, is_ev):
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid space ID")
+            return
+        is_ev = self.is_ev.get()
+
+        def removed(success):
+            if success:
                 self._show_message(f"Vehicle removed from space {space_id}")
             else:
                 self._show_message(f"No vehicle in space {space_id}")
-        except ValueError:
-            messagebox.showerror("Error", "Please enter a valid space ID")
+            self._request_refresh()
+
+        self.worker.submit(lambda: self.controller.remove_vehicle(space_id, is_ev), removed)
 
     def _show_status(self):
         """Display current parking lot status"""
-        status = self.controller.get_lot_status()
-        
-        output = "Regular Vehicles:\n"
-        output += "Space\tRegistration\tMake\tModel\tColor\n"
-        for space_id, vehicle in status['regular']:
-            output += f"{space_id}\t{vehicle.registration}\t{vehicle.make}\t{vehicle.model}\t{vehicle.color}\n"
-        
-        output += "\nElectric Vehicles:\n"
-        output += "Space\tRegistration\tMake\tModel\tColor\n"
-        for space_id, vehicle in status['ev']:
-            output += f"{space_id}\t{vehicle.registration}\t{vehicle.make}\t{vehicle.model}\t{vehicle.color}\n"
-        
-        self._show_message(output)
+        self._switch_mode('all')
 
     def _show_ev_status(self):
         """Display EV charging status"""
-        status = self.controller.get_ev_charge_status()
-        
-        output = "EV Charging Status:\n"
-        output += "Space\tCharge Level\n"
-        for space_id, charge in status:
-            output += f"{space_id}\t{charge}%\n"
-        
-        self._show_message(output)
+        self._switch_mode('ev')
+
+    def _switch_mode(self, mode: str):
+        if mode != self._status_mode:
+            self._status_mode = mode
+            self._go_to_page(0)
+        else:
+            self._request_refresh()
+
+    def _turn_page(self, step: int):
+        if self._status_mode is not None:
+            self._go_to_page(max(0, self._page + step))
+
+    def _go_to_page(self, page: int):
+        """Show another page; any fetch already in flight is for the old view and will be dropped"""
+        self._page = page
+        self._view_generation += 1
+        self._request_refresh()
+
+    def _auto_refresh(self):
+        """Keep the visible page current while the table is showing"""
+        self._request_refresh()
+        self.root.after(REFRESH_MS, self._auto_refresh)
+
+    def _request_refresh(self):
+        """Fetch the visible page on the worker; at most one fetch is in flight"""
+        if self._status_mode is None or self._refresh_pending:
+            return
+        self._refresh_pending = True
+        mode, page, generation = self._status_mode, self._page, self._view_generation
+        self.worker.submit(lambda: self._fetch_page(mode, page),
+                           lambda result: self._render_page(generation, result), self._refresh_failed)
+
+    def _fetch_page(self, mode: str, page: int) -> Tuple[str, int, int, List[Tuple[str, Tuple]]]:
+        """Collect one page of rows (worker thread)"""
+        summary = self.controller.summary()
+        kinds = (True,) if mode == 'ev' else (False, True)
+        total = sum(summary['ev' if is_ev else 'regular']['occupied'] for is_ev in kinds)
+        page = min(page, max(0, (total - 1) // PAGE_SIZE))
+        occupied = chain.from_iterable(
+            ((is_ev, space_id, vehicle) for space_id, vehicle in self.controller.iter_occupied(is_ev))
+            for is_ev in kinds)
+        rows = []
+        for is_ev, space_id, vehicle in islice(occupied, page * PAGE_SIZE, (page + 1) * PAGE_SIZE):
+            charge = f"{vehicle.charge_level}%" if vehicle.is_electric else ""
+            rows.append((f"{int(is_ev)}:{space_id}",
+                         ("EV" if is_ev else "Regular", space_id, vehicle.registration,
+                          vehicle.make, vehicle.model, vehicle.color, charge)))
+        return mode, page, total, rows
+
+    def _refresh_failed(self, error: Exception):
+        self._refresh_pending = False
+        self._show_message(f"Could not load status: {error}")
+
+    def _render_page(self, generation: int, result: Tuple[str, int, int, List[Tuple[str, Tuple]]]):
+        """Apply a fetched page to the table, touching only rows that changed"""
+        self._refresh_pending = False
+        if generation != self._view_generation:
+            # The user moved on while this page loaded; fetch the one they want now
+            self._request_refresh()
+            return
+        mode, page, total, rows = result
+        self._page = page  # clamped to the last page by the fetch
+        table = self.status_table
+        wanted = dict(rows)
+        for item in [item for item in self._rows if item not in wanted]:
+            table.delete(item)
+            del self._rows[item]
+        for index, (item, values) in enumerate(rows):
+            shown = self._rows.get(item)
+            if shown is None:
+                table.insert('', index, iid=item, values=values)
+            else:
+                if shown != values:
+                    table.item(item, values=values)
+                if table.index(item) != index:
+                    table.move(item, '', index)
+            self._rows[item] = values
+        pages = max(1, -(-total // PAGE_SIZE))
+        label = "EV vehicles" if mode == 'ev' else "Vehicles"
+        self.page_label.set(f"{label}: {total}  (page {page + 1} of {pages})")
 
     def _show_message(self, message: str):
         """Display a message in the output area"""
@@ -182,7 +338,10 @@ class ParkingLotView:
 
     def run(self):
         """Start the application"""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.worker.stop()
 
 def main():
     app = ParkingLotView()
@@ -1,85 +1,244 @@
-from flask import Flask, render_template, request, jsonify
-from flask_sqlalchemy import SQLAlchemy
-from flask_cors import CORS
-
-app = Flask(__name__)
-app.config['SECRET_KEY']='gs9df3nkj'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///database.db'
-db = SQLAlchemy(app)
-
-CORS(app)
-
-cors = CORS(app, resources={
-    r"/*": {
-        "origins": "*"
-    }
-})
+import csv
+import json
+import os
 
+import click
+from flask import Blueprint, Flask, Response, current_app, render_template, request, jsonify, stream_with_context
+from flask.cli import with_appcontext
+from flask_cors import CORS
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import selectinload
+
+import migrations
+from models import ShippingInfo, User, db
+from passwords import DEFAULT_ITERATIONS, PasswordHasher, PasswordHasherBusy, parse as parse_password_hash
+
+bp = Blueprint('shop', __name__)
+
+def create_app(config=None):
+    """Build the app. Nothing here connects to the database; run `flask init-db` to create or upgrade the schema."""
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'gs9df3nkj'
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///database.db'
+    app.config['PASSWORD_HASH_ITERATIONS'] = int(os.environ.get('PASSWORD_HASH_ITERATIONS', DEFAULT_ITERATIONS))
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+    if config:
+        app.config.update(config)
+    db.init_app(app)
+    CORS(app, resources={
+        r"/*": {
+            "origins": "*"
+        }
+    })
+    app.extensions['password_hasher'] = PasswordHasher(app.config['PASSWORD_HASH_ITERATIONS'],
+                                                       app.config['PASSWORD_HASH_WORKERS'])
+    app.register_blueprint(bp)
+    for command in (init_db, seed, import_users):
+        app.cli.add_command(command)
+    return app
+
+def password_hasher():
+    return current_app.extensions['password_hasher']
+
+@click.command('init-db')
+@with_appcontext
+def init_db():
+    """Create the schema, or bring an existing database up to the latest migration."""
+    for version, description in migrations.upgrade(db.engine):
+        click.echo(f'applied migration {version}: {description}')
+    click.echo(f'schema is at version {migrations.LATEST_VERSION}')
+
+SEED_SHIPPING = [
+    {'full_name': "Claudia Reyes", 'address': "Amsterdam 210, CDMX, Mexico", 'user_id': 2},
+    {'full_name': "Roy Latte", 'address': "Beau St, Bath BA1 1QY, UK", 'user_id': 1},
+]
+
+@click.command('seed')
+@with_appcontext
+def seed():
+    """Replace all shipping info with the demo addresses (importing the app used to do this on every start)."""
+    ShippingInfo.query.delete()
+    db.session.add_all(ShippingInfo(**row) for row in SEED_SHIPPING)
+    db.session.commit()
 
-with app.app_context():
-
-    class User(db.Model):
-        id = db.Column(db.Integer, primary_key=True)
-        username = db.Column(db.String(50), index=True, unique=True)
-        password = db.Column(db.String(128))
+ADMIN_PAGE_SIZE = 500
+ADMIN_MAX_PAGE_SIZE = 5000
+ADMIN_STREAM_BATCH = 1000
 
-        def __repr__(self):
-            return f'User {self.username}'
+def user_rows(after):
+    # Plain column rows in primary key order, so a page is an index range scan from the cursor
+    return db.session.query(User.id, User.username).filter(User.id > after).order_by(User.id)
 
-    class ShippingInfo(db.Model):
-        ship_id = db.Column(db.Integer, primary_key=True)
-        full_name = db.Column(db.String(50))
-        address = db.Column(db.String(50))
-        user_id = db.Column(db.Integer, db.ForeignKey("user.id"))
+def shipper_rows(after):
+    return (db.session.query(ShippingInfo.ship_id, ShippingInfo.full_name, ShippingInfo.address, ShippingInfo.user_id)
+            .filter(ShippingInfo.ship_id > after).order_by(ShippingInfo.ship_id))
 
-        def __repr__(self):
-            return f"{self.full_name}'s address is {self.address}."
+def user_json(row):
+    return {"username": row.username, "id": row.id}
 
-    db.create_all()
-    ShippingInfo.query.delete()
-    
-    ship1 = ShippingInfo(full_name="Claudia Reyes", address="Amsterdam 210, CDMX, Mexico", user_id=2)
+def shipper_json(row):
+    return {"full_name": row.full_name, "address": row.address, "user_id": row.user_id, "ship_id": row.ship_id}
 
-    ship2 = ShippingInfo(full_name="Roy Latte", address="Beau St, Bath BA1 1QY, UK", user_id=1)
+def admin_limit():
+    return min(max(request.args.get('limit', ADMIN_PAGE_SIZE, type=int), 1), ADMIN_MAX_PAGE_SIZE)
 
-    db.session.add(ship1)
-    db.session.add(ship2)
-    db.session.commit()
+def admin_cursors():
+    return request.args.get('after_user', 0, type=int), request.args.get('after_ship', 0, type=int)
 
-@app.route("/admin", methods=["GET"])
+@bp.route("/admin", methods=["GET"])
 def admin():
-    db_users = User.query.all()
-    db_shippers = ShippingInfo.query.all()
-
-    users = []
-    for db_user in db_users:
-        users.append({
-            "username": db_user.username, 
-            "id": db_user.id
-        })
-
-    shippers = []
-    for db_shipper in db_shippers:
-        shippers.append({
-            "full_name": db_shipper.full_name, 
-            "address": db_shipper.address, 
-            "user_id": db_shipper.user_id
-        })
+    """One page of users and shippers; pass next_after_user/next_after_ship back as after_user/after_ship"""
+    limit = admin_limit()
+    after_user, after_ship = admin_cursors()
+    db_users = user_rows(after_user).limit(limit + 1).all()
+    db_shippers = shipper_rows(after_ship).limit(limit + 1).all()
 
     return jsonify({
-        'users': users, 
-        'shippers': shippers
+        "users": [user_json(row) for row in db_users[:limit]],
+        "shippers": [shipper_json(row) for row in db_shippers[:limit]],
+        "next_after_user": db_users[limit - 1].id if len(db_users) > limit else None,
+        "next_after_ship": db_shippers[limit - 1].ship_id if len(db_shippers) > limit else None
     })
 
-@app.route('/register', methods=['POST'])
+@bp.route("/admin/view", methods=["GET"])
+def admin_view():
+    """The admin page: a page of users with their addresses fetched by one IN query and grouped per user"""
+    limit = admin_limit()
+    after_user, _ = admin_cursors()
+    users = (User.query.options(selectinload(User.addresses))
+             .filter(User.id > after_user).order_by(User.id).limit(limit + 1).all())
+    next_after_user = users[limit - 1].id if len(users) > limit else None
+    return render_template('admin.html', users=users[:limit], next_after_user=next_after_user, limit=limit)
+
+@bp.route("/admin/stream", methods=["GET"])
+def admin_stream():
+    """Every user then every shipper as newline-delimited JSON, read in batches from the cursor"""
+    after_user, after_ship = admin_cursors()
+
+    def generate():
+        for kind, rows, to_json in (("user", user_rows(after_user), user_json),
+                                    ("shipper", shipper_rows(after_ship), shipper_json)):
+            lines = []
+            for row in rows.yield_per(ADMIN_STREAM_BATCH):
+                lines.append(json.dumps(dict(to_json(row), type=kind)))
+                if len(lines) == ADMIN_STREAM_BATCH:
+                    yield "\n".join(lines) + "\n"
+                    lines = []
+            if lines:
+                yield "\n".join(lines) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+@bp.route('/register', methods=['POST'])
 def register():
     json_data = request.get_json()
-    match = User.query.filter_by(username=json_data['uname']).first()
-    if match:
+    try:
+        password = password_hasher().hash(json_data['pword'])
+    except PasswordHasherBusy:
+        return jsonify({'Message': 'Too many signups right now, please try again.'}), 503
+
+    # One INSERT ... ON CONFLICT DO NOTHING: the unique index decides, no lookup first
+    created = insert_users([(json_data['uname'], password)])
+    db.session.commit()
+    if not created:
         return jsonify({'Message': 'User already exists!'})
 
-    us = User(username = json_data['uname'], password = json_data['pword'])
-    db.session.add(us)
+    return jsonify({'Message': 'A new user was created!'})
+
+@bp.route('/login', methods=['POST'])
+def login():
+    json_data = request.get_json()
+    user = User.query.filter_by(username=json_data['uname']).first()
+    try:
+        matches, new_hash = password_hasher().check(json_data['pword'], user.password if user else None)
+    except PasswordHasherBusy:
+        return jsonify({'Message': 'Too many logins right now, please try again.'}), 503
+    if not matches:
+        return jsonify({'Message': 'Invalid username or password!'}), 401
+    if new_hash:
+        # Stored with an older cost (or before hashing); upgrade while we have the password
+        user.password = new_hash
+        db.session.commit()
+
+    return jsonify({'Message': 'Logged in!'})
+
+BULK_MAX_USERS = 10_000
+# Each plain password costs a full PBKDF2 hash inside the request; bigger imports should send password_hash
+BULK_MAX_PLAIN_PASSWORDS = 50
+
+def insert_users(accounts):
+    """Insert (username, password hash) pairs with one executemany, skipping taken usernames; returns how many were new"""
+    if not accounts:
+        return 0
+    result = db.session.execute(
+        sqlite_insert(User.__table__).on_conflict_do_nothing(index_elements=['username']),
+        [{'username': username, 'password': password} for username, password in accounts])
+    return result.rowcount
+
+def hash_accounts(entries):
+    """(username, password hash) for entries carrying either pword or an existing pbkdf2 password_hash"""
+    plain = [entry['pword'] for entry in entries if 'password_hash' not in entry]
+    hashed = iter(password_hasher().hash_many(plain))
+    return [(entry['uname'], entry['password_hash'] if 'password_hash' in entry else next(hashed))
+            for entry in entries]
+
+def invalid_account(entry):
+    if not isinstance(entry, dict) or not isinstance(entry.get('uname'), str) or not entry['uname']:
+        return 'a username is required'
+    if 'password_hash' in entry:
+        return None if parse_password_hash(entry['password_hash']) else 'password_hash is not a pbkdf2_sha256 hash'
+    if not isinstance(entry.get('pword'), str) or not entry['pword']:
+        return 'a password is required'
+    return None
+
+@bp.route('/register/bulk', methods=['POST'])
+def register_bulk():
+    """Create up to BULK_MAX_USERS accounts in one transaction; existing usernames are skipped
+
+    Only BULK_MAX_PLAIN_PASSWORDS of them may carry a plain pword, since each is hashed before the
+    response; migrations send password_hash instead, or use `flask import-users`.
+    """
+    entries = request.get_json()
+    if not isinstance(entries, list):
+        return jsonify({'Message': 'Expected a JSON list of {uname, pword} objects.'}), 400
+    if len(entries) > BULK_MAX_USERS:
+        return jsonify({'Message': f'At most {BULK_MAX_USERS} users per request.'}), 413
+    for index, entry in enumerate(entries):
+        problem = invalid_account(entry)
+        if problem:
+            return jsonify({'Message': f'Entry {index}: {problem}.'}), 400
+    if sum('password_hash' not in entry for entry in entries) > BULK_MAX_PLAIN_PASSWORDS:
+        return jsonify({'Message': f'At most {BULK_MAX_PLAIN_PASSWORDS} plain passwords per request; '
+                                   'send existing pbkdf2_sha256 hashes as password_hash to import more.'}), 413
+    try:
+        accounts = hash_accounts(entries)
+    except PasswordHasherBusy:
+        return jsonify({'Message': 'Too many signups right now, please try again.'}), 503
+    created = insert_users(accounts)
     db.session.commit()
 
-    return jsonify({'Message': 'A new user was created!'}) 
+    return jsonify({'Message': f'{created} new users were created!', 'created': created,
+                    'skipped': len(entries) - created})
+
+@click.command('import-users')
+@with_appcontext
+@click.argument('csv_file', type=click.File())
+def import_users(csv_file):
+    """Import accounts from a CSV with username and password (or password_hash) columns, in one transaction."""
+    reader = csv.DictReader(csv_file)
+    created = total = 0
+    while True:
+        batch = [row for _, row in zip(range(BULK_MAX_USERS), reader)]
+        if not batch:
+            break
+        entries = [{'uname': row['username'], 'password_hash': row['password_hash']} if row.get('password_hash')
+                   else {'uname': row['username'], 'pword': row.get('password')} for row in batch]
+        for line, entry in enumerate(entries, start=total + 2):
+            problem = invalid_account(entry)
+            if problem:
+                db.session.rollback()
+                raise click.ClickException(f'line {line}: {problem}')
+        created += insert_users(hash_accounts(entries))
+        total += len(batch)
+    db.session.commit()
+    click.echo(f'{created} users created, {total - created} usernames already taken')
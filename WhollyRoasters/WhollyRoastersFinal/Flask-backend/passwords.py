@@ -0,0 +1,130 @@
+"""Salted PBKDF2 password hashes, computed on a bounded pool of worker threads.
+
+Hashes are stored as pbkdf2_sha256$<iterations>$<salt>$<hash>, so the cost can be raised
+later and old hashes are upgraded the next time their owner logs in. hashlib releases the
+GIL while it hashes, so the workers run in parallel with each other and with requests.
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+ALGORITHM = 'pbkdf2_sha256'
+DEFAULT_ITERATIONS = 600_000
+SALT_BYTES = 16
+
+class PasswordHasherBusy(Exception):
+    """Raised when every worker is busy and the wait queue stays full for queue_timeout seconds"""
+
+def _b64(raw):
+    return base64.b64encode(raw).decode('ascii').rstrip('=')
+
+def _unb64(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4), validate=True)
+
+def _derive(password, salt, iterations):
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+
+def encode(password, iterations, salt=None):
+    salt = salt or os.urandom(SALT_BYTES)
+    return f"{ALGORITHM}${iterations}${_b64(salt)}${_b64(_derive(password, salt, iterations))}"
+
+def parse(encoded):
+    """(iterations, salt, digest) of a stored hash, or None if it isn't one of ours"""
+    parts = encoded.split('$') if isinstance(encoded, str) else []
+    # isdigit() alone accepts digits like '²' that int() rejects
+    if len(parts) != 4 or parts[0] != ALGORITHM or not (parts[1].isascii() and parts[1].isdigit()):
+        return None
+    iterations = int(parts[1])
+    if iterations < 1:
+        return None
+    try:
+        return iterations, _unb64(parts[2]), _unb64(parts[3])
+    except (binascii.Error, ValueError):
+        return None
+
+def verify(password, encoded):
+    parsed = parse(encoded)
+    if parsed is None:
+        # Accounts created before hashing stored the password as plain text
+        return encoded is not None and hmac.compare_digest(password.encode('utf-8'), encoded.encode('utf-8'))
+    iterations, salt, digest = parsed
+    return hmac.compare_digest(_derive(password, salt, iterations), digest)
+
+class PasswordHasher:
+    """
+    Hashes and checks passwords on at most `workers` threads.
+
+    Up to `queue_size` more callers may wait for a worker; beyond that a caller blocks for
+    up to `queue_timeout` seconds and then gets PasswordHasherBusy, so a burst of signups
+    turns into quick 503s instead of an ever-growing backlog of CPU-bound work.
+    """
+
+    def __init__(self, iterations=DEFAULT_ITERATIONS, workers=None, queue_size=None, queue_timeout=5.0):
+        self.iterations = iterations
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_timeout = queue_timeout
+        if queue_size is None:
+            queue_size = 4 * self.workers
+        self._slots = threading.BoundedSemaphore(self.workers + queue_size)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+        # Checked against when the user doesn't exist, so a miss costs as much as a wrong password.
+        # Made on first use: hashing it here would put a full-cost hash on every app start.
+        self._dummy = None
+
+    def _submit(self, function, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise PasswordHasherBusy()
+        try:
+            future = self._pool.submit(function, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _run(self, function, *args):
+        return self._submit(function, *args).result()
+
+    def hash(self, password):
+        return self._run(encode, password, self.iterations)
+
+    def hash_many(self, passwords):
+        """
+        Hashes in input order, keeping every worker busy.
+
+        At most `workers` of them are in the pool at once, so the wait queue stays free for
+        interactive hash() and check() calls rather than turning them away with PasswordHasherBusy.
+        """
+        hashes, pending = [], deque()
+        for password in passwords:
+            if len(pending) == self.workers:
+                hashes.append(pending.popleft().result())
+            pending.append(self._submit(encode, password, self.iterations))
+        hashes.extend(future.result() for future in pending)
+        return hashes
+
+    def needs_rehash(self, encoded):
+        parsed = parse(encoded)
+        return parsed is None or parsed[0] != self.iterations
+
+    def _check(self, password, encoded):
+        if not verify(password, encoded):
+            return False, None
+        return True, encode(password, self.iterations) if self.needs_rehash(encoded) else None
+
+    def check(self, password, encoded):
+        """(matches, new hash to store or None) in one trip to the pool; encoded=None checks against a dummy"""
+        if encoded is None:
+            if self._dummy is None:
+                self._dummy = self._run(encode, '', self.iterations)
+            self._run(verify, password, self._dummy)
+            return False, None
+        return self._run(self._check, password, encoded)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
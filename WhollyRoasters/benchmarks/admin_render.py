@@ -0,0 +1,93 @@
+"""Time loading and rendering the admin page with the old nested template loop and with the grouped view.
+
+Usage: python benchmarks/admin_render.py [--app DIR] [--users N] [--addresses N] [--sample N]
+--app picks which backend to load (default: the app.py next to this folder). The rows go into a
+throwaway in-memory database, not the app's own. The old loop walks every address for every user,
+so it renders the first --sample users and scales the time up by users / sample (0 renders all).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, selectinload
+
+# What templates/admin.html did before users carried their own addresses
+OLD_ADMIN = """{% extends "layout.html" %}
+{% block container %}
+    {% for user in users %}
+    <div>
+        <p><b>{{ user.username }}</b></p>
+        {% for shipper in shippers %}
+            {% if user.id == shipper.user_id %}
+                <p>{{ shipper.full_name }}: {{ shipper.address }}</p>
+            {% endif %}
+        {% endfor %}
+    </div>
+    {% endfor %}
+{% endblock %}"""
+
+def load_app(directory: str):
+    # app.py resolves its templates and sibling modules relative to its own folder
+    sys.path.insert(0, directory)
+    import app
+    return app
+
+def fill(engine, module, users: int, addresses: int) -> None:
+    module.migrations.upgrade(engine)
+    rng = random.Random(22)
+    with engine.begin() as connection:
+        connection.execute(module.User.__table__.insert(),
+                           [{"username": f"user{i}", "password": "x"} for i in range(users)])
+        connection.execute(module.ShippingInfo.__table__.insert(),
+                           [{"full_name": f"Customer {i}", "address": f"{i} Roast St", "user_id": rng.randint(1, users)}
+                            for i in range(addresses)])
+
+def timed(label: str, run, scale: float = 1.0) -> str:
+    start = time.perf_counter()
+    html = run()
+    note = f" (x{scale:.0f} from a sample)" if scale > 1 else ""
+    print(f"{label:<34} {(time.perf_counter() - start) * scale:8.2f} s{note}")
+    return html
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--app', default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--addresses', type=int, default=20_000)
+    parser.add_argument('--sample', type=int, default=500, help="users rendered by the old loop")
+    args = parser.parse_args()
+
+    module = load_app(os.path.abspath(args.app))
+    app = module.create_app()
+    User, ShippingInfo = module.User, module.ShippingInfo
+    engine = create_engine('sqlite://')
+    fill(engine, module, args.users, args.addresses)
+    old_template = app.jinja_env.from_string(OLD_ADMIN)
+    new_template = app.jinja_env.get_template('admin.html')
+
+    sample = min(args.sample or args.users, args.users)
+
+    def before():
+        with Session(engine) as session:
+            users = session.query(User).order_by(User.id).all()[:sample]
+            shippers = session.query(ShippingInfo).all()
+            return old_template.render(users=users, shippers=shippers)
+
+    def after(limit=None):
+        with Session(engine) as session:
+            users = session.query(User).options(selectinload(User.addresses)).order_by(User.id).limit(limit).all()
+            return new_template.render(users=users, next_after_user=None, limit=len(users))
+
+    print(f"{args.users:,} users, {args.addresses:,} addresses")
+    with app.test_request_context():
+        old_html = timed("before: all() x2, nested loop", before, args.users / sample)
+        timed("after: selectinload, grouped", after)
+        new_html = after(sample)
+    lines = lambda html: [line.strip() for line in html.splitlines() if line.strip()]
+    print("rendered the same rows" if lines(old_html) == lines(new_html) else "OUTPUT DIFFERS")
+
+if __name__ == "__main__":
+    main()
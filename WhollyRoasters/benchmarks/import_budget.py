@@ -0,0 +1,75 @@
+"""Check that importing and building the app stays within a time budget and never touches the database.
+
+Usage: python benchmarks/import_budget.py [--app DIR] [--runs N] [--budget-ms MS]
+Each run is a fresh interpreter that imports app, calls create_app() pointed at a database file that
+doesn't exist yet, serves GET /about (a 404 in backends without it is fine), and reports whether the
+file appeared. Exits non-zero if the best run is over budget, a request failed, or any run created the
+database.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+PROBE = """
+import json, os, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + sys.argv[1]})
+built = time.perf_counter()
+status = flask_app.test_client().get('/about').status_code
+print(json.dumps({'import_ms': (imported - start) * 1000, 'create_app_ms': (built - imported) * 1000,
+                  'status': status, 'database_created': os.path.exists(sys.argv[1])}))
+"""
+
+def probe(directory, database):
+    output = subprocess.run([sys.executable, '-c', PROBE, database], cwd=directory, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+def slowest_imports(directory, count=8):
+    """Modules with the most self time, from one -X importtime run"""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=directory, check=True,
+                            capture_output=True, text=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[0].split(':')[-1].strip().isdigit():
+            rows.append((int(parts[0].split(':')[-1]), int(parts[1]), parts[2].strip()))
+    return sorted(rows, reverse=True)[:count]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--app', default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=800.0, help="import plus create_app, best run")
+    args = parser.parse_args()
+
+    directory = os.path.abspath(args.app)
+    with tempfile.TemporaryDirectory() as scratch:
+        results = [probe(directory, os.path.join(scratch, f'run{run}.db')) for run in range(args.runs)]
+    best = min(results, key=lambda result: result['import_ms'] + result['create_app_ms'])
+    total = best['import_ms'] + best['create_app_ms']
+    print(f"import app   {best['import_ms']:7.0f} ms")
+    print(f"create_app() {best['create_app_ms']:7.0f} ms")
+    print(f"total        {total:7.0f} ms  (budget {args.budget_ms:.0f} ms, best of {args.runs})")
+    print("slowest modules (self ms, cumulative ms):")
+    for self_us, cumulative_us, module in slowest_imports(directory):
+        print(f"  {self_us / 1000:7.1f} {cumulative_us / 1000:7.1f}  {module}")
+
+    failures = []
+    if any(result['database_created'] for result in results):
+        failures.append("building the app created the database file")
+    if any(result['status'] >= 500 for result in results):
+        failures.append("GET /about failed with a server error")
+    if total > args.budget_ms:
+        failures.append(f"{total:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Measure signups per second and latency of the password hasher for a range of costs and pool sizes.
+
+Usage: python benchmarks/password_hashing.py [--iterations N,N,...] [--workers N,N,...] [--clients N] [--seconds S]
+Each client thread stands in for a request thread calling hasher.hash() back to back; 'busy' counts
+calls turned away after waiting queue_timeout for a slot.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passwords import PasswordHasher, PasswordHasherBusy
+
+def numbers(text):
+    return [int(part) for part in text.split(',')]
+
+def run(iterations, workers, clients, seconds, queue_timeout):
+    hasher = PasswordHasher(iterations, workers, queue_timeout=queue_timeout)
+    latencies, busy = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client(number):
+        count = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                hasher.hash(f"password-{number}-{count}")
+            except PasswordHasherBusy:
+                with lock:
+                    busy[0] += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+            count += 1
+
+    threads = [threading.Thread(target=client, args=(number,)) for number in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    hasher.shutdown()
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+    print(f"{iterations:>10,} {workers:>7} {len(latencies) / elapsed:>10.1f} {p50:>9.0f} {p99:>9.0f} {busy[0]:>6}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=numbers, default=[100_000, 300_000, 600_000])
+    parser.add_argument('--workers', type=numbers, default=sorted({1, os.cpu_count() or 1}))
+    parser.add_argument('--clients', type=int, default=16, help="concurrent request threads")
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--queue-timeout', type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{'iterations':>10} {'workers':>7} {'signups/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'busy':>6}")
+    for iterations in args.iterations:
+        for workers in args.workers:
+            run(iterations, workers, args.clients, args.seconds, args.queue_timeout)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Versioned schema migrations, with the schema version kept in SQLite's user_version.
+
+Each migration moves the schema up one version and then records that version.
+Statements use IF NOT EXISTS, so version 1 adopts a database made by the old
+import-time db.create_all() and re-running a half-applied migration is harmless.
+Add new versions at the end; never edit one that has shipped.
+"""
+MIGRATIONS = [
+    (1, "users and shipping info", [
+        "CREATE TABLE IF NOT EXISTS user (id INTEGER NOT NULL, username VARCHAR(50), password VARCHAR(128), "
+        "PRIMARY KEY (id))",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_user_username ON user (username)",
+        "CREATE TABLE IF NOT EXISTS shipping_info (ship_id INTEGER NOT NULL, full_name VARCHAR(100) NOT NULL, "
+        "address VARCHAR(200) NOT NULL, user_id INTEGER NOT NULL, "
+        "PRIMARY KEY (ship_id), FOREIGN KEY(user_id) REFERENCES user (id))",
+    ]),
+    (2, "index shipping info by user", [
+        "CREATE INDEX IF NOT EXISTS ix_shipping_info_user_id ON shipping_info (user_id)",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def current_version(connection):
+    return connection.exec_driver_sql('PRAGMA user_version').scalar()
+
+def upgrade(engine, target=LATEST_VERSION):
+    """Apply the migrations between the database's version and target; returns the (version, description) applied"""
+    applied = []
+    for version, description, statements in MIGRATIONS:
+        if version > target:
+            break
+        with engine.begin() as connection:
+            if current_version(connection) >= version:
+                continue
+            for statement in statements:
+                connection.exec_driver_sql(statement)
+            connection.exec_driver_sql(f'PRAGMA user_version = {int(version)}')
+        applied.append((version, description))
+    return applied
@@ -0,0 +1,22 @@
+"""Database models. db is bound to an app by create_app(), so importing this touches no database."""
+from flask_sqlalchemy import SQLAlchemy
+
+db = SQLAlchemy()
+
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(50), index=True, unique=True)
+    password = db.Column(db.String(128))
+    addresses = db.relationship('ShippingInfo', backref='user', order_by='ShippingInfo.ship_id')
+
+    def __repr__(self):
+        return f'User {self.username}'
+
+class ShippingInfo(db.Model):
+    ship_id = db.Column(db.Integer, primary_key=True)
+    full_name = db.Column(db.String(100), nullable=False)
+    address = db.Column(db.String(200), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+
+    def __repr__(self):
+        return f'ShippingInfo {self.full_name} address is {self.address}'